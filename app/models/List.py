@@ -1,9 +1,14 @@
 from app.shared.config.database import Base
 from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy.orm import relationship
 
 class List(Base):
     __tablename__ = "lists"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     list_name = Column(String(100), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
\ No newline at end of file
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, index=True)
+
+    # Solo lectura: las altas y bajas se hacen sobre RecipeList. lazy="raise"
+    # obliga a cargarla explícitamente (selectinload) y evita el N+1
+    recipes = relationship("Recipe", secondary="recipe_lists", order_by="RecipeList.id", viewonly=True, lazy="raise")
\ No newline at end of file
@@ -1,17 +1,51 @@
 from app.shared.config.database import Base
-from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, Enum
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, Enum, Index
 from sqlalchemy.dialects.mysql import SET
+from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
 
+DAYS = ('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo')
+
+
+class DaySet(TypeDecorator):
+    """
+    Conjunto de días: SET nativo en MySQL y texto separado por comas (el
+    mismo formato que usa MySQL) en otros motores, como el SQLite de los
+    benchmarks
+    """
+    impl = String(100)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(SET(*DAYS))
+        return dialect.type_descriptor(String(100))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name == "mysql" or isinstance(value, str):
+            return value
+        return ",".join(day for day in DAYS if day in value)
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name == "mysql":
+            return value
+        return set(value.split(",")) if value else set()
+
+
 
 class Recipe(Base):
     __tablename__ = "recipes"
+    __table_args__ = (Index("ix_recipes_user_id_meal_type", "user_id", "meal_type"),)
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), nullable=False)
     description = Column(String(255), nullable=False)
     ingredients = Column(String(500), nullable=False)
     instructions = Column(String(1000), nullable=False)
-    scheduled_days = Column(SET('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo'), nullable=True)
+    scheduled_days = Column(DaySet(), nullable=True)
     meal_type = Column(Enum('Desayuno', 'Comida', 'Cena'), nullable=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
\ No newline at end of file
+    # En InnoDB el índice incluye la PK: (user_id, id) sirve para la paginación por usuario
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, index=True)
+
+    lists = relationship("List", secondary="recipe_lists", viewonly=True, lazy="raise")
\ No newline at end of file
@@ -1,9 +1,16 @@
 from app.shared.config.database import Base
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
 
 class RecipeList(Base):
     __tablename__ = "recipe_lists"
+    # Una receta aparece una sola vez por lista; las altas usan INSERT IGNORE sobre este índice,
+    # que también cubre las búsquedas por list_id
+    __table_args__ = (UniqueConstraint("list_id", "recipe_id", name="uq_recipe_lists_list_recipe"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     list_id = Column(Integer, ForeignKey("lists.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
-    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
\ No newline at end of file
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, index=True)
+
+    list = relationship("List", viewonly=True, lazy="raise")
+    recipe = relationship("Recipe", viewonly=True, lazy="raise")
\ No newline at end of file
@@ -1,134 +1,168 @@
 """
 Rutas para ejercicios (proxy a ExerciseDB API)
 """
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from typing import List, Dict, Any, Optional
-from app.services.exercise_service import ExerciseService
-from app.services.cache_service import cache
-from app.schemas.exercise_schema import ExerciseListResponse, ExerciseDetailResponse
+from app.services.exercise_service import ExerciseService, get_exercise_service
+from app.services.cache_service import cache, rendered_cache
+from app.services.exercise_catalog import catalog
+from app.services.singleflight import singleflight
+from app.shared.config.external_api_config import CACHE_STALE_IF_ERROR, CACHE_STALE_WHILE_REVALIDATE, CACHE_TTL
+from app.schemas.exercise_schema import ExerciseListResponse, ExerciseDetailResponse, ExerciseSearchResponse
 
 exercise_router = APIRouter()
 
 
+def _json(body: bytes) -> Response:
+    """
+    Respuesta con un cuerpo JSON ya validado y serializado por el servicio
+
+    Al retornar un Response, FastAPI no vuelve a validar ni serializar con
+    response_model, que se mantiene para la documentación OpenAPI.
+    """
+    return Response(content=body, media_type="application/json")
+
+
 @exercise_router.get("/exercises", response_model=ExerciseListResponse)
 async def get_exercises(
     limit: Optional[int] = Query(None, ge=1, le=1000, description="Número máximo de resultados"),
-    offset: Optional[int] = Query(None, ge=0, description="Número de resultados a saltar")
+    offset: Optional[int] = Query(None, ge=0, description="Número de resultados a saltar"),
+    service: ExerciseService = Depends(get_exercise_service)
 ):
     """
     Obtiene todos los ejercicios disponibles con paginación
     """
-    service = ExerciseService()
-    try:
-        exercises = await service.get_all_exercises(limit=limit, offset=offset)
-        return exercises
-    finally:
-        await service.close()
+    return _json(await service.get_all_exercises_json(limit=limit, offset=offset))
+
+
+@exercise_router.get("/exercises/search", response_model=ExerciseSearchResponse)
+async def search_exercises(
+    q: str = Query(..., min_length=1, max_length=100, description="Texto a buscar en nombres e instrucciones"),
+    limit: int = Query(20, ge=1, le=100, description="Número máximo de resultados"),
+    service: ExerciseService = Depends(get_exercise_service)
+):
+    """
+    Busca ejercicios por nombre e instrucciones
+    
+    Admite prefijos ("dumb") y errores de tipeo ("dumbell")
+    """
+    return await service.search_exercises(q, limit=limit)
+
+
+@exercise_router.get("/exercises/filter", response_model=ExerciseListResponse)
+async def filter_exercises(
+    bodypart: Optional[str] = Query(None, description="Parte del cuerpo"),
+    target: Optional[str] = Query(None, description="Músculo objetivo"),
+    equipment: Optional[str] = Query(None, description="Tipo de equipo"),
+    secondary: Optional[str] = Query(None, description="Músculo secundario"),
+    service: ExerciseService = Depends(get_exercise_service)
+):
+    """
+    Filtra ejercicios combinando varios criterios (ej: bodypart=chest y equipment=dumbbell)
+    
+    Requiere mirror mode (EXERCISE_MIRROR_ENABLED)
+    """
+    return service.filter_exercises(bodypart=bodypart, target=target, equipment=equipment, secondary=secondary)
 
 
 @exercise_router.get("/exercises/{exercise_id}", response_model=ExerciseDetailResponse)
-async def get_exercise(exercise_id: str):
+async def get_exercise(exercise_id: str, service: ExerciseService = Depends(get_exercise_service)):
     """
     Obtiene un ejercicio específico por su ID
     """
-    service = ExerciseService()
-    try:
-        exercise = await service.get_exercise_by_id(exercise_id)
-        return exercise
-    finally:
-        await service.close()
+    return _json(await service.get_exercise_by_id(exercise_id))
 
 
 @exercise_router.get("/exercises/bodypart/{bodypart}", response_model=ExerciseListResponse)
-async def get_exercises_by_bodypart(bodypart: str):
+async def get_exercises_by_bodypart(bodypart: str, service: ExerciseService = Depends(get_exercise_service)):
     """
     Obtiene ejercicios filtrados por parte del cuerpo
     
     Ejemplos: back, chest, legs, shoulders, arms, etc.
     """
-    service = ExerciseService()
-    try:
-        exercises = await service.get_exercises_by_bodypart(bodypart)
-        return exercises
-    finally:
-        await service.close()
+    return _json(await service.get_exercises_by_bodypart(bodypart))
 
 
 @exercise_router.get("/exercises/target/{target}", response_model=ExerciseListResponse)
-async def get_exercises_by_target(target: str):
+async def get_exercises_by_target(target: str, service: ExerciseService = Depends(get_exercise_service)):
     """
     Obtiene ejercicios filtrados por músculo objetivo
     """
-    service = ExerciseService()
-    try:
-        exercises = await service.get_exercises_by_target(target)
-        return exercises
-    finally:
-        await service.close()
+    return _json(await service.get_exercises_by_target(target))
 
 
 @exercise_router.get("/exercises/equipment/{equipment}", response_model=ExerciseListResponse)
-async def get_exercises_by_equipment(equipment: str):
+async def get_exercises_by_equipment(equipment: str, service: ExerciseService = Depends(get_exercise_service)):
     """
     Obtiene ejercicios filtrados por tipo de equipo
     
     Ejemplos: barbell, dumbbell, bodyweight, cable, machine, etc.
     """
-    service = ExerciseService()
-    try:
-        exercises = await service.get_exercises_by_equipment(equipment)
-        return exercises
-    finally:
-        await service.close()
+    return _json(await service.get_exercises_by_equipment(equipment))
 
 
 @exercise_router.get("/exercises/metadata/bodyparts", response_model=List[str])
-async def get_body_parts():
+async def get_body_parts(service: ExerciseService = Depends(get_exercise_service)):
     """
     Obtiene la lista de todas las partes del cuerpo disponibles
     """
-    service = ExerciseService()
-    try:
-        bodyparts = await service.get_body_parts()
-        return bodyparts
-    finally:
-        await service.close()
+    return _json(await service.get_body_parts())
 
 
 @exercise_router.get("/exercises/metadata/targets", response_model=List[str])
-async def get_target_muscles():
+async def get_target_muscles(service: ExerciseService = Depends(get_exercise_service)):
     """
     Obtiene la lista de todos los músculos objetivo disponibles
     """
-    service = ExerciseService()
-    try:
-        targets = await service.get_target_muscles()
-        return targets
-    finally:
-        await service.close()
+    return _json(await service.get_target_muscles())
 
 
 @exercise_router.get("/exercises/metadata/equipment", response_model=List[str])
-async def get_equipment_list():
+async def get_equipment_list(service: ExerciseService = Depends(get_exercise_service)):
     """
     Obtiene la lista de todos los equipos disponibles
     """
-    service = ExerciseService()
-    try:
-        equipment = await service.get_equipment_list()
-        return equipment
-    finally:
-        await service.close()
+    return _json(await service.get_equipment_list())
+
+
+@exercise_router.post("/exercises/mirror/sync")
+async def sync_exercise_mirror(service: ExerciseService = Depends(get_exercise_service)):
+    """
+    Descarga de nuevo el catálogo completo de ExerciseDB para el mirror mode
+    """
+    total = await service.sync_catalog()
+    return {
+        "message": f"{total} ejercicios sincronizados",
+        "exercise_count": total,
+        "synced_at": catalog.synced_at
+    }
 
 
 @exercise_router.get("/cache/stats")
 async def get_cache_stats():
     """
-    Obtiene estadísticas del caché (número de entradas)
+    Obtiene estadísticas del caché
+
+    Entradas, tamaño aproximado (JSON serializado), respuestas ya
+    serializadas de este worker (rendered) y TTLs configurados, y
+    por prefijo y por endpoint: aciertos, aciertos obsoletos, fallos,
+    escrituras, expiraciones, desalojos y percentiles de latencia de las
+    búsquedas. Los contadores son los del worker que atiende la petición.
     """
     return {
-        "cache_entries": cache.size(),
-        "ttl_seconds": 3600,
+        "backend": cache.backend,
+        "cache_entries": await cache.run(cache.size),
+        "max_entries": cache.max_entries,
+        "approx_bytes": await cache.run(cache.size_bytes),
+        "max_bytes": cache.max_bytes,
+        "evictions": cache.evictions,
+        "rendered_entries": rendered_cache.size(),
+        "rendered_bytes": rendered_cache.size_bytes(),
+        "upstream_calls": singleflight.stats(),
+        "ttl_seconds": CACHE_TTL,
+        "stale_while_revalidate_seconds": CACHE_STALE_WHILE_REVALIDATE,
+        "stale_if_error_seconds": CACHE_STALE_IF_ERROR,
+        "stats": await cache.run(cache.stats_snapshot),
         "status": "active"
     }
 
@@ -137,8 +171,11 @@ async def get_cache_stats():
 async def clear_cache():
     """
     Limpia todo el caché de ejercicios
+
+    Con CACHE_BACKEND=sqlite se limpia en todos los workers del host
     """
-    cache.clear()
+    await cache.run(cache.clear)
+    rendered_cache.clear()
     return {"message": "Caché limpiado exitosamente"}
 
 
@@ -147,7 +184,8 @@ async def clear_expired_cache():
     """
     Limpia solo las entradas expiradas del caché
     """
-    deleted = cache.clear_expired()
+    deleted = await cache.run(cache.clear_expired)
+    rendered_cache.clear_expired()
     return {
         "message": f"{deleted} entradas expiradas eliminadas",
         "deleted_count": deleted
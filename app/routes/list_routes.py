@@ -1,51 +1,135 @@
+from typing import Optional
 from app.shared.config.database import get_db
-from sqlalchemy.orm import Session
-from app.schemas.list_schema import ListCreate, ListResponse
-from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.list_schema import ListCreate, ListRecipesAdded, ListRecipesRemoved, ListRecipesRequest, ListResponse
+from app.schemas.recipe_schema import RecipeResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from app.services.list_service import ListService
+from app.services.auth_service import get_current_user
+from app.services.resource_versions import LIST, USER_LISTS, resource_versions
+from app.shared.etag import etag_matches, not_modified, set_etag
+from app.shared.pagination import decode_cursor, set_next_cursor
+from app.shared.streaming import ndjson_response, wants_ndjson
 
-list_routes = APIRouter()
+# Todas las rutas exigen un token Bearer (ver AuthService)
+list_routes = APIRouter(dependencies=[Depends(get_current_user)])
 
 
 @list_routes.post("/lists", response_model=ListResponse, status_code=status.HTTP_201_CREATED)
-def create_list(list_item: ListCreate, db: Session = Depends(get_db)):
+async def create_list(list_item: ListCreate, db: AsyncSession = Depends(get_db)):
     """Crea una nueva lista"""
-    return ListService.create_list(db, list_item)
+    return await ListService.create_list(db, list_item)
 
 
 @list_routes.get("/lists/{list_id}", response_model=ListResponse)
-def get_list(list_id: int, db: Session = Depends(get_db)):
-    """Obtiene una lista por ID"""
-    return ListService.get_list_by_id(db, list_id)
+async def get_list(list_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    """
+    Obtiene una lista por ID
+
+    Retorna un ETag; con If-None-Match y la lista sin cambios (ni en sus
+    recetas) responde 304 sin consultar la base de datos.
+    """
+    etag = resource_versions.etag(LIST, list_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    list_item = await ListService.get_list_by_id(db, list_id)
+    set_etag(response, etag)
+    return list_item
 
 
 @list_routes.delete("/lists/{list_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_list(list_id: int, db: Session = Depends(get_db)):
+async def delete_list(list_id: int, db: AsyncSession = Depends(get_db)):
     """Elimina una lista"""
-    ListService.delete_list(db, list_id)
+    await ListService.delete_list(db, list_id)
     return
 
 
 @list_routes.put("/lists/{list_id}", response_model=ListResponse)
-def update_list(list_id: int, list_item: ListCreate, db: Session = Depends(get_db)):
+async def update_list(list_id: int, list_item: ListCreate, db: AsyncSession = Depends(get_db)):
     """Actualiza una lista existente"""
-    return ListService.update_list(db, list_id, list_item)
+    return await ListService.update_list(db, list_id, list_item)
 
 
 @list_routes.get("/lists", response_model=list[ListResponse])
-def get_all_lists(db: Session = Depends(get_db)):
-    """Obtiene todas las listas"""
-    return ListService.get_all_lists(db)
+async def get_all_lists(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene las listas, paginadas por cursor si se indica limit
+
+    Con ?stream=true o Accept: application/x-ndjson se transmite la colección
+    completa (desde `cursor` si se indica) como NDJSON, sin aplicar limit.
+    """
+    after_id = decode_cursor(cursor, 1)[0] if cursor else None
+    if wants_ndjson(request, stream):
+        return ndjson_response(
+            lambda db, after, size: ListService.get_all_lists(db, size, after_id=after),
+            ListResponse,
+            after_id
+        )
+    lists = await ListService.get_all_lists(db, limit, after_id=after_id)
+    set_next_cursor(response, lists, limit, lambda list_item: (list_item.id,))
+    return lists
 
 
 @list_routes.get("/lists/user/{user_id}", response_model=list[ListResponse])
-def get_lists_by_user(user_id: int, db: Session = Depends(get_db)):
-    """Obtiene todas las listas de un usuario"""
-    return ListService.get_lists_by_user(db, user_id)
+async def get_lists_by_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene las listas de un usuario, paginadas por cursor si se indica limit
+
+    Con ?stream=true o Accept: application/x-ndjson se transmite la colección
+    completa (desde `cursor` si se indica) como NDJSON, sin aplicar limit.
+
+    Las respuestas JSON llevan un ETag que cambia con cualquier lista del
+    usuario; con If-None-Match y sin cambios se responde 304 sin consultar
+    la base de datos.
+    """
+    after_id = None
+    if cursor:
+        cursor_user_id, after_id = decode_cursor(cursor, 2)
+        if cursor_user_id != user_id:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    if wants_ndjson(request, stream):
+        return ndjson_response(
+            lambda db, after, size: ListService.get_lists_by_user(db, user_id, size, after_id=after),
+            ListResponse,
+            after_id
+        )
+    etag = resource_versions.etag(USER_LISTS, user_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    lists = await ListService.get_lists_by_user(db, user_id, limit, after_id=after_id)
+    set_etag(response, etag)
+    set_next_cursor(response, lists, limit, lambda list_item: (list_item.user_id, list_item.id))
+    return lists
+
+
+@list_routes.get("/lists/{list_id}/recipes", response_model=list[RecipeResponse])
+async def get_recipes_in_list(list_id: int, db: AsyncSession = Depends(get_db)):
+    """Obtiene todas las recetas de una lista"""
+    return await ListService.get_recipes_in_list(db, list_id)
 
 
-@list_routes.get("/lists/{list_id}/recipes", response_model=list[ListResponse])
-def get_recipes_in_list(list_id: int, db: Session = Depends(get_db)):
-    """Obtiene todas las recetas de una lista"""
-    return ListService.get_recipes_in_list(db, list_id)
+@list_routes.post("/lists/{list_id}/recipes", response_model=ListRecipesAdded)
+async def add_recipes_to_list(list_id: int, body: ListRecipesRequest, db: AsyncSession = Depends(get_db)):
+    """Añade varias recetas a una lista; las que ya estaban se omiten"""
+    return await ListService.add_recipes_to_list(db, list_id, body.recipe_ids)
+
 
+@list_routes.delete("/lists/{list_id}/recipes", response_model=ListRecipesRemoved)
+async def remove_recipes_from_list(list_id: int, body: ListRecipesRequest, db: AsyncSession = Depends(get_db)):
+    """Quita varias recetas de una lista"""
+    return await ListService.remove_recipes_from_list(db, list_id, body.recipe_ids)
@@ -0,0 +1,75 @@
+"""
+Rutas de monitoreo del servicio
+"""
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.shared.config.database import check_database, created_engines
+from app.shared.config.db_pool import pool_status
+from app.shared.config.query_profiler import query_profiler
+from app.services.login_admission import login_admission
+from app.shared.request_metrics import request_metrics
+
+monitoring_router = APIRouter()
+
+# Se incluyen sin prefijo: Prometheus espera las métricas en /metrics y
+# los orquestadores los chequeos en /health
+metrics_router = APIRouter()
+health_router = APIRouter()
+
+
+@monitoring_router.get("/monitoring/db/pool")
+async def get_db_pool_status():
+    """
+    Estado de los pools de conexiones: conexiones en uso, libres y en
+    overflow, contadores de eventos e histograma del tiempo de espera
+    """
+    return pool_status(created_engines())
+
+
+@monitoring_router.get("/monitoring/db/queries")
+async def get_db_query_profile(limit: int = Query(20, ge=1, le=500)):
+    """
+    Sentencias SQL normalizadas ordenadas por tiempo total, consultas lentas
+    recientes (con la ruta que las lanzó) y peticiones marcadas como N+1
+    """
+    return query_profiler.snapshot(limit)
+
+
+@monitoring_router.get("/monitoring/login")
+async def get_login_admission_stats():
+    """Intentos de login admitidos y rechazados (por IP, por email o por sobrecarga)"""
+    return login_admission.stats()
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Métricas HTTP en formato de texto de Prometheus: latencia por plantilla
+    de ruta, peticiones en curso, códigos de estado y consultas SQL y
+    llamadas a ExerciseDB por petición
+    """
+    return PlainTextResponse(
+        request_metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@health_router.get("/health/live")
+async def liveness():
+    """El proceso está vivo y atiende peticiones (no revisa dependencias)"""
+    return {"status": "alive"}
+
+
+@health_router.get("/health/ready")
+async def readiness(request: Request):
+    """
+    El worker puede recibir tráfico: terminó el calentamiento del arranque
+    y la base de datos responde a SELECT 1 dentro de DB_CONNECT_TIMEOUT
+    """
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse({"status": "starting"}, status_code=503)
+    try:
+        await check_database()
+    except Exception as e:
+        return JSONResponse({"status": "unavailable", "database": str(e) or type(e).__name__}, status_code=503)
+    return {"status": "ready"}
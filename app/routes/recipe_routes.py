@@ -1,55 +1,135 @@
+from typing import Optional
 from app.shared.config.database import get_db
-from sqlalchemy.orm import Session
-from app.schemas.recipe_schema import RecipeCreate, RecipeResponse
-from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.recipe_schema import RecipeBulkResult, RecipeCreate, RecipeResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from app.services.recipe_service import RecipeService
+from app.services.auth_service import get_current_user
+from app.services.resource_versions import RECIPE, resource_versions
+from app.shared.etag import etag_matches, not_modified, set_etag
+from app.shared.pagination import decode_cursor, set_next_cursor
+from app.shared.streaming import iter_request_items, ndjson_response, wants_ndjson
 
-recipe_router = APIRouter()
+# Todas las rutas exigen un token Bearer (ver AuthService)
+recipe_router = APIRouter(dependencies=[Depends(get_current_user)])
 
 
 @recipe_router.post("/recipes", response_model=RecipeResponse, status_code=status.HTTP_201_CREATED)
-def create_recipe(recipe: RecipeCreate, db: Session = Depends(get_db)):
+async def create_recipe(recipe: RecipeCreate, db: AsyncSession = Depends(get_db)):
     """Crea una nueva receta"""
-    return RecipeService.create_recipe(db, recipe)
+    return await RecipeService.create_recipe(db, recipe)
+
+
+@recipe_router.post("/recipes/bulk", response_model=RecipeBulkResult)
+async def bulk_create_recipes(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Importa recetas en bloque
+
+    Acepta un arreglo JSON de recetas o un cuerpo NDJSON (Content-Type
+    application/x-ndjson), que se procesa a medida que llega. Los elementos
+    que fallan se reportan en `errors` con su posición.
+    """
+    return await RecipeService.bulk_create_recipes(db, iter_request_items(request))
 
 
 @recipe_router.get("/recipes/{recipe_id}", response_model=RecipeResponse)
-def read_recipe(recipe_id: int, db: Session = Depends(get_db)):
-    """Obtiene una receta por ID"""
-    return RecipeService.get_recipe_by_id(db, recipe_id)
+async def read_recipe(recipe_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    """
+    Obtiene una receta por ID
+
+    Retorna un ETag; con If-None-Match y la receta sin cambios responde 304
+    sin consultar la base de datos.
+    """
+    etag = resource_versions.etag(RECIPE, recipe_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    recipe = await RecipeService.get_recipe_by_id(db, recipe_id)
+    set_etag(response, etag)
+    return recipe
 
 
 @recipe_router.get("/recipes", response_model=list[RecipeResponse])
-def read_recipes(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    """Obtiene una lista paginada de recetas"""
-    return RecipeService.get_all_recipes(db, skip, limit)
+async def read_recipes(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(10, ge=1),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene una lista paginada de recetas
+
+    Si hay más páginas se retorna el header X-Next-Cursor; enviarlo como
+    `cursor` pide la siguiente página sin OFFSET.
+
+    Con ?stream=true o Accept: application/x-ndjson se transmite la colección
+    completa (desde `cursor` si se indica) como NDJSON, sin aplicar skip ni limit.
+    """
+    after_id = decode_cursor(cursor, 1)[0] if cursor else None
+    if wants_ndjson(request, stream):
+        return ndjson_response(
+            lambda db, after, size: RecipeService.get_all_recipes(db, limit=size, after_id=after),
+            RecipeResponse,
+            after_id
+        )
+    recipes = await RecipeService.get_all_recipes(db, skip, limit, after_id=after_id)
+    set_next_cursor(response, recipes, limit, lambda recipe: (recipe.id,))
+    return recipes
 
 
 @recipe_router.delete("/recipes/{recipe_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_recipe(recipe_id: int, db: Session = Depends(get_db)):
+async def delete_recipe(recipe_id: int, db: AsyncSession = Depends(get_db)):
     """Elimina una receta"""
-    RecipeService.delete_recipe(db, recipe_id)
+    await RecipeService.delete_recipe(db, recipe_id)
     return
 
 
 @recipe_router.put("/recipes/{recipe_id}", response_model=RecipeResponse)
-def update_recipe(recipe_id: int, recipe: RecipeCreate, db: Session = Depends(get_db)):
+async def update_recipe(recipe_id: int, recipe: RecipeCreate, db: AsyncSession = Depends(get_db)):
     """Actualiza una receta existente"""
-    return RecipeService.update_recipe(db, recipe_id, recipe)
-
-
-@recipe_router.get("/recipes/{user_id}", response_model=list[RecipeResponse])
-def read_recipes_by_user(user_id: int, db: Session = Depends(get_db)):
-    """Obtiene todas las recetas de un usuario"""
-    return RecipeService.get_recipes_by_user(db, user_id)
+    return await RecipeService.update_recipe(db, recipe_id, recipe)
+
+
+@recipe_router.get("/recipes/user/{user_id}", response_model=list[RecipeResponse])
+async def read_recipes_by_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene las recetas de un usuario, paginadas por cursor si se indica limit
+
+    Con ?stream=true o Accept: application/x-ndjson se transmite la colección
+    completa (desde `cursor` si se indica) como NDJSON, sin aplicar limit.
+    """
+    after_id = None
+    if cursor:
+        cursor_user_id, after_id = decode_cursor(cursor, 2)
+        if cursor_user_id != user_id:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    if wants_ndjson(request, stream):
+        return ndjson_response(
+            lambda db, after, size: RecipeService.get_recipes_by_user(db, user_id, size, after_id=after),
+            RecipeResponse,
+            after_id
+        )
+    recipes = await RecipeService.get_recipes_by_user(db, user_id, limit, after_id=after_id)
+    set_next_cursor(response, recipes, limit, lambda recipe: (recipe.user_id, recipe.id))
+    return recipes
 
 
 @recipe_router.post("/recipes/{recipe_id}/lists/{list_id}", status_code=status.HTTP_201_CREATED)
-def add_recipe_to_list(recipe_id: int, list_id: int, db: Session = Depends(get_db)):
+async def add_recipe_to_list(recipe_id: int, list_id: int, db: AsyncSession = Depends(get_db)):
     """Añade una receta a una lista"""
-    return RecipeService.add_recipe_to_list(db, recipe_id, list_id)
+    return await RecipeService.add_recipe_to_list(db, recipe_id, list_id)
 
 @recipe_router.get("/lists/{list_id}/recipes", response_model=list[RecipeResponse])
-def get_recipes_by_list(list_id: int, db: Session = Depends(get_db)):
+async def get_recipes_by_list(list_id: int, db: AsyncSession = Depends(get_db)):
     """Obtiene todas las recetas de una lista"""
-    return RecipeService.get_recipes_by_list(db, list_id)
\ No newline at end of file
+    return await RecipeService.get_recipes_by_list(db, list_id)
\ No newline at end of file
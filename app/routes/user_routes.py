@@ -1,31 +1,59 @@
-from fastapi import APIRouter, Depends, status, Form
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, status, Form, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.shared.config.database import get_db
 from app.schemas.user_schema import UserCreate, LoginResponse, UserResponse
 from app.services.user_service import UserService
+from app.services.login_admission import login_admission
+from app.shared.pagination import decode_cursor, set_next_cursor
 
 user_router = APIRouter()
 
 
 @user_router.post("/users", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """Crea un nuevo usuario"""
-    return UserService.create_user(db, user)
+    return await UserService.create_user(db, user)
 
 
 @user_router.get("/users/{user_id}", response_model=UserResponse)
-def read_user(user_id: int, db: Session = Depends(get_db)):
+async def read_user(user_id: int, db: AsyncSession = Depends(get_db)):
     """Obtiene un usuario por ID"""
-    return UserService.get_user_by_id(db, user_id)
+    return await UserService.get_user_by_id(db, user_id)
 
 
 @user_router.post("/login", response_model=LoginResponse)
-def login_user(email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
-    """Autentica un usuario y retorna un token de acceso"""
-    return UserService.login_user(db, email, password)
+async def login_user(
+    request: Request,
+    email: str = Form(...),
+    password: str = Form(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Autentica un usuario y retorna un token de acceso
+
+    Responde 429/503 con Retry-After si se superan los límites de intentos
+    (la IP es la del socket; detrás de un proxy usar uvicorn --proxy-headers).
+    """
+    async with login_admission.admit(request.client.host if request.client else None, email):
+        return await UserService.login_user(db, email, password)
 
 
 @user_router.get("/users", response_model=list[UserResponse])
-def read_users(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    """Obtiene una lista paginada de usuarios"""
-    return UserService.get_all_users(db, skip, limit)
\ No newline at end of file
+async def read_users(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(10, ge=1),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene una lista paginada de usuarios
+
+    Si hay más páginas se retorna el header X-Next-Cursor; enviarlo como
+    `cursor` pide la siguiente página sin OFFSET.
+    """
+    after_id = decode_cursor(cursor, 1)[0] if cursor else None
+    users = await UserService.get_all_users(db, skip, limit, after_id=after_id)
+    set_next_cursor(response, users, limit, lambda user: (user.id,))
+    return users
\ No newline at end of file
@@ -37,3 +37,11 @@ class ExerciseDetailResponse(BaseModel):
     """Respuesta completa de la API para un ejercicio individual"""
     success: bool = Field(..., description="Indica si la petición fue exitosa")
     data: ExerciseSchema = Field(..., description="Datos del ejercicio")
+
+
+class ExerciseSearchResponse(BaseModel):
+    """Respuesta de la búsqueda de ejercicios ordenada por relevancia"""
+    success: bool = Field(..., description="Indica si la petición fue exitosa")
+    query: str = Field(..., description="Texto buscado")
+    total: int = Field(..., description="Número de resultados retornados")
+    data: List[ExerciseSchema] = Field(..., description="Ejercicios ordenados por relevancia")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from app.schemas.recipe_schema import RecipeResponse
 
@@ -12,4 +12,17 @@ class ListCreate(ListBase):
 
 class ListResponse(ListBase):
     id: int
-    recipes: Optional[list[RecipeResponse]] = []
\ No newline at end of file
+    recipes: Optional[list[RecipeResponse]] = []
+
+class ListRecipesRequest(BaseModel):
+    recipe_ids: list[int] = Field(min_length=1)
+
+class ListRecipesAdded(BaseModel):
+    list_id: int
+    requested: int
+    added: int
+
+class ListRecipesRemoved(BaseModel):
+    list_id: int
+    requested: int
+    removed: int
\ No newline at end of file
@@ -17,3 +17,12 @@ class RecipeCreate(RecipeBase):
 class RecipeResponse(RecipeBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
+
+class RecipeBulkError(BaseModel):
+    index: int
+    error: str
+
+class RecipeBulkResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[RecipeBulkError]
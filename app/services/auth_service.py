@@ -0,0 +1,93 @@
+"""
+Autenticación de peticiones con el token JWT emitido por /login
+"""
+from typing import Any, Dict, Optional
+import hashlib
+import time
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.User import User
+from app.schemas.user_schema import UserResponse
+from app.services.cache_service import InMemoryCache
+from app.shared.config.database import get_db
+from app.shared.config.security import ALGORITHM, AUTH_CACHE_MAX_ENTRIES, SECRET_KEY
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+# sha256(token) -> {"claims", "user"}; cada entrada expira junto con el token
+principal_cache = InMemoryCache(max_entries=AUTH_CACHE_MAX_ENTRIES, max_bytes=None)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+class AuthService:
+    """Servicio para validar tokens de acceso"""
+    
+    @staticmethod
+    async def authenticate(db: AsyncSession, token: str) -> UserResponse:
+        """
+        Valida un token y retorna el usuario al que pertenece
+        
+        La primera vez se verifica la firma y se busca el usuario; el
+        resultado queda en caché hasta el exp del token, así que las
+        peticiones siguientes con el mismo token no decodifican el JWT ni
+        consultan la base de datos.
+        
+        Args:
+            db: Sesión de base de datos (solo se usa si el token no está en caché)
+            token: Token JWT del header Authorization
+            
+        Returns:
+            Usuario autenticado
+            
+        Raises:
+            HTTPException: 401 si el token es inválido, expiró o el usuario no existe
+        """
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        principal: Optional[Dict[str, Any]] = principal_cache.get("principal", token_hash)
+        if principal is not None:
+            return principal["user"]
+        
+        try:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise _unauthorized("Invalid token")
+        
+        email = claims.get("sub")
+        expires_at = claims.get("exp")
+        if not email or expires_at is None:
+            raise _unauthorized("Invalid token")
+        
+        db_user = await db.scalar(select(User).where(User.email == email))
+        if db_user is None:
+            raise _unauthorized("Invalid token")
+        
+        user = UserResponse.model_validate(db_user)
+        ttl = expires_at - time.time()
+        if ttl > 0:
+            principal_cache.set("principal", {"claims": claims, "user": user}, ttl, token_hash)
+        return user
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> UserResponse:
+    """
+    Dependencia que exige un token Bearer válido y retorna el usuario
+    
+    La sesión es la misma que recibe la ruta (FastAPI reutiliza la dependencia
+    en la petición) y no toma una conexión si el token está en caché.
+    """
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    return await AuthService.authenticate(db, credentials.credentials)
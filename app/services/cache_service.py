@@ -1,89 +1,456 @@
 """
-Sistema de caché en memoria con TTL (Time To Live)
+Sistema de caché en memoria con TTL (Time To Live) y desalojo LRU
+
+El caché global `cache` usa el backend indicado en CACHE_BACKEND:
+
+- memory: InMemoryCache, privado de cada worker
+- sqlite: SharedCache (ver shared_cache.py), compartido por todos los
+  workers del host a través de un archivo SQLite
+
+`rendered_cache` guarda en cada worker las respuestas ya serializadas a
+JSON de las entradas de `cache` (ver ExternalAPIClient.get_rendered).
 """
-from typing import Any, Optional
-from datetime import datetime, timedelta
-import hashlib
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+import abc
+import asyncio
 import json
+import sys
+import time
+from starlette.concurrency import run_in_threadpool
+from app.services.cache_stats import CacheStats
+from app.shared.config.external_api_config import CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_RENDERED_MAX_BYTES
+
+# Clave normalizada: (prefijo, argumentos, argumentos nombrados)
+CacheKey = Tuple[str, Tuple[Hashable, ...], Tuple[Tuple[str, Hashable], ...]]
+
+# Entrada tal como la guardan los backends: (valor, fresh_until, expires_at)
+CacheEntry = Tuple[Any, float, float]
+
+# Uso por (prefijo, endpoint): (entradas, bytes aproximados)
+CacheUsage = Dict[Tuple[str, Optional[str]], Tuple[int, int]]
+
+# Tipos que ya son hashables y no hace falta recorrer
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _freeze(value: Any) -> Hashable:
+    """
+    Convierte un argumento en un valor hashable equivalente
+    
+    Los diccionarios pasan a tuplas de pares ordenados por clave y las
+    listas a tuplas, así {"a": 1, "b": 2} y {"b": 2, "a": 1} dan la misma clave.
+    """
+    if isinstance(value, _SCALARS):
+        return value
+    if isinstance(value, dict):
+        return tuple(sorted([(str(k), _freeze(v)) for k, v in value.items()]))
+    if isinstance(value, (list, tuple)):
+        return tuple(map(_freeze, value))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(map(_freeze, value)))
+    return value
+
+
+def _prefix_of(key: Hashable) -> str:
+    """Prefijo de una clave generada con make_key"""
+    return key[0] if isinstance(key, tuple) else str(key)
 
 
-class InMemoryCache:
-    """Caché simple en memoria con expiración automática"""
+def _estimate_size(value: Any) -> int:
+    """
+    Estima el tamaño en bytes de un valor
+    
+    Se usa el largo de su representación JSON, que es barato de calcular
+    comparado con recorrer el objeto y suficiente para acotar la memoria.
+    """
+    if isinstance(value, bytes):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class CacheBackend(abc.ABC):
+    """
+    Interfaz común de los backends del caché
+    
+    Las claves se generan con make_key a partir de un prefijo y los
+    argumentos; los backends implementan las operaciones por clave y esta
+    clase deriva de ellas la API por prefijo (get, lookup, set, invalidate).
+    Las operaciones por clave son abstractas: un backend al que le falte
+    alguna falla con TypeError al crearse, no en la primera petición que
+    la use.
+    """
     
-    def __init__(self):
-        self._cache = {}  # {key: {"data": Any, "expires_at": datetime}}
+    backend = "base"
+    # True si las operaciones hacen I/O que puede bloquear (ver run)
+    blocking = False
+    max_entries: Optional[int] = None
+    max_bytes: Optional[int] = None
+    evictions = 0
+    stats: CacheStats
+    _sweeper: Optional[asyncio.Task] = None
     
-    def _generate_key(self, prefix: str, *args, **kwargs) -> str:
+    async def run(self, method: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Ejecuta una operación del caché desde código asíncrono
+        
+        En los backends en memoria se llama directamente. En los que hacen
+        I/O bloqueante (SharedCache puede esperar hasta CACHE_SQLITE_TIMEOUT
+        por el lock del archivo) se ejecuta en el threadpool, para que una
+        espera no detenga el event loop y con él todas las peticiones.
+        
+        Args:
+            method: Método de este caché (ej: cache.lookup)
+            *args: Argumentos posicionales del método
+            **kwargs: Argumentos nombrados del método
+            
+        Returns:
+            Lo que retorna el método
+        """
+        if not self.blocking:
+            return method(*args, **kwargs)
+        return await run_in_threadpool(method, *args, **kwargs)
+    
+    def _generate_key(self, prefix: str, *args, **kwargs) -> CacheKey:
         """
         Genera una clave única basada en los parámetros
         
+        Es una tupla hashable, así que buscarla es una búsqueda en un dict
+        sin serializar ni calcular un hash criptográfico. Los argumentos
+        nombrados vacíos (None, {}, []) se omiten: params=None y params={}
+        dan la misma clave.
+        
         Args:
             prefix: Prefijo para la clave (ej: 'exercise', 'bodypart')
             *args: Argumentos posicionales
             **kwargs: Argumentos nombrados
-            
+        
         Returns:
-            Clave hash única
+            Clave normalizada
         """
-        # Crear un string único con todos los parámetros
-        key_data = {
-            "prefix": prefix,
-            "args": args,
-            "kwargs": sorted(kwargs.items()) if kwargs else []
-        }
-        key_string = json.dumps(key_data, sort_keys=True)
-        
-        # Generar hash MD5 para la clave
-        return hashlib.md5(key_string.encode()).hexdigest()
+        frozen_kwargs = tuple(sorted([
+            (name, _freeze(value))
+            for name, value in kwargs.items()
+            if value is not None and not (isinstance(value, (dict, list, tuple)) and not value)
+        ])) if kwargs else ()
+        return prefix, tuple(map(_freeze, args)), frozen_kwargs
+    
+    def make_key(self, prefix: str, *args, **kwargs) -> CacheKey:
+        """Retorna la clave que usan get/set para los mismos argumentos"""
+        return self._generate_key(prefix, *args, **kwargs)
+    
+    @abc.abstractmethod
+    def get_entry(self, key: CacheKey) -> Optional[CacheEntry]:
+        """Retorna la entrada de una clave o None si no existe o expiró"""
+    
+    @abc.abstractmethod
+    def put_entry(
+        self,
+        key: CacheKey,
+        value: Any,
+        fresh_until: float,
+        expires_at: float,
+        label: Optional[str] = None
+    ) -> None:
+        """Guarda una entrada con sus instantes de expiración absolutos y su endpoint"""
     
-    def get(self, prefix: str, *args, **kwargs) -> Optional[Any]:
+    @abc.abstractmethod
+    def delete_entry(self, key: CacheKey) -> bool:
+        """Elimina una entrada; retorna si existía"""
+    
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Limpia todo el caché"""
+    
+    @abc.abstractmethod
+    def clear_expired(self) -> int:
+        """Limpia las entradas expiradas y retorna cuántas se eliminaron"""
+    
+    @abc.abstractmethod
+    def size(self) -> int:
+        """Retorna el número de entradas en caché"""
+    
+    @abc.abstractmethod
+    def size_bytes(self) -> int:
+        """Retorna el tamaño aproximado en bytes de las entradas en caché"""
+    
+    @abc.abstractmethod
+    def usage(self) -> CacheUsage:
+        """Retorna (entradas, bytes aproximados) por prefijo y endpoint"""
+    
+    def stats_snapshot(self) -> Dict[str, Any]:
+        """Estadísticas por prefijo y endpoint (ver CacheStats.snapshot)"""
+        return self.stats.snapshot(self.usage())
+    
+    def get(self, prefix: str, *args, stats_label: Optional[str] = None, **kwargs) -> Optional[Any]:
         """
         Obtiene un valor del caché si existe y no ha expirado
         
         Args:
             prefix: Prefijo de la clave
             *args: Argumentos para generar la clave
+            stats_label: Endpoint bajo el que se cuentan las estadísticas
+                (no forma parte de la clave)
             **kwargs: Argumentos nombrados para generar la clave
-            
+        
         Returns:
-            Valor en caché o None si no existe o expiró
+            Valor en caché o None si no existe, expiró o está obsoleto
         """
-        key = self._generate_key(prefix, *args, **kwargs)
+        hit = self.lookup(prefix, *args, stats_label=stats_label, **kwargs)
+        if hit is None or hit[1] > 0:
+            return None
+        return hit[0]
+    
+    def lookup(self, prefix: str, *args, stats_label: Optional[str] = None, **kwargs) -> Optional[Tuple[Any, float]]:
+        """
+        Obtiene un valor del caché aunque esté obsoleto
         
-        if key not in self._cache:
+        Args:
+            prefix: Prefijo de la clave
+            *args: Argumentos para generar la clave
+            stats_label: Endpoint bajo el que se cuentan las estadísticas
+                (no forma parte de la clave)
+            **kwargs: Argumentos nombrados para generar la clave
+            
+        Returns:
+            Tupla (valor, segundos desde que dejó de estar fresco) o None si
+            no existe o pasó su TTL duro. Un valor <= 0 indica que está fresco
+        """
+        entry = self.lookup_entry(prefix, *args, stats_label=stats_label, **kwargs)
+        if entry is None:
             return None
+        return entry[0], time.time() - entry[1]
+    
+    def lookup_entry(self, prefix: str, *args, stats_label: Optional[str] = None, **kwargs) -> Optional[CacheEntry]:
+        """
+        Igual que lookup, pero retorna la entrada con sus instantes de expiración
         
-        cache_entry = self._cache[key]
+        Registra la latencia de la búsqueda y el acierto, acierto obsoleto o
+        fallo en las estadísticas.
         
-        # Verificar si expiró
-        if datetime.now() > cache_entry["expires_at"]:
-            del self._cache[key]
-            return None
+        Args:
+            prefix: Prefijo de la clave
+            *args: Argumentos para generar la clave
+            stats_label: Endpoint bajo el que se cuentan las estadísticas
+            **kwargs: Argumentos nombrados para generar la clave
+            
+        Returns:
+            Tupla (valor, fresh_until, expires_at) o None si no existe o
+            pasó su TTL duro
+        """
+        started = time.perf_counter()
+        entry = self.get_entry(self._generate_key(prefix, *args, **kwargs))
+        self.stats.lookup_latency.observe(time.perf_counter() - started)
         
-        return cache_entry["data"]
+        if entry is None:
+            self.stats.record(prefix, stats_label, "misses")
+            return None
+        self.stats.record(prefix, stats_label, "stale_hits" if time.time() > entry[1] else "hits")
+        return entry
     
-    def set(self, prefix: str, value: Any, ttl_seconds: int, *args, **kwargs) -> None:
+    def set(
+        self,
+        prefix: str,
+        value: Any,
+        ttl_seconds: int,
+        *args,
+        stale_ttl_seconds: int = 0,
+        stats_label: Optional[str] = None,
+        **kwargs
+    ) -> None:
         """
         Guarda un valor en el caché con tiempo de expiración
         
         Args:
             prefix: Prefijo de la clave
             value: Valor a guardar
-            ttl_seconds: Tiempo de vida en segundos
+            ttl_seconds: Tiempo de vida en segundos (TTL suave)
+            *args: Argumentos para generar la clave
+            stale_ttl_seconds: Segundos adicionales que la entrada se conserva
+                como obsoleta después del TTL suave
+            stats_label: Endpoint bajo el que se cuentan las estadísticas de
+                la entrada, incluidas su expiración y su desalojo
+            **kwargs: Argumentos nombrados para generar la clave
+        """
+        fresh_until = time.time() + ttl_seconds
+        self.put_entry(
+            self._generate_key(prefix, *args, **kwargs),
+            value,
+            fresh_until,
+            fresh_until + stale_ttl_seconds,
+            label=stats_label
+        )
+        self.stats.record(prefix, stats_label, "sets")
+    
+    def invalidate(self, prefix: str, *args, **kwargs) -> bool:
+        """
+        Elimina una entrada del caché
+        
+        Args:
+            prefix: Prefijo de la clave
             *args: Argumentos para generar la clave
             **kwargs: Argumentos nombrados para generar la clave
+            
+        Returns:
+            True si la entrada existía
         """
-        key = self._generate_key(prefix, *args, **kwargs)
-        expires_at = datetime.now() + timedelta(seconds=ttl_seconds)
+        return self.delete_entry(self._generate_key(prefix, *args, **kwargs))
+    
+    def start_sweeper(self, interval_seconds: float) -> None:
+        """
+        Inicia una tarea en segundo plano que elimina las entradas expiradas
+        
+        Args:
+            interval_seconds: Segundos entre cada barrido
+        """
+        if self._sweeper is not None and not self._sweeper.done():
+            return
+        
+        async def sweep():
+            while True:
+                await asyncio.sleep(interval_seconds)
+                try:
+                    await self.run(self.clear_expired)
+                except Exception as e:
+                    print(f"Error al limpiar el caché: {e}")
+        
+        self._sweeper = asyncio.create_task(sweep())
+    
+    async def stop_sweeper(self) -> None:
+        """Detiene la tarea de barrido si está en ejecución"""
+        if self._sweeper is None:
+            return
+        self._sweeper.cancel()
+        try:
+            await self._sweeper
+        except asyncio.CancelledError:
+            pass
+        self._sweeper = None
+
+
+class InMemoryCache(CacheBackend):
+    """
+    Caché en memoria acotada con expiración por TTL y desalojo LRU
+    
+    Las entradas se guardan en un OrderedDict en orden de uso: las lecturas
+    mueven la entrada al final y, al superar el límite de entradas o de
+    bytes, se desalojan las del principio (O(1) por operación).
+    
+    Cada entrada tiene un TTL suave (fresh_until) y uno duro (expires_at).
+    Entre ambos la entrada está obsoleta: get() ya no la retorna pero
+    lookup() sí, para servirla mientras se revalida o si la API falla.
+    """
+    
+    backend = "memory"
+    
+    def __init__(self, max_entries: Optional[int] = CACHE_MAX_ENTRIES, max_bytes: Optional[int] = CACHE_MAX_BYTES):
+        """
+        Args:
+            max_entries: Número máximo de entradas (None = sin límite)
+            max_bytes: Tamaño aproximado máximo en bytes (None = sin límite)
+        """
+        # {key: {"data": Any, "fresh_until": float, "expires_at": float, "size": int, "label": str}}
+        self._cache: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self.evictions = 0
+        self.stats = CacheStats()
+        self._sweeper: Optional[asyncio.Task] = None
+    
+    def _remove(self, key: Hashable) -> None:
+        """Elimina una entrada y descuenta su tamaño"""
+        entry = self._cache.pop(key)
+        self._bytes -= entry["size"]
+    
+    def _evict(self) -> None:
+        """Desaloja las entradas menos usadas hasta respetar los límites"""
+        while self._cache and (
+            (self.max_entries is not None and len(self._cache) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key, entry = self._cache.popitem(last=False)
+            self._bytes -= entry["size"]
+            self.evictions += 1
+            self.stats.record(_prefix_of(key), entry["label"], "evictions")
+    
+    def get_entry(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Obtiene una entrada por clave aunque esté obsoleta
+        
+        Args:
+            key: Clave generada con make_key
+            
+        Returns:
+            Tupla (valor, fresh_until, expires_at) o None si no existe o
+            pasó su TTL duro
+        """
+        cache_entry = self._cache.get(key)
+        if cache_entry is None:
+            return None
+        
+        # Verificar si expiró
+        if time.time() > cache_entry["expires_at"]:
+            self._remove(key)
+            self.stats.record(_prefix_of(key), cache_entry["label"], "expirations")
+            return None
+        
+        self._cache.move_to_end(key)
+        return cache_entry["data"], cache_entry["fresh_until"], cache_entry["expires_at"]
+    
+    def put_entry(
+        self,
+        key: Hashable,
+        value: Any,
+        fresh_until: float,
+        expires_at: float,
+        label: Optional[str] = None,
+        size: Optional[int] = None
+    ) -> None:
+        """
+        Guarda una entrada con sus instantes de expiración absolutos
+        
+        Args:
+            key: Clave generada con make_key
+            value: Valor a guardar
+            fresh_until: Instante (time.time) hasta el que la entrada está fresca
+            expires_at: Instante en que la entrada se elimina
+            label: Endpoint de la entrada para las estadísticas
+            size: Tamaño en bytes si ya se conoce (si no, se estima)
+        """
+        size = _estimate_size(value) if size is None else size
+        
+        # Un valor más grande que todo el caché no se guarda
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        
+        if key in self._cache:
+            self._remove(key)
         
         self._cache[key] = {
             "data": value,
-            "expires_at": expires_at
+            "fresh_until": fresh_until,
+            "expires_at": expires_at,
+            "size": size,
+            "label": label
         }
+        self._bytes += size
+        self._evict()
+    
+    def delete_entry(self, key: Hashable) -> bool:
+        """Elimina una entrada; retorna si existía"""
+        if key not in self._cache:
+            return False
+        self._remove(key)
+        return True
     
     def clear(self) -> None:
         """Limpia todo el caché"""
         self._cache.clear()
+        self._bytes = 0
     
     def clear_expired(self) -> int:
         """
@@ -92,21 +459,53 @@ class InMemoryCache:
         Returns:
             Número de entradas eliminadas
         """
-        now = datetime.now()
+        now = time.time()
         expired_keys = [
             key for key, value in self._cache.items()
             if now > value["expires_at"]
         ]
         
         for key in expired_keys:
-            del self._cache[key]
+            self.stats.record(_prefix_of(key), self._cache[key]["label"], "expirations")
+            self._remove(key)
         
         return len(expired_keys)
     
     def size(self) -> int:
         """Retorna el número de entradas en caché"""
         return len(self._cache)
+    
+    def size_bytes(self) -> int:
+        """Retorna el tamaño aproximado en bytes de las entradas en caché"""
+        return self._bytes
+    
+    def usage(self) -> CacheUsage:
+        """Retorna (entradas, bytes aproximados) por prefijo y endpoint"""
+        usage: Dict[Tuple[str, Optional[str]], list] = {}
+        for key, entry in self._cache.items():
+            row = usage.setdefault((_prefix_of(key), entry["label"]), [0, 0])
+            row[0] += 1
+            row[1] += entry["size"]
+        return {label: (entries, size) for label, (entries, size) in usage.items()}
+
+
+def create_cache() -> CacheBackend:
+    """
+    Crea el caché global con el backend de CACHE_BACKEND
+    
+    Returns:
+        InMemoryCache ("memory") o SharedCache ("sqlite")
+    """
+    if CACHE_BACKEND == "sqlite":
+        from app.services.shared_cache import SharedCache
+        return SharedCache()
+    if CACHE_BACKEND != "memory":
+        print(f"CACHE_BACKEND desconocido ({CACHE_BACKEND}), se usa el caché en memoria")
+    return InMemoryCache()
 
 
 # Instancia global del caché
-cache = InMemoryCache()
+cache = create_cache()
+
+# Respuestas serializadas (bytes) por clave de `cache`; siempre en memoria
+rendered_cache = InMemoryCache(max_bytes=CACHE_RENDERED_MAX_BYTES)
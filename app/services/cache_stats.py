@@ -0,0 +1,127 @@
+"""
+Estadísticas del caché por prefijo y por endpoint
+
+Los contadores (aciertos, aciertos obsoletos, fallos, escrituras,
+expiraciones y desalojos) se llevan por par (prefijo, endpoint). El endpoint
+es la etiqueta que indica quien usa el caché (ej: '/exercises/{id}'), así
+que su número está acotado por el código; aun así, pasado max_labels los
+nuevos se agrupan como "(otros)".
+
+Los contadores son de cada worker: con CACHE_BACKEND=sqlite las entradas y
+los bytes son los del archivo compartido, pero los eventos son los del
+worker que atendió GET /cache/stats.
+"""
+from typing import Any, Dict, Optional, Tuple
+import threading
+from app.shared.config.external_api_config import CACHE_STATS_MAX_LABELS
+from app.shared.metrics import Histogram
+
+# Una búsqueda en memoria tarda microsegundos; en SQLite, decenas a cientos,
+# y hasta CACHE_SQLITE_TIMEOUT (1 s por defecto) si el archivo está bloqueado
+LOOKUP_LATENCY_BUCKETS = (
+    0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005,
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+EVENTS = ("hits", "stale_hits", "misses", "sets", "expirations", "evictions")
+
+# Etiqueta de las entradas sin endpoint y de los endpoints que superan el límite
+NO_LABEL = "-"
+OTHER_LABEL = "(otros)"
+
+Label = Tuple[str, str]
+
+
+def _with_ratio(counters: Dict[str, int]) -> Dict[str, Any]:
+    """Agrega hit_ratio (aciertos frescos u obsoletos sobre búsquedas)"""
+    found = counters["hits"] + counters["stale_hits"]
+    lookups = found + counters["misses"]
+    return {**counters, "hit_ratio": round(found / lookups, 4) if lookups else None}
+
+
+class CacheStats:
+    """Contadores de eventos por (prefijo, endpoint) y latencia de las búsquedas"""
+    
+    def __init__(self, max_labels: int = CACHE_STATS_MAX_LABELS):
+        """
+        Args:
+            max_labels: Número máximo de pares (prefijo, endpoint) con
+                contadores propios
+        """
+        self.max_labels = max_labels
+        self._counters: Dict[Label, Dict[str, int]] = {}
+        self.lookup_latency = Histogram(LOOKUP_LATENCY_BUCKETS)
+        # Con CACHE_BACKEND=sqlite los eventos llegan desde el threadpool
+        self._lock = threading.Lock()
+    
+    def _label(self, prefix: str, label: Optional[str]) -> Label:
+        """Par (prefijo, endpoint) bajo el que se cuenta un evento"""
+        key = (prefix, label or NO_LABEL)
+        if key not in self._counters and len(self._counters) >= self.max_labels:
+            key = (prefix, OTHER_LABEL)
+        return key
+    
+    def record(self, prefix: str, label: Optional[str], event: str, count: int = 1) -> None:
+        """
+        Suma un evento a los contadores
+        
+        Args:
+            prefix: Prefijo de la clave
+            label: Endpoint (None = sin endpoint)
+            event: Uno de EVENTS
+            count: Número de eventos
+        """
+        with self._lock:
+            key = self._label(prefix, label)
+            counters = self._counters.get(key)
+            if counters is None:
+                counters = self._counters[key] = dict.fromkeys(EVENTS, 0)
+            counters[event] += count
+    
+    def reset(self) -> None:
+        """Reinicia los contadores y el histograma"""
+        with self._lock:
+            self._counters.clear()
+        self.lookup_latency = Histogram(LOOKUP_LATENCY_BUCKETS)
+    
+    def snapshot(self, usage: Dict[Tuple[str, Optional[str]], Tuple[int, int]]) -> Dict[str, Any]:
+        """
+        Resumen serializable de las estadísticas
+        
+        Args:
+            usage: {(prefijo, endpoint): (entradas, bytes)} según el backend
+            
+        Returns:
+            Totales, contadores por prefijo y por endpoint (con entradas y
+            bytes aproximados) y percentiles de latencia de las búsquedas
+        """
+        with self._lock:
+            rows: Dict[Label, Dict[str, int]] = {
+                key: {**counters, "entries": 0, "approx_bytes": 0}
+                for key, counters in self._counters.items()
+            }
+        for (prefix, label), (entries, size) in usage.items():
+            key = (prefix, label or NO_LABEL)
+            if key not in rows:
+                key = (prefix, OTHER_LABEL)
+            row = rows.setdefault(key, {**dict.fromkeys(EVENTS, 0), "entries": 0, "approx_bytes": 0})
+            row["entries"] += entries
+            row["approx_bytes"] += size
+        
+        totals: Dict[str, int] = {**dict.fromkeys(EVENTS, 0), "entries": 0, "approx_bytes": 0}
+        by_prefix: Dict[str, Dict[str, int]] = {}
+        by_endpoint: Dict[str, Dict[str, Any]] = {}
+        for (prefix, label), row in sorted(rows.items()):
+            prefix_row = by_prefix.setdefault(prefix, dict.fromkeys(totals, 0))
+            for name, value in row.items():
+                prefix_row[name] += value
+                totals[name] += value
+            by_endpoint.setdefault(prefix, {})[label] = _with_ratio(row)
+        
+        return {
+            "totals": _with_ratio(totals),
+            "by_prefix": {prefix: _with_ratio(row) for prefix, row in by_prefix.items()},
+            "by_endpoint": by_endpoint,
+            "lookup_latency_seconds": self.lookup_latency.snapshot(),
+        }
@@ -0,0 +1,221 @@
+"""
+Catálogo local (mirror) de ExerciseDB con índices invertidos en memoria
+"""
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from datetime import datetime, timezone
+import json
+import os
+from app.services.external_api_service import ExternalAPIClient
+from app.services.exercise_search import search_index
+from app.shared.config.external_api_config import EXERCISE_MIRROR_PATH, EXERCISE_MIRROR_PAGE_SIZE
+
+# Filtro de la API -> campo del ejercicio que se indexa
+INDEXED_FIELDS = {
+    "bodypart": "bodyParts",
+    "target": "targetMuscles",
+    "equipment": "equipments",
+    "secondary": "secondaryMuscles",
+}
+
+
+def _normalize(value: str) -> str:
+    """Normaliza un valor de filtro para buscarlo en los índices"""
+    return value.strip().lower()
+
+
+class ExerciseCatalog:
+    """
+    Copia completa del catálogo de ExerciseDB
+    
+    Por cada campo de INDEXED_FIELDS se mantiene un índice invertido
+    {valor: posiciones de los ejercicios}, de modo que un filtro (o la
+    intersección de varios) se resuelve en memoria sin llamadas de red.
+    """
+    
+    def __init__(self, path: str = EXERCISE_MIRROR_PATH):
+        """
+        Args:
+            path: Archivo JSON donde se persiste el catálogo
+        """
+        self.path = path
+        self.synced_at: Optional[str] = None
+        self._exercises: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, int] = {}
+        self._indexes: Dict[str, Dict[str, Tuple[int, ...]]] = {name: {} for name in INDEXED_FIELDS}
+        self._index_sets: Dict[str, Dict[str, FrozenSet[int]]] = {name: {} for name in INDEXED_FIELDS}
+    
+    @property
+    def loaded(self) -> bool:
+        """Indica si el catálogo tiene datos para responder consultas"""
+        return bool(self._exercises)
+    
+    def size(self) -> int:
+        """Retorna el número de ejercicios del catálogo"""
+        return len(self._exercises)
+    
+    def load(self, exercises: List[Dict[str, Any]], synced_at: Optional[str] = None) -> None:
+        """
+        Reemplaza el contenido del catálogo y reconstruye los índices
+        
+        Args:
+            exercises: Lista completa de ejercicios
+            synced_at: Fecha ISO de la sincronización
+        """
+        indexes: Dict[str, Dict[str, List[int]]] = {name: {} for name in INDEXED_FIELDS}
+        by_id: Dict[str, int] = {}
+        
+        for position, exercise in enumerate(exercises):
+            by_id[exercise["exerciseId"]] = position
+            for name, field in INDEXED_FIELDS.items():
+                for value in set(_normalize(v) for v in exercise.get(field) or []):
+                    indexes[name].setdefault(value, []).append(position)
+        
+        # Se construye todo antes de publicarlo para no exponer un estado parcial
+        self._exercises = exercises
+        self._by_id = by_id
+        self._indexes = {
+            name: {value: tuple(positions) for value, positions in index.items()}
+            for name, index in indexes.items()
+        }
+        self._index_sets = {
+            name: {value: frozenset(positions) for value, positions in index.items()}
+            for name, index in indexes.items()
+        }
+        self.synced_at = synced_at
+        search_index.upsert(exercises)
+    
+    def load_file(self) -> bool:
+        """
+        Carga el catálogo desde el archivo local
+        
+        Returns:
+            True si se cargó, False si el archivo no existe o es inválido
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                payload = json.load(f)
+            self.load(payload["exercises"], payload.get("synced_at"))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"No se pudo cargar el catálogo local de ejercicios ({self.path}): {e}")
+            return False
+        return True
+    
+    def save_file(self) -> None:
+        """Persiste el catálogo en el archivo local de forma atómica"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"synced_at": self.synced_at, "exercises": self._exercises}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+    
+    async def sync(self, api_client: ExternalAPIClient, page_size: int = EXERCISE_MIRROR_PAGE_SIZE) -> int:
+        """
+        Descarga el catálogo completo de la API, lo carga y lo persiste
+        
+        Args:
+            api_client: Cliente de la API de ExerciseDB
+            page_size: Ejercicios por página al recorrer /exercises
+        
+        Returns:
+            Número de ejercicios sincronizados
+        
+        Raises:
+            HTTPException: Si falla alguna de las peticiones a la API
+        """
+        exercises: List[Dict[str, Any]] = []
+        seen = set()
+        offset = 0
+        
+        while True:
+            page = await api_client.get(
+                '/exercises',
+                params={'limit': page_size, 'offset': offset},
+                use_cache=False
+            )
+            data = page.get("data") or []
+            for exercise in data:
+                if exercise["exerciseId"] not in seen:
+                    seen.add(exercise["exerciseId"])
+                    exercises.append(exercise)
+            
+            offset += len(data)
+            total = (page.get("metadata") or {}).get("totalExercises", 0)
+            if not data or offset >= total:
+                break
+        
+        self.load(exercises, datetime.now(timezone.utc).isoformat())
+        self.save_file()
+        return len(exercises)
+    
+    def get(self, exercise_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna un ejercicio por su ID o None si no está en el catálogo"""
+        position = self._by_id.get(exercise_id)
+        return self._exercises[position] if position is not None else None
+    
+    def filter(self, **filters: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Filtra ejercicios combinando los índices con AND
+        
+        Args:
+            **filters: Valores por nombre de filtro (bodypart, target,
+                equipment, secondary). Los valores None se ignoran
+        
+        Returns:
+            Ejercicios que cumplen todos los filtros, en el orden del catálogo
+        
+        Raises:
+            ValueError: Si se indica un filtro desconocido
+        """
+        postings = []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name not in self._indexes:
+                raise ValueError(f"Filtro desconocido: {name}")
+            value = _normalize(value)
+            positions = self._indexes[name].get(value)
+            if not positions:
+                return []
+            postings.append((positions, self._index_sets[name][value]))
+        
+        if not postings:
+            return list(self._exercises)
+        
+        # Se recorre la lista más corta (ordenada) y se comprueba en los demás conjuntos
+        postings.sort(key=lambda posting: len(posting[0]))
+        shortest, _ = postings[0]
+        others = [positions_set for _, positions_set in postings[1:]]
+        return [
+            self._exercises[p] for p in shortest
+            if all(p in positions_set for positions_set in others)
+        ]
+    
+    @staticmethod
+    def as_list_response(exercises: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Envuelve ejercicios con la misma forma que las respuestas de la API
+        
+        Args:
+            exercises: Ejercicios a retornar
+        
+        Returns:
+            Diccionario compatible con ExerciseListResponse
+        """
+        return {
+            "success": True,
+            "metadata": {
+                "totalExercises": len(exercises),
+                "totalPages": 1,
+                "currentPage": 1,
+                "previousPage": None,
+                "nextPage": None,
+            },
+            "data": exercises,
+        }
+
+
+# Instancia global del catálogo local
+catalog = ExerciseCatalog()
@@ -0,0 +1,254 @@
+"""
+Índice de búsqueda en memoria sobre nombres e instrucciones de ejercicios
+
+Se alimenta de forma incremental con las respuestas que ExternalAPIClient
+obtiene de ExerciseDB (y con el catálogo local en mirror mode), así que no
+hace llamadas propias a la API.
+"""
+from typing import Any, Dict, Iterable, List, Set, Tuple
+import bisect
+import re
+from app.services.external_api_service import add_refresh_listener
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_STOPWORDS = {"a", "an", "and", "the", "of", "to", "your", "with", "on", "in", "step", "for", "at", "is", "it"}
+
+NAME_WEIGHT = 3.0
+INSTRUCTION_WEIGHT = 1.0
+
+# Factor aplicado según el tipo de coincidencia del término
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.8
+FUZZY_MATCH = 0.6
+
+MAX_PREFIX_TERMS = 50
+
+
+def _tokenize(text: str) -> List[str]:
+    """Separa un texto en términos en minúsculas"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _trigrams(term: str) -> Set[str]:
+    """Trigramas de un término con bordes marcados"""
+    padded = f" {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _within_distance(a: str, b: str, max_distance: int) -> bool:
+    """Indica si la distancia de Levenshtein entre a y b es <= max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
+
+
+class ExerciseSearchIndex:
+    """
+    Índice invertido de términos con soporte de prefijos y errores de tipeo
+    
+    - postings: término -> {exerciseId: peso}
+    - trigramas: trigrama -> términos, para encontrar candidatos con errores
+    - términos ordenados para resolver prefijos con búsqueda binaria
+    """
+    
+    def __init__(self):
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._trigram_terms: Dict[str, Set[str]] = {}
+        self._sorted_terms: List[str] = []
+        self._terms_dirty = False
+    
+    def size(self) -> int:
+        """Retorna el número de ejercicios indexados"""
+        return len(self._docs)
+    
+    @staticmethod
+    def _weigh(exercise: Dict[str, Any]) -> Dict[str, float]:
+        """Calcula el peso de cada término de un ejercicio"""
+        weights: Dict[str, float] = {}
+        for term in _tokenize(exercise.get("name") or ""):
+            weights[term] = weights.get(term, 0.0) + NAME_WEIGHT
+        for line in exercise.get("instructions") or []:
+            for term in _tokenize(line):
+                if term not in _STOPWORDS and not term.isdigit():
+                    weights[term] = weights.get(term, 0.0) + INSTRUCTION_WEIGHT
+        return weights
+    
+    def _remove(self, exercise_id: str) -> None:
+        """Quita un ejercicio de los postings"""
+        for term in self._doc_terms.pop(exercise_id, {}):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(exercise_id, None)
+            if not postings:
+                del self._postings[term]
+                for trigram in _trigrams(term):
+                    terms = self._trigram_terms.get(trigram)
+                    if terms is not None:
+                        terms.discard(term)
+                        if not terms:
+                            del self._trigram_terms[trigram]
+                self._terms_dirty = True
+        self._docs.pop(exercise_id, None)
+    
+    def upsert(self, exercises: Iterable[Dict[str, Any]]) -> int:
+        """
+        Agrega o actualiza ejercicios en el índice
+        
+        Solo se reindexan los ejercicios nuevos o cuyo contenido cambió.
+        
+        Args:
+            exercises: Ejercicios con la forma de ExerciseDB
+        
+        Returns:
+            Número de ejercicios agregados o actualizados
+        """
+        changed = 0
+        for exercise in exercises:
+            exercise_id = exercise.get("exerciseId")
+            if not exercise_id or self._docs.get(exercise_id) == exercise:
+                continue
+            
+            self._remove(exercise_id)
+            weights = self._weigh(exercise)
+            self._docs[exercise_id] = exercise
+            self._doc_terms[exercise_id] = weights
+            for term, weight in weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    for trigram in _trigrams(term):
+                        self._trigram_terms.setdefault(trigram, set()).add(term)
+                    self._terms_dirty = True
+                postings[exercise_id] = weight
+            changed += 1
+        return changed
+    
+    def index_payload(self, payload: Any) -> int:
+        """
+        Indexa los ejercicios contenidos en una respuesta de ExerciseDB
+        
+        Args:
+            payload: Respuesta JSON de la API (lista o detalle)
+        
+        Returns:
+            Número de ejercicios agregados o actualizados
+        """
+        if not isinstance(payload, dict):
+            return 0
+        data = payload.get("data")
+        if isinstance(data, dict):
+            data = [data]
+        if not isinstance(data, list):
+            return 0
+        return self.upsert(e for e in data if isinstance(e, dict) and "exerciseId" in e)
+    
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        """Términos indexados que empiezan con el prefijo"""
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        matches = []
+        for term in self._sorted_terms[start:start + MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+    
+    def _fuzzy_terms(self, token: str) -> List[str]:
+        """Términos indexados a una distancia de edición pequeña del token"""
+        max_distance = 1 if len(token) <= 5 else 2
+        token_trigrams = _trigrams(token)
+        overlap: Dict[str, int] = {}
+        for trigram in token_trigrams:
+            for term in self._trigram_terms.get(trigram, ()):
+                overlap[term] = overlap.get(term, 0) + 1
+        
+        # Solo se calcula la distancia para los candidatos que comparten trigramas
+        min_overlap = max(1, len(token_trigrams) - 3 * max_distance)
+        return [
+            term for term, shared in overlap.items()
+            if shared >= min_overlap and term != token and _within_distance(token, term, max_distance)
+        ]
+    
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Términos que coinciden con un token de la consulta y su factor"""
+        matches: Dict[str, float] = {}
+        if token in self._postings:
+            matches[token] = EXACT_MATCH
+        if len(token) >= 2:
+            for term in self._prefix_terms(token):
+                matches.setdefault(term, PREFIX_MATCH)
+        if len(token) >= 4:
+            for term in self._fuzzy_terms(token):
+                matches.setdefault(term, FUZZY_MATCH)
+        return list(matches.items())
+    
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Busca ejercicios por nombre e instrucciones
+        
+        Los resultados se ordenan primero por cuántos términos de la consulta
+        coinciden y luego por puntaje (coincidencias en el nombre pesan más).
+        
+        Args:
+            query: Texto a buscar
+            limit: Número máximo de resultados
+        
+        Returns:
+            Ejercicios ordenados por relevancia
+        """
+        query_tokens = _tokenize(query)
+        # Las palabras vacías solo se usan si la consulta no tiene otras
+        tokens = list(dict.fromkeys(t for t in query_tokens if t not in _STOPWORDS)) or list(dict.fromkeys(query_tokens))
+        if not tokens:
+            return []
+        
+        scores: Dict[str, float] = {}
+        matched: Dict[str, int] = {}
+        for token in tokens:
+            best: Dict[str, float] = {}
+            for term, factor in self._expand(token):
+                for exercise_id, weight in self._postings[term].items():
+                    score = weight * factor
+                    if score > best.get(exercise_id, 0.0):
+                        best[exercise_id] = score
+            for exercise_id, score in best.items():
+                scores[exercise_id] = scores.get(exercise_id, 0.0) + score
+                matched[exercise_id] = matched.get(exercise_id, 0) + 1
+        
+        phrase = query.strip().lower()
+        for exercise_id in scores:
+            # Bonificación si el nombre empieza con la consulta completa
+            if (self._docs[exercise_id].get("name") or "").lower().startswith(phrase):
+                scores[exercise_id] += NAME_WEIGHT
+        
+        ranked = sorted(
+            scores,
+            key=lambda exercise_id: (-matched[exercise_id], -scores[exercise_id], self._docs[exercise_id].get("name") or "")
+        )
+        return [self._docs[exercise_id] for exercise_id in ranked[:limit]]
+
+
+# Instancia global del índice de búsqueda
+search_index = ExerciseSearchIndex()
+
+
+def _on_api_refresh(endpoint: str, payload: Any) -> None:
+    """Reindexa los ejercicios cada vez que se refresca una respuesta de la API"""
+    if endpoint.startswith('/exercises'):
+        search_index.index_payload(payload)
+
+
+add_refresh_listener(_on_api_refresh)
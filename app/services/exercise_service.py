@@ -2,15 +2,32 @@
 Servicio para gestionar ejercicios de la API ExerciseDB
 """
 from typing import List, Optional, Dict, Any
+import httpx
+from fastapi import Depends, HTTPException
+from pydantic import TypeAdapter
 from app.services.external_api_service import ExternalAPIClient
-from app.shared.config.external_api_config import EXERCISEDB_BASE_URL
+from app.services.exercise_catalog import catalog
+from app.services.exercise_search import search_index
+from app.schemas.exercise_schema import ExerciseDetailResponse, ExerciseListResponse
+from app.shared.config.external_api_config import EXERCISEDB_BASE_URL, EXERCISE_SEARCH_WARMUP_LIMIT
+from app.shared.config.http_client import get_http_client
+
+# Esquemas con los que se validan y serializan las respuestas de las rutas
+LIST_RESPONSE = TypeAdapter(ExerciseListResponse)
+DETAIL_RESPONSE = TypeAdapter(ExerciseDetailResponse)
+NAME_LIST = TypeAdapter(List[str])
+
+
+def _render(adapter: TypeAdapter, data: Any) -> bytes:
+    """Valida una respuesta del catálogo local y la serializa a JSON"""
+    return adapter.dump_json(adapter.validate_python(data))
 
 
 class ExerciseService:
     """Servicio para consumir ExerciseDB API"""
     
-    def __init__(self):
-        self.api_client = ExternalAPIClient(EXERCISEDB_BASE_URL)
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.api_client = ExternalAPIClient(EXERCISEDB_BASE_URL, client=client)
     
     async def get_all_exercises(self, limit: Optional[int] = None, offset: Optional[int] = None) -> List[Dict[str, Any]]:
         """
@@ -31,7 +48,26 @@ class ExerciseService:
             
         return await self.api_client.get('/exercises', params=params)
     
-    async def get_exercise_by_id(self, exercise_id: str) -> Dict[str, Any]:
+    async def get_all_exercises_json(self, limit: Optional[int] = None, offset: Optional[int] = None) -> bytes:
+        """
+        Obtiene todos los ejercicios como JSON ya validado y serializado
+        
+        Args:
+            limit: Número máximo de resultados
+            offset: Número de resultados a saltar
+            
+        Returns:
+            Cuerpo JSON de la respuesta (ExerciseListResponse)
+        """
+        params = {}
+        if limit is not None:
+            params['limit'] = limit
+        if offset is not None:
+            params['offset'] = offset
+            
+        return await self.api_client.get_rendered('/exercises', LIST_RESPONSE, params=params)
+    
+    async def get_exercise_by_id(self, exercise_id: str) -> bytes:
         """
         Obtiene un ejercicio por su ID
         
@@ -39,11 +75,14 @@ class ExerciseService:
             exercise_id: ID del ejercicio
             
         Returns:
-            Datos del ejercicio
+            Cuerpo JSON de la respuesta (ExerciseDetailResponse)
         """
-        return await self.api_client.get(f'/exercises/{exercise_id}')
+        exercise = catalog.get(exercise_id) if catalog.loaded else None
+        if exercise is not None:
+            return _render(DETAIL_RESPONSE, {"success": True, "data": exercise})
+        return await self.api_client.get_rendered(f'/exercises/{exercise_id}', DETAIL_RESPONSE, stats_label='/exercises/{id}')
     
-    async def get_exercises_by_bodypart(self, bodypart: str) -> List[Dict[str, Any]]:
+    async def get_exercises_by_bodypart(self, bodypart: str) -> bytes:
         """
         Obtiene ejercicios por parte del cuerpo
         
@@ -51,11 +90,13 @@ class ExerciseService:
             bodypart: Parte del cuerpo (ej: 'back', 'chest', 'legs')
             
         Returns:
-            Lista de ejercicios
+            Cuerpo JSON de la lista de ejercicios (ExerciseListResponse)
         """
-        return await self.api_client.get(f'/exercises/bodyPart/{bodypart}')
+        if catalog.loaded:
+            return _render(LIST_RESPONSE, catalog.as_list_response(catalog.filter(bodypart=bodypart)))
+        return await self.api_client.get_rendered(f'/exercises/bodyPart/{bodypart}', LIST_RESPONSE, stats_label='/exercises/bodyPart/{bodypart}')
     
-    async def get_exercises_by_target(self, target: str) -> List[Dict[str, Any]]:
+    async def get_exercises_by_target(self, target: str) -> bytes:
         """
         Obtiene ejercicios por músculo objetivo
         
@@ -63,11 +104,13 @@ class ExerciseService:
             target: Músculo objetivo
             
         Returns:
-            Lista de ejercicios
+            Cuerpo JSON de la lista de ejercicios (ExerciseListResponse)
         """
-        return await self.api_client.get(f'/exercises/target/{target}')
+        if catalog.loaded:
+            return _render(LIST_RESPONSE, catalog.as_list_response(catalog.filter(target=target)))
+        return await self.api_client.get_rendered(f'/exercises/target/{target}', LIST_RESPONSE, stats_label='/exercises/target/{target}')
     
-    async def get_exercises_by_equipment(self, equipment: str) -> List[Dict[str, Any]]:
+    async def get_exercises_by_equipment(self, equipment: str) -> bytes:
         """
         Obtiene ejercicios por equipo
         
@@ -75,37 +118,111 @@ class ExerciseService:
             equipment: Tipo de equipo (ej: 'barbell', 'dumbbell', 'bodyweight')
             
         Returns:
-            Lista de ejercicios
+            Cuerpo JSON de la lista de ejercicios (ExerciseListResponse)
+        """
+        if catalog.loaded:
+            return _render(LIST_RESPONSE, catalog.as_list_response(catalog.filter(equipment=equipment)))
+        return await self.api_client.get_rendered(f'/exercises/equipment/{equipment}', LIST_RESPONSE, stats_label='/exercises/equipment/{equipment}')
+    
+    def filter_exercises(
+        self,
+        bodypart: Optional[str] = None,
+        target: Optional[str] = None,
+        equipment: Optional[str] = None,
+        secondary: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Filtra ejercicios combinando varios criterios con AND
+        
+        Solo disponible en mirror mode, ya que la API externa no permite
+        combinar filtros en una sola llamada.
+        
+        Args:
+            bodypart: Parte del cuerpo
+            target: Músculo objetivo
+            equipment: Tipo de equipo
+            secondary: Músculo secundario
+            
+        Returns:
+            Respuesta con la lista de ejercicios
+            
+        Raises:
+            HTTPException: Si el catálogo local no está disponible o no se indica ningún filtro
+        """
+        if not catalog.loaded:
+            raise HTTPException(status_code=503, detail="Catálogo local de ejercicios no disponible (mirror mode)")
+        if bodypart is None and target is None and equipment is None and secondary is None:
+            raise HTTPException(status_code=400, detail="Debe indicar al menos un filtro")
+        
+        exercises = catalog.filter(bodypart=bodypart, target=target, equipment=equipment, secondary=secondary)
+        return catalog.as_list_response(exercises)
+    
+    async def search_exercises(self, query: str, limit: int = 20) -> Dict[str, Any]:
+        """
+        Busca ejercicios por nombre e instrucciones en el índice en memoria
+        
+        Si el índice aún está vacío se puebla con la primera página de
+        ejercicios (normalmente ya en caché).
+        
+        Args:
+            query: Texto a buscar (admite prefijos y errores de tipeo)
+            limit: Número máximo de resultados
+            
+        Returns:
+            Respuesta con los ejercicios ordenados por relevancia
+        """
+        if search_index.size() == 0:
+            search_index.index_payload(await self.get_all_exercises(limit=EXERCISE_SEARCH_WARMUP_LIMIT))
+        
+        results = search_index.search(query, limit=limit)
+        return {
+            "success": True,
+            "query": query,
+            "total": len(results),
+            "data": results
+        }
+    
+    async def sync_catalog(self) -> int:
+        """
+        Sincroniza el catálogo local completo desde la API
+        
+        Returns:
+            Número de ejercicios sincronizados
         """
-        return await self.api_client.get(f'/exercises/equipment/{equipment}')
+        return await catalog.sync(self.api_client)
     
-    async def get_body_parts(self) -> List[str]:
+    async def get_body_parts(self) -> bytes:
         """
         Obtiene la lista de partes del cuerpo disponibles
         
         Returns:
-            Lista de partes del cuerpo
+            Cuerpo JSON de la lista de partes del cuerpo
         """
-        return await self.api_client.get('/exercises/bodyPartList')
+        return await self.api_client.get_rendered('/exercises/bodyPartList', NAME_LIST)
     
-    async def get_target_muscles(self) -> List[str]:
+    async def get_target_muscles(self) -> bytes:
         """
         Obtiene la lista de músculos objetivo disponibles
         
         Returns:
-            Lista de músculos
+            Cuerpo JSON de la lista de músculos
         """
-        return await self.api_client.get('/exercises/targetList')
+        return await self.api_client.get_rendered('/exercises/targetList', NAME_LIST)
     
-    async def get_equipment_list(self) -> List[str]:
+    async def get_equipment_list(self) -> bytes:
         """
         Obtiene la lista de equipos disponibles
         
         Returns:
-            Lista de equipos
+            Cuerpo JSON de la lista de equipos
         """
-        return await self.api_client.get('/exercises/equipmentList')
+        return await self.api_client.get_rendered('/exercises/equipmentList', NAME_LIST)
     
     async def close(self):
         """Cierra las conexiones del servicio"""
         await self.api_client.close()
+
+
+def get_exercise_service(client: httpx.AsyncClient = Depends(get_http_client)) -> ExerciseService:
+    """Dependencia que crea el servicio sobre el cliente HTTP compartido"""
+    return ExerciseService(client)
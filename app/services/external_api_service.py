@@ -1,22 +1,60 @@
 """
 Cliente HTTP para consumir APIs externas
 """
+import asyncio
+import time
 import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List, Set, Tuple
 from fastapi import HTTPException
-from app.shared.config.external_api_config import REQUEST_TIMEOUT, CACHE_TTL
-from app.services.cache_service import cache
+from pydantic import TypeAdapter, ValidationError
+from app.shared.config.external_api_config import (
+    REQUEST_TIMEOUT,
+    CACHE_TTL,
+    CACHE_STALE_WHILE_REVALIDATE,
+    CACHE_STALE_IF_ERROR,
+)
+from app.services.cache_service import cache, rendered_cache
+from app.services.singleflight import singleflight
+from app.shared.request_metrics import record_upstream_call
+
+# Referencias a las revalidaciones en segundo plano para que no se recolecten
+_background_refreshes: Set[asyncio.Task] = set()
+
+# Funciones notificadas cada vez que se obtiene una respuesta nueva de la API
+_refresh_listeners: List[Callable[[str, Any], None]] = []
+
+
+def add_refresh_listener(listener: Callable[[str, Any], None]) -> None:
+    """
+    Registra una función que recibe (endpoint, datos) cada vez que una
+    respuesta de la API externa se guarda o refresca en el caché
+    """
+    _refresh_listeners.append(listener)
 
 
 class ExternalAPIClient:
     """Cliente base para hacer peticiones HTTP a APIs externas con caché"""
     
-    def __init__(self, base_url: str, enable_cache: bool = True):
+    def __init__(self, base_url: str, client: Optional[httpx.AsyncClient] = None, enable_cache: bool = True):
+        """
+        Args:
+            base_url: URL base de la API externa
+            client: Cliente HTTP compartido (ver http_client.py). Si no se
+                indica se crea uno propio que se cierra en close()
+            enable_cache: Si debe usar caché
+        """
         self.base_url = base_url.rstrip('/')
-        self.client = httpx.AsyncClient(timeout=REQUEST_TIMEOUT)
+        self._owns_client = client is None
+        self.client = client if client is not None else httpx.AsyncClient(timeout=REQUEST_TIMEOUT)
         self.enable_cache = enable_cache
     
-    async def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None, use_cache: bool = True) -> Any:
+    async def get(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True,
+        stats_label: Optional[str] = None
+    ) -> Any:
         """
         Realiza una petición GET a la API externa con soporte de caché
         
@@ -24,31 +62,196 @@ class ExternalAPIClient:
             endpoint: Endpoint relativo (ej: '/exercises')
             params: Parámetros de query string opcionales
             use_cache: Si debe usar caché (default: True)
-            
+            stats_label: Plantilla del endpoint para las estadísticas del
+                caché (ej: '/exercises/{id}'); por defecto el endpoint
+                
         Returns:
-            Respuesta JSON de la API
+            Respuesta JSON de la API (puede ser un valor obsoleto del caché
+            mientras se revalida o si la API externa está fallando)
             
         Raises:
-            HTTPException: Si la petición falla
+            HTTPException: Si la petición falla y no hay valor en caché
         """
+        if not (self.enable_cache and use_cache):
+            return await self._fetch(endpoint, params)
+        
         # Intentar obtener del caché primero
-        if self.enable_cache and use_cache:
-            cached_data = cache.get("api_request", endpoint, params=params)
-            if cached_data is not None:
+        label = stats_label or endpoint
+        hit = await cache.run(cache.lookup, "api_request", endpoint, stats_label=label, params=params)
+        return await self._serve(endpoint, params, label, hit)
+    
+    async def _serve(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        label: str,
+        hit: Optional[Tuple[Any, float]]
+    ) -> Any:
+        """
+        Responde a partir del resultado de una búsqueda en caché ya hecha
+        
+        Args:
+            endpoint: Endpoint relativo
+            params: Parámetros de query string
+            label: Endpoint para las estadísticas del caché
+            hit: Resultado de cache.lookup (valor, segundos obsoleto) o None
+            
+        Returns:
+            Valor fresco del caché, valor obsoleto (mientras se revalida o si
+            la API falla) o la respuesta nueva de la API
+        """
+        if hit is not None:
+            cached_data, stale_for = hit
+            if stale_for <= 0:
                 return cached_data
+            # Obsoleto: responder al instante y refrescar en segundo plano
+            if stale_for <= CACHE_STALE_WHILE_REVALIDATE and not self._owns_client:
+                self._revalidate(endpoint, params, label)
+                return cached_data
+        
+        try:
+            return await self._fetch_and_store(endpoint, params, label)
+        except HTTPException as e:
+            # stale-if-error: si la API externa falla se sirve el valor obsoleto
+            if hit is not None and e.status_code >= 500 and hit[1] <= CACHE_STALE_IF_ERROR:
+                return hit[0]
+            raise
+    
+    async def get_rendered(
+        self,
+        endpoint: str,
+        adapter: TypeAdapter,
+        params: Optional[Dict[str, Any]] = None,
+        stats_label: Optional[str] = None
+    ) -> bytes:
+        """
+        Igual que get, pero retorna la respuesta validada y serializada a JSON
+        
+        La serialización se guarda en rendered_cache junto al instante
+        fresh_until de la entrada de la que salió, así que un acierto fresco
+        solo compara ese instante y retorna los bytes, sin volver a validar
+        ni serializar. Si la entrada se refresca, se invalida o la limpia
+        otro worker, el instante ya no coincide y se serializa de nuevo.
+        
+        Args:
+            endpoint: Endpoint relativo (ej: '/exercises')
+            adapter: TypeAdapter del esquema de la respuesta
+            params: Parámetros de query string opcionales
+            stats_label: Plantilla del endpoint para las estadísticas del caché
+            
+        Returns:
+            Cuerpo JSON de la respuesta
+            
+        Raises:
+            HTTPException: Si la petición falla o la respuesta no cumple el esquema
+        """
+        if not self.enable_cache:
+            return self._render(adapter, await self._fetch(endpoint, params))
+        
+        label = stats_label or endpoint
+        key = cache.make_key("api_request", endpoint, params=params)
+        # La búsqueda se cuenta una sola vez (latencia y acierto o fallo),
+        # también cuando se responde con los bytes ya serializados
+        entry = await cache.run(cache.lookup_entry, "api_request", endpoint, stats_label=label, params=params)
+        hit = None
+        if entry is not None:
+            hit = (entry[0], time.time() - entry[1])
+            if hit[1] <= 0:
+                rendered = rendered_cache.get_entry(key)
+                if rendered is not None and rendered[1] == entry[1]:
+                    return rendered[0]
+        
+        data = await self._serve(endpoint, params, label, hit)
+        body = self._render(adapter, data)
+        
+        # Solo se guarda la serialización de la entrada actual mientras está
+        # fresca, nunca la de un valor obsoleto (stale-while-revalidate o
+        # stale-if-error)
+        source = entry if entry is not None and entry[0] is data else await cache.run(cache.get_entry, key)
+        if source is not None and source[0] is data and source[1] >= time.time():
+            rendered_cache.put_entry(key, body, source[1], source[2], label=label)
+        return body
+    
+    @staticmethod
+    def _render(adapter: TypeAdapter, data: Any) -> bytes:
+        """
+        Valida una respuesta de la API con su esquema y la serializa a JSON
+        
+        Raises:
+            HTTPException: Si la respuesta no cumple el esquema
+        """
+        try:
+            return adapter.dump_json(adapter.validate_python(data))
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=502,
+                detail=f"Respuesta inválida de la API externa: {e.error_count()} errores de validación"
+            )
+    
+    async def _fetch_and_store(self, endpoint: str, params: Optional[Dict[str, Any]], label: str) -> Any:
+        """
+        Consulta la API externa y guarda la respuesta en caché
+        
+        Las peticiones concurrentes con la misma clave comparten una sola llamada.
+        """
+        async def fetch_and_store():
+            data = await self._fetch(endpoint, params)
+            rendered_cache.delete_entry(key)
+            await cache.run(
+                cache.set, "api_request", data, CACHE_TTL, endpoint,
+                stale_ttl_seconds=max(CACHE_STALE_WHILE_REVALIDATE, CACHE_STALE_IF_ERROR),
+                stats_label=label,
+                params=params
+            )
+            for listener in _refresh_listeners:
+                try:
+                    listener(endpoint, data)
+                except Exception as e:
+                    print(f"Error al notificar el refresco de {endpoint}: {e}")
+            return data
+        
+        key = cache.make_key("api_request", endpoint, params=params)
+        return await singleflight.do(key, fetch_and_store)
+    
+    def _revalidate(self, endpoint: str, params: Optional[Dict[str, Any]], label: str) -> None:
+        """
+        Refresca una entrada del caché en segundo plano
+        
+        Solo se usa con el cliente HTTP compartido, que sigue abierto cuando
+        termina la petición que originó la revalidación. Si falla, la entrada
+        obsoleta se sigue sirviendo hasta su TTL duro.
+        """
+        task = asyncio.create_task(self._fetch_and_store(endpoint, params, label))
+        _background_refreshes.add(task)
+        
+        def done(t: asyncio.Task) -> None:
+            _background_refreshes.discard(t)
+            if not t.cancelled():
+                t.exception()
+        
+        task.add_done_callback(done)
+    
+    async def _fetch(self, endpoint: str, params: Optional[Dict[str, Any]]) -> Any:
+        """
+        Realiza la petición GET a la API externa sin pasar por el caché
         
+        Args:
+            endpoint: Endpoint relativo (ej: '/exercises')
+            params: Parámetros de query string opcionales
+            
+        Returns:
+            Respuesta JSON de la API
+            
+        Raises:
+            HTTPException: Si la petición falla
+        """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         
+        start = time.perf_counter()
         try:
             response = await self.client.get(url, params=params)
             response.raise_for_status()
-            data = response.json()
-            
-            # Guardar en caché
-            if self.enable_cache and use_cache:
-                cache.set("api_request", data, CACHE_TTL, endpoint, params=params)
-            
-            return data
+            return response.json()
             
         except httpx.HTTPStatusError as e:
             raise HTTPException(
@@ -65,7 +268,10 @@ class ExternalAPIClient:
                 status_code=500,
                 detail=f"Error inesperado: {str(e)}"
             )
+        finally:
+            record_upstream_call(time.perf_counter() - start)
     
     async def close(self):
-        """Cierra la conexión del cliente HTTP"""
-        await self.client.aclose()
+        """Cierra la conexión del cliente HTTP si fue creado por esta instancia"""
+        if self._owns_client:
+            await self.client.aclose()
@@ -1,18 +1,59 @@
 """
 Servicio para la lógica de negocio de listas
 """
-from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from fastapi import HTTPException
 from app.models.List import List
+from app.models.Recipe import Recipe
 from app.models.RecipeList import RecipeList
 from app.schemas.list_schema import ListCreate
+from app.services.resource_versions import LIST, USER_LISTS, resource_versions
 
 
 class ListService:
     """Servicio para gestionar listas"""
     
     @staticmethod
-    def create_list(db: Session, list_data: ListCreate) -> List:
+    def _select_lists():
+        """SELECT de listas con sus recetas cargadas en una consulta adicional por lote"""
+        return select(List).options(selectinload(List.recipes))
+    
+    @staticmethod
+    async def _load_list(db: AsyncSession, list_id: int):
+        """Recarga una lista con sus recetas después de modificarla"""
+        return await db.scalar(
+            ListService._select_lists()
+            .where(List.id == list_id)
+            .execution_options(populate_existing=True)
+        )
+    
+    @staticmethod
+    async def _ensure_list_exists(db: AsyncSession, list_id: int) -> None:
+        """Lanza 404 si la lista no existe"""
+        if await db.scalar(select(List.id).where(List.id == list_id)) is None:
+            raise HTTPException(status_code=404, detail="List not found")
+    
+    @staticmethod
+    async def touch_list(db: AsyncSession, list_id: int) -> None:
+        """
+        Incrementa la versión de una lista y de las listas de su dueño
+        
+        Se llama después del commit de un cambio en las recetas de la lista.
+        
+        Args:
+            db: Sesión de base de datos
+            list_id: ID de la lista modificada
+        """
+        resource_versions.bump(LIST, list_id)
+        user_id = await db.scalar(select(List.user_id).where(List.id == list_id))
+        if user_id is not None:
+            resource_versions.bump(USER_LISTS, user_id)
+    
+    @staticmethod
+    async def create_list(db: AsyncSession, list_data: ListCreate) -> List:
         """
         Crea una nueva lista
         
@@ -25,12 +66,12 @@ class ListService:
         """
         new_list = List(**list_data.dict())
         db.add(new_list)
-        db.commit()
-        db.refresh(new_list)
-        return new_list
+        await db.commit()
+        resource_versions.bump(USER_LISTS, new_list.user_id)
+        return await ListService._load_list(db, new_list.id)
     
     @staticmethod
-    def get_list_by_id(db: Session, list_id: int) -> List:
+    async def get_list_by_id(db: AsyncSession, list_id: int) -> List:
         """
         Obtiene una lista por ID
         
@@ -44,13 +85,13 @@ class ListService:
         Raises:
             HTTPException: Si la lista no existe
         """
-        list_item = db.query(List).filter(List.id == list_id).first()
+        list_item = await db.scalar(ListService._select_lists().where(List.id == list_id))
         if not list_item:
             raise HTTPException(status_code=404, detail="List not found")
         return list_item
     
     @staticmethod
-    def delete_list(db: Session, list_id: int) -> None:
+    async def delete_list(db: AsyncSession, list_id: int) -> None:
         """
         Elimina una lista
         
@@ -61,14 +102,16 @@ class ListService:
         Raises:
             HTTPException: Si la lista no existe
         """
-        list_item = db.query(List).filter(List.id == list_id).first()
+        list_item = await db.scalar(select(List).where(List.id == list_id))
         if not list_item:
             raise HTTPException(status_code=404, detail="List not found")
-        db.delete(list_item)
-        db.commit()
+        await db.delete(list_item)
+        await db.commit()
+        resource_versions.bump(LIST, list_id)
+        resource_versions.bump(USER_LISTS, list_item.user_id)
     
     @staticmethod
-    def update_list(db: Session, list_id: int, list_data: ListCreate) -> List:
+    async def update_list(db: AsyncSession, list_id: int, list_data: ListCreate) -> List:
         """
         Actualiza una lista existente
         
@@ -83,49 +126,70 @@ class ListService:
         Raises:
             HTTPException: Si la lista no existe
         """
-        existing_list = db.query(List).filter(List.id == list_id).first()
+        existing_list = await db.scalar(select(List).where(List.id == list_id))
         if not existing_list:
             raise HTTPException(status_code=404, detail="List not found")
         
         # Actualizar campos
+        previous_user_id = existing_list.user_id
         for key, value in list_data.dict().items():
             setattr(existing_list, key, value)
         
-        db.commit()
-        db.refresh(existing_list)
-        return existing_list
+        await db.commit()
+        resource_versions.bump(LIST, list_id)
+        resource_versions.bump(USER_LISTS, *{previous_user_id, existing_list.user_id})
+        return await ListService._load_list(db, list_id)
     
     @staticmethod
-    def get_all_lists(db: Session) -> list[List]:
+    async def get_all_lists(
+        db: AsyncSession,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> list[List]:
         """
-        Obtiene todas las listas
+        Obtiene las listas ordenadas por ID
         
         Args:
             db: Sesión de base de datos
+            limit: Número máximo de registros a retornar (None = todas)
+            after_id: ID de la última lista de la página anterior (cursor)
             
         Returns:
-            Lista de todas las listas
+            Lista de listas
         """
-        lists = db.query(List).all()
+        query = ListService._select_lists().order_by(List.id).limit(limit)
+        if after_id is not None:
+            query = query.where(List.id > after_id)
+        lists = (await db.scalars(query)).all()
         return lists
     
     @staticmethod
-    def get_lists_by_user(db: Session, user_id: int) -> list[List]:
+    async def get_lists_by_user(
+        db: AsyncSession,
+        user_id: int,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> list[List]:
         """
-        Obtiene todas las listas de un usuario
+        Obtiene las listas de un usuario ordenadas por ID
         
         Args:
             db: Sesión de base de datos
             user_id: ID del usuario
+            limit: Número máximo de registros a retornar (None = todas)
+            after_id: ID de la última lista de la página anterior (cursor)
             
         Returns:
             Lista de listas del usuario
         """
-        lists = db.query(List).filter(List.user_id == user_id).all()
+        query = ListService._select_lists().where(List.user_id == user_id).order_by(List.id).limit(limit)
+        if after_id is not None:
+            query = query.where(List.id > after_id)
+        lists = (await db.scalars(query)).all()
         return lists
     
     @staticmethod
-    def get_recipes_in_list(db: Session, list_id: int) -> list:
+    async def get_recipes_in_list(db: AsyncSession, list_id: int) -> list:
         """
         Obtiene todas las recetas en una lista
         
@@ -139,7 +203,80 @@ class ListService:
         Raises:
             HTTPException: Si la lista no existe
         """
-        list_item = db.query(List).filter(List.id == list_id).first()
+        list_item = await db.scalar(ListService._select_lists().where(List.id == list_id))
         if not list_item:
             raise HTTPException(status_code=404, detail="List not found")
-        return list_item.recipies
+        return list_item.recipes
+    
+    @staticmethod
+    async def add_recipes_to_list(db: AsyncSession, list_id: int, recipe_ids: list[int]) -> Dict[str, Any]:
+        """
+        Añade varias recetas a una lista en una sola sentencia
+        
+        INSERT IGNORE ... SELECT sobre el índice único (list_id, recipe_id):
+        las recetas que ya están en la lista o que no existen se omiten sin
+        leer antes la tabla, y dos altas concurrentes no pueden duplicar filas.
+        
+        Args:
+            db: Sesión de base de datos
+            list_id: ID de la lista
+            recipe_ids: IDs de las recetas a añadir
+            
+        Returns:
+            Resumen con list_id, requested y added
+            
+        Raises:
+            HTTPException: Si la lista no existe
+        """
+        requested = list(dict.fromkeys(recipe_ids))
+        statement = (
+            insert(RecipeList)
+            .from_select(
+                ["list_id", "recipe_id"],
+                select(List.id, Recipe.id)
+                .join(Recipe, Recipe.id.in_(requested))
+                .where(List.id == list_id)
+                .order_by(Recipe.id)
+            )
+            .prefix_with("IGNORE", dialect="mysql")
+            .prefix_with("OR IGNORE", dialect="sqlite")
+        )
+        result = await db.execute(statement)
+        await db.commit()
+        
+        # Solo si no se insertó nada hace falta saber si la lista existe
+        if result.rowcount:
+            await ListService.touch_list(db, list_id)
+        else:
+            await ListService._ensure_list_exists(db, list_id)
+        return {"list_id": list_id, "requested": len(requested), "added": result.rowcount}
+    
+    @staticmethod
+    async def remove_recipes_from_list(db: AsyncSession, list_id: int, recipe_ids: list[int]) -> Dict[str, Any]:
+        """
+        Quita varias recetas de una lista en una sola sentencia
+        
+        Args:
+            db: Sesión de base de datos
+            list_id: ID de la lista
+            recipe_ids: IDs de las recetas a quitar
+            
+        Returns:
+            Resumen con list_id, requested y removed
+            
+        Raises:
+            HTTPException: Si la lista no existe
+        """
+        requested = list(dict.fromkeys(recipe_ids))
+        result = await db.execute(
+            delete(RecipeList)
+            .where(RecipeList.list_id == list_id, RecipeList.recipe_id.in_(requested))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        
+        if result.rowcount:
+            await ListService.touch_list(db, list_id)
+        else:
+            await ListService._ensure_list_exists(db, list_id)
+        return {"list_id": list_id, "requested": len(requested), "removed": result.rowcount}
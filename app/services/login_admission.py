@@ -0,0 +1,167 @@
+"""
+Control de admisión para POST /login
+
+Cada intento de login cuesta un hash de bcrypt. Antes de llegar a
+UserService.login_user se comprueba, en este orden:
+
+1. token bucket por IP (429)
+2. token bucket por email (429)
+3. límite global de hashes simultáneos (503)
+
+Las peticiones rechazadas responden al instante con Retry-After en lugar de
+esperar en la cola del pool de bcrypt.
+"""
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import math
+import time
+from fastapi import HTTPException, status
+from app.shared.config.security import (
+    LOGIN_ADMISSION_ENABLED,
+    LOGIN_EMAIL_BURST,
+    LOGIN_EMAIL_PER_MINUTE,
+    LOGIN_IP_BURST,
+    LOGIN_IP_PER_MINUTE,
+    LOGIN_MAX_CONCURRENT,
+    LOGIN_TRACKED_KEYS,
+)
+
+
+class TokenBuckets:
+    """
+    Token buckets por clave con un número acotado de claves
+    
+    Cada clave acumula `rate` tokens por segundo hasta `burst`. Las claves se
+    guardan en orden LRU y se descartan las más antiguas al superar
+    max_keys, así un ataque con muchas IPs o emails no hace crecer la memoria
+    sin límite (una clave descartada vuelve con el bucket lleno).
+    """
+    
+    def __init__(self, per_minute: float, burst: int, max_keys: int = LOGIN_TRACKED_KEYS):
+        """
+        Args:
+            per_minute: Tokens que se recuperan por minuto
+            burst: Capacidad del bucket
+            max_keys: Número máximo de claves en memoria
+        """
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        # {key: (tokens, último instante de recarga)}
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+    
+    def take(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Consume un token de la clave
+        
+        Args:
+            key: IP o email
+            now: Instante actual (time.monotonic)
+            
+        Returns:
+            0 si se consumió el token, o los segundos hasta que haya uno
+        """
+        now = time.monotonic() if now is None else now
+        tokens, updated_at = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated_at) * self.rate)
+        
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / self.rate if self.rate > 0 else 60.0
+        
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+    
+    def size(self) -> int:
+        """Retorna el número de claves en memoria"""
+        return len(self._buckets)
+
+
+def _reject(status_code: int, retry_after: float, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class LoginAdmissionController:
+    """Decide si un intento de login se atiende ahora o se rechaza"""
+    
+    def __init__(
+        self,
+        ip_per_minute: float = LOGIN_IP_PER_MINUTE,
+        ip_burst: int = LOGIN_IP_BURST,
+        email_per_minute: float = LOGIN_EMAIL_PER_MINUTE,
+        email_burst: int = LOGIN_EMAIL_BURST,
+        max_concurrent: int = LOGIN_MAX_CONCURRENT,
+        enabled: bool = LOGIN_ADMISSION_ENABLED
+    ):
+        self.ip_buckets = TokenBuckets(ip_per_minute, ip_burst)
+        self.email_buckets = TokenBuckets(email_per_minute, email_burst)
+        self.max_concurrent = max_concurrent
+        self.enabled = enabled
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {"ip_rate": 0, "email_rate": 0, "overloaded": 0}
+    
+    @asynccontextmanager
+    async def admit(self, ip: Optional[str], email: str):
+        """
+        Reserva un lugar para un intento de login mientras dura el bloque
+        
+        Args:
+            ip: IP del cliente (None si no se conoce)
+            email: Email del intento
+            
+        Raises:
+            HTTPException: 429 si se superó el límite de la IP o del email,
+                503 si ya hay max_concurrent hashes en curso
+        """
+        if not self.enabled:
+            self.admitted += 1
+            yield
+            return
+        
+        if ip is not None:
+            retry_after = self.ip_buckets.take(ip)
+            if retry_after:
+                self.rejected["ip_rate"] += 1
+                raise _reject(status.HTTP_429_TOO_MANY_REQUESTS, retry_after, "Too many login attempts")
+        
+        retry_after = self.email_buckets.take(email.strip().lower())
+        if retry_after:
+            self.rejected["email_rate"] += 1
+            raise _reject(status.HTTP_429_TOO_MANY_REQUESTS, retry_after, "Too many login attempts")
+        
+        if self.in_flight >= self.max_concurrent:
+            self.rejected["overloaded"] += 1
+            raise _reject(status.HTTP_503_SERVICE_UNAVAILABLE, 1, "Login temporarily overloaded")
+        
+        self.in_flight += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+    
+    def stats(self) -> Dict[str, int]:
+        """Contadores de intentos admitidos y rechazados por motivo"""
+        return {
+            "enabled": self.enabled,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "tracked_ips": self.ip_buckets.size(),
+            "tracked_emails": self.email_buckets.size(),
+        }
+
+
+# Instancia global del control de admisión
+login_admission = LoginAdmissionController()
@@ -1,18 +1,65 @@
 """
 Servicio para la lógica de negocio de recetas
 """
-from sqlalchemy.orm import Session
+from typing import Any, AsyncIterable, Dict, List, Optional, Tuple
+import json
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
+from app.models.List import List as ListModel
 from app.models.Recipe import Recipe
 from app.models.RecipeList import RecipeList
 from app.schemas.recipe_schema import RecipeCreate
+from app.services.list_service import ListService
+from app.services.resource_versions import LIST, RECIPE, USER_LISTS, resource_versions
+from app.shared.config.api_config import RECIPE_BULK_CHUNK_SIZE
+from app.shared.config.query_profiler import query_profiler
+
+
+def _describe_error(error: Exception) -> str:
+    """
+    Mensaje corto de un error de validación o de base de datos
+
+    Los errores de base de datos se reportan con un mensaje genérico: el
+    texto del driver incluye nombres de tablas y restricciones, así que solo
+    se registra en el log.
+    """
+    if isinstance(error, SQLAlchemyError):
+        print(f"Error al insertar una receta en bloque: {getattr(error, 'orig', None) or error}")
+        if isinstance(error, IntegrityError):
+            return "Constraint violation (e.g. user_id does not exist)"
+        return "Database error"
+    if hasattr(error, "errors"):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in detail['loc']) or 'item'}: {detail['msg']}"
+            for detail in error.errors()
+        )
+    return str(error)
 
 
 class RecipeService:
     """Servicio para gestionar recetas"""
     
     @staticmethod
-    def create_recipe(db: Session, recipe_data: RecipeCreate) -> Recipe:
+    async def _lists_containing(db: AsyncSession, recipe_id: int) -> List[Tuple[int, int]]:
+        """Retorna (list_id, user_id) de las listas que incluyen una receta"""
+        rows = await db.execute(
+            select(ListModel.id, ListModel.user_id)
+            .join(RecipeList, RecipeList.list_id == ListModel.id)
+            .where(RecipeList.recipe_id == recipe_id)
+        )
+        return [tuple(row) for row in rows]
+    
+    @staticmethod
+    def _touch_recipe(recipe_id: int, lists: List[Tuple[int, int]]) -> None:
+        """Incrementa la versión de una receta y de las listas que la incluyen"""
+        resource_versions.bump(RECIPE, recipe_id)
+        resource_versions.bump(LIST, *{list_id for list_id, _ in lists})
+        resource_versions.bump(USER_LISTS, *{user_id for _, user_id in lists})
+    
+    @staticmethod
+    async def create_recipe(db: AsyncSession, recipe_data: RecipeCreate) -> Recipe:
         """
         Crea una nueva receta
         
@@ -25,12 +72,98 @@ class RecipeService:
         """
         new_recipe = Recipe(**recipe_data.dict())
         db.add(new_recipe)
-        db.commit()
-        db.refresh(new_recipe)
+        await db.commit()
+        await db.refresh(new_recipe)
         return new_recipe
     
     @staticmethod
-    def get_recipe_by_id(db: Session, recipe_id: int) -> Recipe:
+    async def _insert_chunk(
+        db: AsyncSession,
+        chunk: List[Tuple[int, Dict[str, Any]]],
+        errors: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Inserta un bloque de recetas con un solo INSERT de varias filas
+        
+        Si el bloque falla (ej: un user_id inexistente) se reintenta fila por
+        fila para insertar las válidas y reportar solo las que fallan. Los
+        INSERT repetidos no se cuentan como N+1 (ver allow_repeats).
+        
+        Args:
+            db: Sesión de base de datos
+            chunk: Pares (índice en la petición, valores de la receta)
+            errors: Lista donde se agregan los errores por elemento
+            
+        Returns:
+            Número de recetas insertadas
+        """
+        with query_profiler.allow_repeats():
+            try:
+                await db.execute(insert(Recipe), [values for _, values in chunk])
+                await db.commit()
+                return len(chunk)
+            except SQLAlchemyError:
+                await db.rollback()
+            
+            inserted = 0
+            for index, values in chunk:
+                try:
+                    await db.execute(insert(Recipe), [values])
+                    await db.commit()
+                    inserted += 1
+                except SQLAlchemyError as e:
+                    await db.rollback()
+                    errors.append({"index": index, "error": _describe_error(e)})
+            return inserted
+    
+    @staticmethod
+    async def bulk_create_recipes(
+        db: AsyncSession,
+        items: AsyncIterable[Any],
+        chunk_size: int = RECIPE_BULK_CHUNK_SIZE
+    ) -> Dict[str, Any]:
+        """
+        Valida e inserta recetas por bloques, con un commit por bloque
+        
+        Los elementos inválidos se reportan con su índice sin detener el resto
+        de la importación.
+        
+        Args:
+            db: Sesión de base de datos
+            items: Recetas como objetos JSON o líneas NDJSON sin decodificar
+            chunk_size: Recetas por INSERT
+            
+        Returns:
+            Resumen con inserted, failed y errors [{index, error}]
+        """
+        inserted = 0
+        errors: List[Dict[str, Any]] = []
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        index = 0
+        
+        async for item in items:
+            try:
+                if isinstance(item, (bytes, str)):
+                    item = json.loads(item)
+                recipe = RecipeCreate.model_validate(item)
+            except ValueError as e:
+                # ValidationError de pydantic y JSONDecodeError son ValueError
+                errors.append({"index": index, "error": _describe_error(e)})
+            else:
+                chunk.append((index, recipe.model_dump()))
+                if len(chunk) >= chunk_size:
+                    inserted += await RecipeService._insert_chunk(db, chunk, errors)
+                    chunk = []
+            index += 1
+        
+        if chunk:
+            inserted += await RecipeService._insert_chunk(db, chunk, errors)
+        
+        errors.sort(key=lambda error: error["index"])
+        return {"inserted": inserted, "failed": len(errors), "errors": errors}
+    
+    @staticmethod
+    async def get_recipe_by_id(db: AsyncSession, recipe_id: int) -> Recipe:
         """
         Obtiene una receta por ID
         
@@ -44,29 +177,41 @@ class RecipeService:
         Raises:
             HTTPException: Si la receta no existe
         """
-        db_recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
+        db_recipe = await db.scalar(select(Recipe).where(Recipe.id == recipe_id))
         if db_recipe is None:
             raise HTTPException(status_code=404, detail="Recipe not found")
         return db_recipe
     
     @staticmethod
-    def get_all_recipes(db: Session, skip: int = 0, limit: int = 10) -> list[Recipe]:
+    async def get_all_recipes(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 10,
+        after_id: Optional[int] = None
+    ) -> list[Recipe]:
         """
-        Obtiene una lista paginada de recetas
+        Obtiene una lista paginada de recetas ordenada por ID
         
         Args:
             db: Sesión de base de datos
-            skip: Número de registros a saltar
+            skip: Número de registros a saltar (se ignora si hay after_id)
             limit: Número máximo de registros a retornar
+            after_id: ID de la última receta de la página anterior (cursor)
             
         Returns:
             Lista de recetas
         """
-        recipes = db.query(Recipe).offset(skip).limit(limit).all()
+        query = select(Recipe).order_by(Recipe.id).limit(limit)
+        if after_id is not None:
+            # Keyset: se entra directo al índice de la clave primaria sin recorrer las filas saltadas
+            query = query.where(Recipe.id > after_id)
+        else:
+            query = query.offset(skip)
+        recipes = (await db.scalars(query)).all()
         return recipes
     
     @staticmethod
-    def delete_recipe(db: Session, recipe_id: int) -> None:
+    async def delete_recipe(db: AsyncSession, recipe_id: int) -> None:
         """
         Elimina una receta
         
@@ -77,14 +222,17 @@ class RecipeService:
         Raises:
             HTTPException: Si la receta no existe
         """
-        db_recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
+        db_recipe = await db.scalar(select(Recipe).where(Recipe.id == recipe_id))
         if db_recipe is None:
             raise HTTPException(status_code=404, detail="Recipe not found")
-        db.delete(db_recipe)
-        db.commit()
+        # Las listas que la incluyen cambian también (el borrado es en cascada)
+        lists = await RecipeService._lists_containing(db, recipe_id)
+        await db.delete(db_recipe)
+        await db.commit()
+        RecipeService._touch_recipe(recipe_id, lists)
     
     @staticmethod
-    def update_recipe(db: Session, recipe_id: int, recipe_data: RecipeCreate) -> Recipe:
+    async def update_recipe(db: AsyncSession, recipe_id: int, recipe_data: RecipeCreate) -> Recipe:
         """
         Actualiza una receta existente
         
@@ -99,7 +247,7 @@ class RecipeService:
         Raises:
             HTTPException: Si la receta no existe
         """
-        db_recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
+        db_recipe = await db.scalar(select(Recipe).where(Recipe.id == recipe_id))
         if db_recipe is None:
             raise HTTPException(status_code=404, detail="Recipe not found")
         
@@ -107,30 +255,46 @@ class RecipeService:
         for key, value in recipe_data.dict().items():
             setattr(db_recipe, key, value)
         
-        db.commit()
-        db.refresh(db_recipe)
+        # Las listas embeben la receta: cambian también
+        lists = await RecipeService._lists_containing(db, recipe_id)
+        await db.commit()
+        RecipeService._touch_recipe(recipe_id, lists)
+        await db.refresh(db_recipe)
         return db_recipe
     
     @staticmethod
-    def get_recipes_by_user(db: Session, user_id: int) -> list[Recipe]:
+    async def get_recipes_by_user(
+        db: AsyncSession,
+        user_id: int,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> list[Recipe]:
         """
-        Obtiene todas las recetas de un usuario
+        Obtiene las recetas de un usuario ordenadas por ID
         
         Args:
             db: Sesión de base de datos
             user_id: ID del usuario
+            limit: Número máximo de registros a retornar (None = todas)
+            after_id: ID de la última receta de la página anterior (cursor)
             
         Returns:
             Lista de recetas del usuario
         """
-        recipes = db.query(Recipe).filter(Recipe.user_id == user_id).all()
+        query = select(Recipe).where(Recipe.user_id == user_id).order_by(Recipe.id).limit(limit)
+        if after_id is not None:
+            query = query.where(Recipe.id > after_id)
+        recipes = (await db.scalars(query)).all()
         return recipes
     
     @staticmethod
-    def add_recipe_to_list(db: Session, recipe_id: int, list_id: int) -> RecipeList:
+    async def add_recipe_to_list(db: AsyncSession, recipe_id: int, list_id: int) -> Dict[str, int]:
         """
         Añade una receta a una lista
         
+        El índice único (list_id, recipe_id) rechaza los duplicados, así que
+        se inserta directamente y solo se consulta la tabla si el INSERT falla.
+        
         Args:
             db: Sesión de base de datos
             recipe_id: ID de la receta
@@ -140,26 +304,26 @@ class RecipeService:
             Relación receta-lista creada
             
         Raises:
-            HTTPException: Si la relación ya existe
-        """
-        # Verificar si la relación ya existe
-        existing_relation = db.query(RecipeList).filter(
-            RecipeList.recipie_id == recipe_id,
-            RecipeList.list_id == list_id
-        ).first()
-        
-        if existing_relation:
-            raise HTTPException(status_code=400, detail="Recipe already in list")
-        
-        # Crear nueva relación
-        recipie_list = RecipeList(recipie_id=recipe_id, list_id=list_id)
-        db.add(recipie_list)
-        db.commit()
-        db.refresh(recipie_list)
-        return recipie_list
+            HTTPException: Si la relación ya existe o la receta o la lista no existen
+        """
+        recipe_list = RecipeList(recipe_id=recipe_id, list_id=list_id)
+        db.add(recipe_list)
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            existing_relation = await db.scalar(select(RecipeList.id).where(
+                RecipeList.recipe_id == recipe_id,
+                RecipeList.list_id == list_id
+            ))
+            if existing_relation is not None:
+                raise HTTPException(status_code=400, detail="Recipe already in list")
+            raise HTTPException(status_code=404, detail="Recipe or list not found")
+        await ListService.touch_list(db, list_id)
+        return {"id": recipe_list.id, "list_id": list_id, "recipe_id": recipe_id}
     
     @staticmethod
-    def get_recipes_by_list(db: Session, list_id: int) -> list[Recipe]:
+    async def get_recipes_by_list(db: AsyncSession, list_id: int) -> list[Recipe]:
         """
         Obtiene todas las recetas de una lista
         
@@ -170,12 +334,10 @@ class RecipeService:
         Returns:
             Lista de recetas
         """
-        recipie_lists = db.query(RecipeList).filter(RecipeList.list_id == list_id).all()
-        recipes = []
-        
-        for rl in recipie_lists:
-            recipie = db.query(Recipe).filter(Recipe.id == rl.recipie_id).first()
-            if recipie:
-                recipes.append(recipie)
-        
+        recipes = (await db.scalars(
+            select(Recipe)
+            .join(RecipeList, RecipeList.recipe_id == Recipe.id)
+            .where(RecipeList.list_id == list_id)
+            .order_by(RecipeList.id)
+        )).all()
         return recipes
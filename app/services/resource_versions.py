@@ -0,0 +1,89 @@
+"""
+Versiones de los recursos para los ETag de las rutas de lectura
+
+Cada receta, lista y colección de listas de un usuario tiene un contador que
+los métodos de escritura de RecipeService y ListService incrementan después
+del commit. El ETag se deriva del contador, así que una ruta puede responder
+304 comparando If-None-Match sin consultar la base de datos.
+
+Los contadores viven en la memoria del proceso. El ETag incluye un
+identificador del proceso (epoch), por lo que los ETag de otro worker o de
+antes de un reinicio nunca coinciden. Las escrituras hechas fuera de los
+servicios (o en otro worker) no incrementan los contadores de este proceso,
+por eso los ETag solo se activan con ETAG_ENABLED=true y solo son seguros
+cuando la API corre en un único proceso.
+"""
+from typing import Dict, Hashable, Tuple
+from collections import OrderedDict
+import secrets
+from app.shared.config.api_config import ETAG_MAX_TRACKED
+
+RECIPE = "recipe"
+LIST = "list"
+USER_LISTS = "user_lists"
+
+
+class ResourceVersions:
+    """
+    Contadores de versión por recurso con un número acotado de entradas
+    
+    Un recurso que nunca se modificó tiene versión 0 y no ocupa memoria. Al
+    superar max_entries se descarta la entrada menos usada y se incrementa la
+    generación, que forma parte de todos los ETag: perder un contador nunca
+    produce un 304 con datos viejos, solo invalida los ETag emitidos.
+    """
+    
+    def __init__(self, max_entries: int = ETAG_MAX_TRACKED):
+        """
+        Args:
+            max_entries: Número máximo de recursos con contador en memoria
+        """
+        self.max_entries = max_entries
+        self.epoch = secrets.token_hex(4)
+        self.generation = 0
+        self._versions: "OrderedDict[Tuple[str, Hashable], int]" = OrderedDict()
+    
+    def get(self, kind: str, resource_id: Hashable) -> int:
+        """Retorna la versión actual de un recurso"""
+        return self._versions.get((kind, resource_id), 0)
+    
+    def bump(self, kind: str, *resource_ids: Hashable) -> None:
+        """
+        Incrementa la versión de uno o varios recursos
+        
+        Se llama después del commit: si se incrementara antes, una lectura
+        concurrente podría etiquetar los datos viejos con la versión nueva.
+        
+        Args:
+            kind: Tipo de recurso (RECIPE, LIST o USER_LISTS)
+            *resource_ids: IDs de los recursos modificados
+        """
+        for resource_id in resource_ids:
+            key = (kind, resource_id)
+            self._versions[key] = self._versions.pop(key, 0) + 1
+        
+        while len(self._versions) > self.max_entries:
+            self._versions.popitem(last=False)
+            self.generation += 1
+    
+    def etag(self, kind: str, resource_id: Hashable) -> str:
+        """
+        Retorna el ETag fuerte de la versión actual de un recurso
+        
+        Args:
+            kind: Tipo de recurso
+            resource_id: ID del recurso
+            
+        Returns:
+            ETag entre comillas, listo para el header
+        """
+        version = self.get(kind, resource_id)
+        return f'"{kind}-{resource_id}-{self.epoch}.{self.generation}.{version}"'
+    
+    def stats(self) -> Dict[str, int]:
+        """Retorna el número de contadores y la generación actual"""
+        return {"tracked": len(self._versions), "generation": self.generation}
+
+
+# Instancia global de las versiones de recursos
+resource_versions = ResourceVersions()
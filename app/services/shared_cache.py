@@ -0,0 +1,409 @@
+"""
+Caché compartido entre los workers de un host sobre un archivo SQLite
+
+Con CACHE_BACKEND=sqlite todos los workers de uvicorn leen y escriben las
+respuestas de ExerciseDB en el mismo archivo, así que una respuesta obtenida
+por un worker la aprovechan los demás y un caché frío no multiplica las
+llamadas a la API externa por el número de workers.
+
+Cada worker mantiene además una copia local en memoria (InMemoryCache) de
+las entradas frescas para no decodificar JSON en cada lectura. clear() e
+invalidate() se registran en la tabla cache_invalidations; cada worker la
+consulta como máximo cada CACHE_SYNC_INTERVAL segundos y descarta de su
+copia local lo invalidado, por lo que DELETE /cache/clear llega a todos los
+workers aunque lo atienda uno solo.
+
+Las escrituras no se difunden: la copia local solo responde mientras la
+entrada está fresca y, al quedar obsoleta, se vuelve a leer el archivo, donde
+es probable que otro worker ya la haya refrescado sin llamar a la API.
+
+Los errores de SQLite (archivo bloqueado más de CACHE_SQLITE_TIMEOUT, disco
+lleno...) no hacen fallar la petición: se registran y se usa la copia local.
+
+Las operaciones son síncronas y pueden esperar el lock del archivo; desde
+código asíncrono se llaman con cache.run, que las ejecuta en el threadpool.
+"""
+from typing import Any, Hashable, Iterable, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+from app.services.cache_service import CacheBackend, CacheEntry, CacheUsage, InMemoryCache
+from app.services.cache_stats import CacheStats
+from app.shared.config.external_api_config import (
+    CACHE_INVALIDATION_LOG_SIZE,
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_SQLITE_PATH,
+    CACHE_SQLITE_TIMEOUT,
+    CACHE_SYNC_INTERVAL,
+)
+
+# Cada cuántas escrituras se comprueban los límites de entradas y bytes
+_TRIM_EVERY = 50
+
+# Versión del esquema (PRAGMA user_version); un archivo de otra versión se
+# vacía y se vuelve a crear, ya que solo contiene datos de caché
+_SCHEMA_VERSION = 2
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache_entries ("
+    " key TEXT PRIMARY KEY,"
+    " prefix TEXT NOT NULL,"
+    " label TEXT,"
+    " value TEXT NOT NULL,"
+    " fresh_until REAL NOT NULL,"
+    " expires_at REAL NOT NULL,"
+    " size INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (expires_at)",
+    "CREATE INDEX IF NOT EXISTS ix_cache_entries_fresh_until ON cache_entries (fresh_until)",
+    # key NULL = clear() de todo el caché
+    "CREATE TABLE IF NOT EXISTS cache_invalidations (seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT)",
+)
+
+
+class SharedCache(CacheBackend):
+    """
+    Caché en un archivo SQLite compartido con una copia local por worker
+    
+    Los límites de entradas y bytes se aplican al archivo compartido (cada
+    _TRIM_EVERY escrituras y en cada barrido) desalojando las entradas más
+    antiguas, y también a la copia local de cada worker.
+    """
+    
+    backend = "sqlite"
+    # Las operaciones esperan el lock del archivo: desde código asíncrono
+    # se llaman con cache.run, que las ejecuta en el threadpool
+    blocking = True
+    
+    def __init__(
+        self,
+        path: str = CACHE_SQLITE_PATH,
+        max_entries: Optional[int] = CACHE_MAX_ENTRIES,
+        max_bytes: Optional[int] = CACHE_MAX_BYTES,
+        sync_interval: float = CACHE_SYNC_INTERVAL,
+        timeout: float = CACHE_SQLITE_TIMEOUT
+    ):
+        """
+        Args:
+            path: Ruta del archivo SQLite (se crea si no existe)
+            max_entries: Número máximo de entradas (None = sin límite)
+            max_bytes: Tamaño aproximado máximo en bytes (None = sin límite)
+            sync_interval: Segundos máximos que un worker tarda en ver una
+                invalidación hecha por otro
+            timeout: Segundos de espera cuando otro proceso tiene el lock
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sync_interval = sync_interval
+        self.timeout = timeout
+        self.evictions = 0
+        self.errors = 0
+        self.stats = CacheStats()
+        # La copia local usa como clave el texto guardado en el archivo
+        self.local = InMemoryCache(max_entries=max_entries, max_bytes=max_bytes)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._last_seq = 0
+        self._synced_at = 0.0
+        self._writes_since_trim = 0
+    
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Retorna la conexión de este proceso, abriéndola si hace falta
+        
+        La conexión se abre en el primer uso y no al importar el módulo: un
+        worker creado con fork no debe heredar la conexión del proceso padre.
+        """
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        # WAL: las lecturas no esperan a las escrituras de otros workers.
+        # Es un caché, así que no hace falta sincronizar el disco
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        self._write(conn, self._schema_statements(conn))
+        
+        # Lo heredado del proceso padre no se sincronizó: se descarta
+        self.local.clear()
+        self._last_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM cache_invalidations").fetchone()[0]
+        self._synced_at = time.monotonic()
+        self._conn, self._pid = conn, os.getpid()
+        return conn
+    
+    def _schema_statements(self, conn: sqlite3.Connection) -> list:
+        """Sentencias que crean el esquema o reemplazan uno de otra versión"""
+        statements = [(statement, ()) for statement in _SCHEMA]
+        if conn.execute("PRAGMA user_version").fetchone()[0] == _SCHEMA_VERSION:
+            return statements
+        return [
+            ("DROP TABLE IF EXISTS cache_entries", ()),
+            ("DROP TABLE IF EXISTS cache_invalidations", ()),
+            *statements,
+            (f"PRAGMA user_version = {_SCHEMA_VERSION}", ()),
+        ]
+    
+    @staticmethod
+    def _text(key: Hashable) -> str:
+        """Clave como texto para el archivo (repr de la tupla normalizada)"""
+        return repr(key)
+    
+    def _error(self, operation: str, error: sqlite3.Error) -> None:
+        """Registra un error de SQLite sin interrumpir la petición"""
+        self.errors += 1
+        print(f"Error en el caché compartido ({operation}): {error}")
+    
+    def _write(self, conn: sqlite3.Connection, statements: Iterable[tuple]) -> list:
+        """Ejecuta varias sentencias en una transacción y retorna sus rowcount"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            counts = [conn.execute(sql, params).rowcount for sql, params in statements]
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return counts
+    
+    def _log_invalidation(self, key: Optional[str]) -> list:
+        """Sentencias que registran una invalidación y recortan el registro"""
+        return [
+            ("INSERT INTO cache_invalidations (key) VALUES (?)", (key,)),
+            (
+                "DELETE FROM cache_invalidations WHERE seq <= (SELECT MAX(seq) FROM cache_invalidations) - ?",
+                (CACHE_INVALIDATION_LOG_SIZE,)
+            ),
+        ]
+    
+    def _sync(self, conn: sqlite3.Connection) -> None:
+        """Aplica a la copia local las invalidaciones de otros workers"""
+        now = time.monotonic()
+        if now - self._synced_at < self.sync_interval:
+            return
+        self._synced_at = now
+        
+        rows = conn.execute(
+            "SELECT seq, key FROM cache_invalidations WHERE seq > ? ORDER BY seq",
+            (self._last_seq,)
+        ).fetchall()
+        if not rows:
+            return
+        
+        # Un hueco en la secuencia significa que el registro se recortó antes
+        # de leerlo: no se sabe qué se invalidó, así que se descarta todo
+        if rows[0][0] != self._last_seq + 1 or any(key is None for _, key in rows):
+            self.local.clear()
+        else:
+            for _, key in rows:
+                self.local.delete_entry(key)
+        self._last_seq = rows[-1][0]
+    
+    def _record_removed(self, rows: Iterable[Tuple[str, Optional[str], int]], event: str) -> int:
+        """Cuenta en las estadísticas las entradas eliminadas por (prefijo, endpoint)"""
+        total = 0
+        for prefix, label, count in rows:
+            self.stats.record(prefix, label, event, count)
+            total += count
+        return total
+    
+    def _trim(self, conn: sqlite3.Connection) -> int:
+        """Desaloja las entradas más antiguas del archivo hasta respetar los límites"""
+        self._writes_since_trim = 0
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+        excess = count - self.max_entries if self.max_entries is not None else 0
+        
+        def within_limits() -> bool:
+            return len(victims) >= excess and (self.max_bytes is None or total <= self.max_bytes)
+        
+        victims = []
+        if not within_limits():
+            for key, prefix, label, size in conn.execute(
+                "SELECT key, prefix, label, size FROM cache_entries ORDER BY fresh_until"
+            ).fetchall():
+                victims.append((key, prefix, label))
+                total -= size
+                if within_limits():
+                    break
+        
+        if not victims:
+            return 0
+        conn.executemany("DELETE FROM cache_entries WHERE key = ?", [(key,) for key, _, _ in victims])
+        removed = self._record_removed(((prefix, label, 1) for _, prefix, label in victims), "evictions")
+        self.evictions += removed
+        return removed
+    
+    def get_entry(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Obtiene una entrada por clave aunque esté obsoleta
+        
+        Las entradas frescas de la copia local se retornan sin leer el
+        archivo; si no está o está obsoleta se lee del archivo, donde otro
+        worker pudo haberla refrescado.
+        
+        Args:
+            key: Clave generada con make_key
+            
+        Returns:
+            Tupla (valor, fresh_until, expires_at) o None si no existe o
+            pasó su TTL duro
+        """
+        text = self._text(key)
+        with self._lock:
+            local_entry = None
+            try:
+                conn = self._connection()
+                self._sync(conn)
+                local_entry = self.local.get_entry(text)
+                if local_entry is not None and local_entry[1] >= time.time():
+                    return local_entry
+                row = conn.execute(
+                    "SELECT value, fresh_until, expires_at, size, label FROM cache_entries WHERE key = ?",
+                    (text,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._error("lectura", e)
+                return local_entry
+            
+            # Las entradas expiradas se cuentan al eliminarlas en el barrido
+            if row is None or time.time() > row[2]:
+                self.local.delete_entry(text)
+                return None
+            
+            value = json.loads(row[0])
+            self.local.put_entry(text, value, row[1], row[2], label=row[4], size=row[3])
+            return value, row[1], row[2]
+    
+    def put_entry(
+        self,
+        key: Hashable,
+        value: Any,
+        fresh_until: float,
+        expires_at: float,
+        label: Optional[str] = None
+    ) -> None:
+        """
+        Guarda una entrada en el archivo compartido y en la copia local
+        
+        Args:
+            key: Clave generada con make_key
+            value: Valor serializable a JSON
+            fresh_until: Instante (time.time) hasta el que la entrada está fresca
+            expires_at: Instante en que la entrada se elimina
+            label: Endpoint de la entrada para las estadísticas
+        """
+        text = self._text(key)
+        data = json.dumps(value, separators=(",", ":"))
+        size = len(data)
+        
+        # Un valor más grande que todo el caché no se guarda
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        
+        with self._lock:
+            self.local.put_entry(text, value, fresh_until, expires_at, label=label, size=size)
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, prefix, label, value, fresh_until, expires_at, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (text, key[0], label, data, fresh_until, expires_at, size)
+                )
+                self._writes_since_trim += 1
+                if self._writes_since_trim >= _TRIM_EVERY:
+                    self._trim(conn)
+            except sqlite3.Error as e:
+                self._error("escritura", e)
+    
+    def delete_entry(self, key: Hashable) -> bool:
+        """Elimina una entrada en todos los workers; retorna si existía"""
+        text = self._text(key)
+        with self._lock:
+            existed = self.local.delete_entry(text)
+            try:
+                conn = self._connection()
+                deleted, *_ = self._write(conn, [
+                    ("DELETE FROM cache_entries WHERE key = ?", (text,)),
+                    *self._log_invalidation(text),
+                ])
+                existed = existed or deleted > 0
+            except sqlite3.Error as e:
+                self._error("invalidación", e)
+            return existed
+    
+    def clear(self) -> None:
+        """Limpia todo el caché en todos los workers"""
+        with self._lock:
+            self.local.clear()
+            try:
+                self._write(self._connection(), [
+                    ("DELETE FROM cache_entries", ()),
+                    *self._log_invalidation(None),
+                ])
+            except sqlite3.Error as e:
+                self._error("limpieza", e)
+    
+    def clear_expired(self) -> int:
+        """
+        Limpia las entradas expiradas y aplica los límites de tamaño
+        
+        Returns:
+            Número de entradas expiradas eliminadas del archivo compartido
+        """
+        now = time.time()
+        with self._lock:
+            self.local.clear_expired()
+            try:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    expired = conn.execute(
+                        "SELECT prefix, label, COUNT(*) FROM cache_entries WHERE expires_at < ? GROUP BY prefix, label",
+                        (now,)
+                    ).fetchall()
+                    conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+                    self._trim(conn)
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                conn.execute("COMMIT")
+                return self._record_removed(expired, "expirations")
+            except sqlite3.Error as e:
+                self._error("barrido", e)
+                return 0
+    
+    def _scalar(self, sql: str, default: Any) -> Any:
+        """Ejecuta una consulta de estadísticas sobre las entradas vigentes"""
+        with self._lock:
+            try:
+                return self._connection().execute(sql, (time.time(),)).fetchone()[0]
+            except sqlite3.Error as e:
+                self._error("estadísticas", e)
+                return default
+    
+    def size(self) -> int:
+        """Retorna el número de entradas en el archivo compartido"""
+        return self._scalar("SELECT COUNT(*) FROM cache_entries WHERE expires_at >= ?", 0)
+    
+    def size_bytes(self) -> int:
+        """Retorna el tamaño aproximado en bytes de las entradas compartidas"""
+        return self._scalar("SELECT COALESCE(SUM(size), 0) FROM cache_entries WHERE expires_at >= ?", 0)
+    
+    def usage(self) -> CacheUsage:
+        """Retorna (entradas, bytes aproximados) por prefijo y endpoint en el archivo compartido"""
+        with self._lock:
+            try:
+                rows = self._connection().execute(
+                    "SELECT prefix, label, COUNT(*), SUM(size) FROM cache_entries "
+                    "WHERE expires_at >= ? GROUP BY prefix, label",
+                    (time.time(),)
+                ).fetchall()
+            except sqlite3.Error as e:
+                self._error("estadísticas", e)
+                return {}
+        return {(prefix, label): (entries, size) for prefix, label, entries, size in rows}
@@ -0,0 +1,65 @@
+"""
+Deduplicación de llamadas concurrentes (single-flight)
+
+Cuando varias corrutinas piden la misma clave mientras ya hay una llamada en
+curso, todas esperan el resultado de esa única llamada en lugar de lanzar
+peticiones idénticas a la API externa.
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave en una sola ejecución"""
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Ejecuta fn una sola vez por clave mientras haya una llamada en curso
+        
+        Args:
+            key: Clave que identifica la llamada (la misma clave del caché)
+            fn: Función asíncrona sin argumentos que realiza la llamada
+        
+        Returns:
+            Resultado de la llamada compartida
+        
+        Raises:
+            Exception: La misma excepción de la llamada compartida, que se
+                propaga a todas las corrutinas que la esperaban
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.coalesced += 1
+        
+        # shield: si se cancela una de las peticiones que espera, la llamada
+        # compartida sigue en curso para las demás
+        return await asyncio.shield(task)
+    
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        """Libera la clave al terminar y marca la excepción como recuperada"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+    
+    def stats(self) -> Dict[str, int]:
+        """Retorna los contadores de llamadas ejecutadas y agrupadas"""
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+
+# Instancia global para las llamadas a APIs externas
+singleflight = SingleFlight()
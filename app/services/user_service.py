@@ -1,18 +1,20 @@
 """
 Servicio para la lógica de negocio de usuarios
 """
-from sqlalchemy.orm import Session
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from app.models.User import User
 from app.schemas.user_schema import UserCreate, LoginResponse
-from app.shared.config.security import get_password_hash, create_access_token, verify_password
+from app.shared.config.security import create_access_token, hash_password, check_password
 
 
 class UserService:
     """Servicio para gestionar usuarios"""
     
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate) -> User:
+    async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
         """
         Crea un nuevo usuario
         
@@ -27,12 +29,14 @@ class UserService:
             HTTPException: Si el email ya está registrado
         """
         # Verificar si el email ya existe
-        db_user = db.query(User).filter(User.email == user_data.email).first()
+        db_user = await db.scalar(select(User).where(User.email == user_data.email))
         if db_user:
             raise HTTPException(status_code=400, detail="Email already registered")
+        # Se devuelve la conexión al pool mientras se calcula el hash
+        await db.commit()
         
-        # Hash de la contraseña
-        hashed_password = get_password_hash(user_data.password)
+        # Hash de la contraseña (bcrypt es costoso, se ejecuta en el pool de procesos)
+        hashed_password = await hash_password(user_data.password)
         
         # Crear nuevo usuario
         new_user = User(
@@ -43,13 +47,13 @@ class UserService:
         )
         
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         
         return new_user
     
     @staticmethod
-    def get_user_by_id(db: Session, user_id: int) -> User:
+    async def get_user_by_id(db: AsyncSession, user_id: int) -> User:
         """
         Obtiene un usuario por ID
         
@@ -63,13 +67,13 @@ class UserService:
         Raises:
             HTTPException: Si el usuario no existe
         """
-        db_user = db.query(User).filter(User.id == user_id).first()
+        db_user = await db.scalar(select(User).where(User.id == user_id))
         if db_user is None:
             raise HTTPException(status_code=404, detail="User not found")
         return db_user
     
     @staticmethod
-    def login_user(db: Session, email: str, password: str) -> LoginResponse:
+    async def login_user(db: AsyncSession, email: str, password: str) -> LoginResponse:
         """
         Autentica un usuario y genera un token de acceso
         
@@ -85,11 +89,21 @@ class UserService:
             HTTPException: Si las credenciales son inválidas
         """
         # Buscar usuario por email
-        db_user = db.query(User).filter(User.email == email).first()
+        db_user = await db.scalar(select(User).where(User.email == email))
+        # Se devuelve la conexión al pool mientras bcrypt espera su turno
+        await db.commit()
         
         # Verificar credenciales
-        if not db_user or not verify_password(password, db_user.password):
+        if not db_user:
             raise HTTPException(status_code=400, detail="Invalid credentials")
+        valid, new_hash = await check_password(password, db_user.password)
+        if not valid:
+            raise HTTPException(status_code=400, detail="Invalid credentials")
+        
+        # El hash guardado usa un coste distinto de BCRYPT_ROUNDS: se reemplaza
+        if new_hash:
+            db_user.password = new_hash
+            await db.commit()
         
         # Crear token de acceso
         access_token = create_access_token(data={"sub": db_user.email})
@@ -101,17 +115,28 @@ class UserService:
         )
     
     @staticmethod
-    def get_all_users(db: Session, skip: int = 0, limit: int = 10) -> list[User]:
+    async def get_all_users(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 10,
+        after_id: Optional[int] = None
+    ) -> list[User]:
         """
-        Obtiene una lista paginada de usuarios
+        Obtiene una lista paginada de usuarios ordenada por ID
         
         Args:
             db: Sesión de base de datos
-            skip: Número de registros a saltar
+            skip: Número de registros a saltar (se ignora si hay after_id)
             limit: Número máximo de registros a retornar
+            after_id: ID del último usuario de la página anterior (cursor)
             
         Returns:
             Lista de usuarios
         """
-        users = db.query(User).offset(skip).limit(limit).all()
+        query = select(User).order_by(User.id).limit(limit)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        else:
+            query = query.offset(skip)
+        users = (await db.scalars(query)).all()
         return users
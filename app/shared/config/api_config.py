@@ -0,0 +1,31 @@
+"""
+Configuración de las rutas de la API
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Filas por consulta al transmitir colecciones como NDJSON
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "500"))
+
+# Recetas por INSERT (y por commit) en POST /recipes/bulk
+RECIPE_BULK_CHUNK_SIZE = int(os.getenv("RECIPE_BULK_CHUNK_SIZE", "500"))
+
+# Recursos con versión propia para los ETag; al superarlo se descartan los
+# más antiguos y se invalidan todos los ETag emitidos
+ETAG_MAX_TRACKED = int(os.getenv("ETAG_MAX_TRACKED", "100000"))
+
+# ETag / 304 en las rutas de lectura. Solo es seguro con un único proceso:
+# las versiones viven en la memoria de cada worker, y con varios workers
+# (uvicorn --workers, varios contenedores o hosts detrás de un balanceador)
+# un worker no ve las escrituras de otro y responde 304 con datos viejos.
+# Desactivado salvo que se indique ETAG_ENABLED=true
+ETAG_ENABLED = os.getenv("ETAG_ENABLED", "false").lower() == "true"
+
+# Middleware de métricas por ruta expuestas en /metrics (formato Prometheus)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Añade la cabecera Server-Timing (consultas SQL, ExerciseDB y total) a
+# cada respuesta
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "true").lower() == "true"
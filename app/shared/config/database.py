@@ -1,11 +1,29 @@
-from sqlalchemy import create_engine
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from app.shared.config.db_pool import pool_options, instrument_engine
+from app.shared.config.query_profiler import SQL_PROFILER_ENABLED, query_profiler
+from app.shared.request_metrics import instrument_queries
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Con DB_ASYNC_ENABLED=false las rutas usan el engine síncrono (pymysql)
+# ejecutando cada operación en el threadpool
+DB_ASYNC_ENABLED = os.getenv("DB_ASYNC_ENABLED", "true").lower() == "true"
+
+# Segundos máximos para abrir una conexión (y para el chequeo de readiness);
+# acota lo que tarda el fallback a localhost cuando RDS no responde
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "3"))
+
 db_config = {
     "DB_USER": os.getenv("DB_USER"),
     "DB_PASSWORD": os.getenv("DB_PASSWORD"),
@@ -14,26 +32,227 @@ db_config = {
     "DB_NAME": os.getenv("DB_NAME"),
 }
 
-try:
-    SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{db_config['DB_USER']}:{db_config['DB_PASSWORD']}@{db_config['DB_HOST']}:{db_config['DB_PORT']}/{db_config['DB_NAME']}"
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
-    with engine.connect() as connection:
-        pass
-except Exception as e:
-    print(f"Error al conectar a la base de datos RDS, conectando a localhost para desarrollo: {e}")
+# URL completa de otra base de datos (ej: sqlite:///bench.db en los
+# benchmarks); si no se indica se usa MySQL con las variables DB_*
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Driver asíncrono que corresponde a cada driver síncrono
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+Base = declarative_base() 
+
+# Los engines se crean al primer uso (get_engine) o en el lifespan
+# (init_database), nunca al importar este módulo
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_engine_lock = threading.Lock()
+_init_lock = asyncio.Lock()
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def _rds_url() -> str:
+    return f"mysql+pymysql://{db_config['DB_USER']}:{db_config['DB_PASSWORD']}@{db_config['DB_HOST']}:{db_config['DB_PORT']}/{db_config['DB_NAME']}"
+
+
+def _local_url() -> str:
     DB_USER_LOCAL = os.getenv("DB_USER_LOCAL", "root")
     DB_PASSWORD_LOCAL = os.getenv("DB_PASSWORD_LOCAL", "admin123")
     DB_HOST_LOCAL = os.getenv("DB_HOST_LOCAL", "localhost")
-    SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER_LOCAL}:{DB_PASSWORD_LOCAL}@{DB_HOST_LOCAL}:3306/{db_config['DB_NAME']}"
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    return f"mysql+pymysql://{DB_USER_LOCAL}:{DB_PASSWORD_LOCAL}@{DB_HOST_LOCAL}:3306/{db_config['DB_NAME']}"
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base() 
 
+def _connect_args(url: URL) -> Dict[str, Any]:
+    """Timeout de conexión para los drivers de MySQL (pymysql y aiomysql)"""
+    return {"connect_timeout": DB_CONNECT_TIMEOUT} if url.get_backend_name() == "mysql" else {}
 
-def get_db():
-    db = SessionLocal()
+
+def _create_engine(url: str) -> Engine:
+    parsed = make_url(url)
+    engine = create_engine(parsed, connect_args=_connect_args(parsed), **pool_options())
+    instrument_engine(engine, "sync")
+    instrument_queries(engine)
+    if SQL_PROFILER_ENABLED:
+        query_profiler.instrument(engine)
+    return engine
+
+
+def _connect_with_fallback() -> Engine:
+    """
+    Crea el engine síncrono probando primero RDS y después localhost
+
+    Con DATABASE_URL no se prueba la conexión. Cada intento está acotado
+    por DB_CONNECT_TIMEOUT.
+    """
+    if DATABASE_URL:
+        return _create_engine(DATABASE_URL)
     try:
+        engine = _create_engine(_rds_url())
+        with engine.connect() as connection:
+            pass
+        return engine
+    except Exception as e:
+        print(f"Error al conectar a la base de datos RDS, conectando a localhost para desarrollo: {e}")
+        return _create_engine(_local_url())
+
+
+def get_engine() -> Engine:
+    """
+    Engine síncrono, creado (con la prueba de conexión) en el primer uso
+
+    Bloquea mientras prueba la conexión: desde código asíncrono usar antes
+    init_database, que lo hace en el threadpool.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _connect_with_fallback()
+    return _engine
+
+
+def get_async_engine() -> Optional[AsyncEngine]:
+    """Engine asíncrono sobre la misma base de datos (aiomysql o aiosqlite), o None si está desactivado"""
+    global _async_engine
+    if not DB_ASYNC_ENABLED:
+        return None
+    if _async_engine is None:
+        url = get_engine().url
+        async_url = url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+        with _engine_lock:
+            if _async_engine is None:
+                engine = create_async_engine(async_url, connect_args=_connect_args(async_url), **pool_options(asynchronous=True))
+                instrument_engine(engine.sync_engine, "async")
+                instrument_queries(engine.sync_engine)
+                if SQL_PROFILER_ENABLED:
+                    query_profiler.instrument(engine.sync_engine)
+                _async_engine = engine
+    return _async_engine
+
+
+def created_engines() -> Dict[str, Optional[Engine]]:
+    """Engines ya creados por nombre ("sync", "async"), sin crear los que falten"""
+    return {
+        "sync": _engine,
+        "async": _async_engine.sync_engine if _async_engine is not None else None,
+    }
+
+
+async def init_database() -> None:
+    """
+    Crea los engines sin bloquear el event loop
+
+    Es idempotente y barata una vez hecha; session_scope la llama en cada
+    sesión por si una petición llega antes de que termine el lifespan.
+    """
+    if _engine is not None:
+        return
+    async with _init_lock:
+        if _engine is None:
+            await run_in_threadpool(get_engine)
+            get_async_engine()
+
+
+async def check_database() -> None:
+    """
+    Ejecuta SELECT 1 con un límite de DB_CONNECT_TIMEOUT segundos
+
+    Raises:
+        Exception: Si la base de datos no responde a tiempo o falla
+    """
+    await asyncio.wait_for(init_database(), timeout=DB_CONNECT_TIMEOUT * 2)
+    async_engine = get_async_engine()
+    if async_engine is not None:
+        async def ping():
+            async with async_engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        await asyncio.wait_for(ping(), timeout=DB_CONNECT_TIMEOUT)
+    else:
+        def ping():
+            with get_engine().connect() as connection:
+                connection.execute(text("SELECT 1"))
+        await asyncio.wait_for(run_in_threadpool(ping), timeout=DB_CONNECT_TIMEOUT)
+
+
+async def dispose_engines() -> None:
+    """Cierra los pools de conexiones de los engines creados"""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+
+
+class SyncSessionAdapter:
+    """
+    Expone una Session síncrona con la misma interfaz que AsyncSession
+
+    Permite que los servicios asíncronos funcionen con el engine síncrono:
+    cada operación que hace I/O se ejecuta en el threadpool, de modo que el
+    hilo solo se ocupa mientras dura la consulta y no toda la petición.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance, attribute_names=None) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+@asynccontextmanager
+async def session_scope():
+    """Abre una sesión asíncrona (o el adaptador síncrono) y la cierra al salir"""
+    await init_database()
+    if DB_ASYNC_ENABLED:
+        async with AsyncSessionLocal(bind=get_async_engine()) as db:
+            yield db
+    else:
+        db = SyncSessionAdapter(SessionLocal(bind=get_engine(), expire_on_commit=False))
+        try:
+            yield db
+        finally:
+            await db.close()
+
+
+async def get_db():
+    """Dependencia que entrega una sesión asíncrona (o el adaptador síncrono)"""
+    async with session_scope() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
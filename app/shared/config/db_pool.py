@@ -0,0 +1,166 @@
+"""
+Configuración e instrumentación del pool de conexiones de la base de datos
+"""
+from typing import Any, Dict, Optional
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.shared.metrics import Histogram
+
+load_dotenv()
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # segundos esperando una conexión libre
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # segundos, por debajo del idle timeout de RDS
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Tiempos de espera por una conexión, desde 0.1 ms hasta DB_POOL_TIMEOUT
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    """Contadores e histograma de espera de un pool de conexiones"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_time = Histogram(WAIT_BUCKETS)
+        self._lock = threading.Lock()
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self, pool: Any) -> Dict[str, Any]:
+        """
+        Estado actual del pool junto con los contadores acumulados
+
+        Args:
+            pool: Pool del engine (engine.pool)
+
+        Returns:
+            Diccionario serializable con el estado del pool
+        """
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": getattr(pool, "_max_overflow", None),
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "checkout_wait_seconds": self.wait_time.snapshot(),
+        }
+
+
+class _WaitTimingMixin:
+    """
+    Mide cuánto espera cada checkout por una conexión libre
+
+    SQLAlchemy no tiene un evento previo al checkout, así que el tiempo de
+    espera se mide alrededor de _do_get, que es donde el pool bloquea cuando
+    todas las conexiones están en uso.
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.increment("timeouts")
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.wait_time.observe(time.perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() recrea el pool: se conservan las métricas
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    """QueuePool con medición del tiempo de espera"""
+
+
+class InstrumentedAsyncAdaptedQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool con medición del tiempo de espera"""
+
+
+def pool_options(asynchronous: bool = False) -> Dict[str, Any]:
+    """
+    Argumentos de create_engine/create_async_engine para el pool
+
+    Args:
+        asynchronous: Si el engine es asíncrono
+
+    Returns:
+        Diccionario con la configuración del pool
+    """
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if asynchronous else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+# Métricas por nombre de engine ("sync", "async")
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def instrument_engine(engine: Engine, name: str) -> PoolMetrics:
+    """
+    Registra los eventos del pool de un engine para recolectar métricas
+
+    Args:
+        engine: Engine síncrono (o engine.sync_engine de uno asíncrono)
+        name: Nombre con el que se reportan las métricas
+
+    Returns:
+        Métricas asociadas al engine
+    """
+    metrics = PoolMetrics(name)
+    engine.pool.metrics = metrics
+    pool_metrics[name] = metrics
+
+    event.listen(engine, "checkout", lambda *args: metrics.increment("checkouts"))
+    event.listen(engine, "checkin", lambda *args: metrics.increment("checkins"))
+    event.listen(engine, "connect", lambda *args: metrics.increment("connects"))
+    event.listen(engine, "invalidate", lambda *args: metrics.increment("invalidations"))
+    return metrics
+
+
+def pool_status(engines: Dict[str, Optional[Engine]]) -> Dict[str, Any]:
+    """
+    Estado de los pools instrumentados
+
+    Args:
+        engines: Engines por nombre (los None se omiten)
+
+    Returns:
+        Estado de cada pool por nombre
+    """
+    return {
+        name: pool_metrics[name].snapshot(engine.pool)
+        for name, engine in engines.items()
+        if engine is not None and name in pool_metrics
+    }
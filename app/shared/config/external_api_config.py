@@ -1,11 +1,63 @@
 """
 Configuración para APIs externas
 """
+import os
+from dotenv import load_dotenv
 
-EXERCISEDB_BASE_URL = "https://exercisedb-api.vercel.app/api/v1"
+load_dotenv()
+
+EXERCISEDB_BASE_URL = os.getenv("EXERCISEDB_BASE_URL", "https://exercisedb-api.vercel.app/api/v1")
 
 # Timeouts en segundos
 REQUEST_TIMEOUT = 10
 
 # Cache TTL (tiempo de vida en segundos)
 CACHE_TTL = 3600  # 1 hora
+
+# Pasado CACHE_TTL la entrada queda "stale" (obsoleta):
+# - durante CACHE_STALE_WHILE_REVALIDATE se responde con el valor obsoleto
+#   al instante mientras se refresca en segundo plano
+# - si la API externa falla, se sigue sirviendo el valor obsoleto hasta
+#   CACHE_STALE_IF_ERROR (límite duro, luego la entrada se elimina)
+CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("CACHE_STALE_WHILE_REVALIDATE", "600"))  # 10 minutos
+CACHE_STALE_IF_ERROR = int(os.getenv("CACHE_STALE_IF_ERROR", "86400"))  # 24 horas
+
+# Pool de conexiones del cliente HTTP compartido
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))  # segundos
+
+# HTTP/2 (requiere el paquete opcional h2: pip install "httpx[http2]")
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+# Límites del caché en memoria (por worker)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # 64 MB aproximados
+CACHE_SWEEP_INTERVAL = float(os.getenv("CACHE_SWEEP_INTERVAL", "60"))  # segundos
+
+# Respuestas de ExerciseDB ya validadas y serializadas a JSON (bytes) que cada
+# worker conserva para responder los aciertos del caché sin pasar por Pydantic
+CACHE_RENDERED_MAX_BYTES = int(os.getenv("CACHE_RENDERED_MAX_BYTES", str(32 * 1024 * 1024)))  # 32 MB
+
+# Mirror mode: copia local del catálogo completo de ExerciseDB con índices
+# invertidos en memoria para responder los filtros sin llamar a la API
+EXERCISE_MIRROR_ENABLED = os.getenv("EXERCISE_MIRROR_ENABLED", "false").lower() == "true"
+EXERCISE_MIRROR_PATH = os.getenv("EXERCISE_MIRROR_PATH", "data/exercise_catalog.json")
+EXERCISE_MIRROR_PAGE_SIZE = int(os.getenv("EXERCISE_MIRROR_PAGE_SIZE", "100"))
+
+# Ejercicios que se descargan para poblar el índice de búsqueda si aún está vacío
+EXERCISE_SEARCH_WARMUP_LIMIT = int(os.getenv("EXERCISE_SEARCH_WARMUP_LIMIT", "1000"))
+
+# Backend del caché de la API externa:
+# - memory: un caché en memoria por worker
+# - sqlite: caché compartido por los workers del host en CACHE_SQLITE_PATH,
+#   con una copia local por worker que se sincroniza cada CACHE_SYNC_INTERVAL
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "data/cache.sqlite3")
+CACHE_SQLITE_TIMEOUT = float(os.getenv("CACHE_SQLITE_TIMEOUT", "1"))  # segundos de espera por el lock
+CACHE_SYNC_INTERVAL = float(os.getenv("CACHE_SYNC_INTERVAL", "0.5"))  # segundos
+CACHE_INVALIDATION_LOG_SIZE = int(os.getenv("CACHE_INVALIDATION_LOG_SIZE", "1000"))
+
+# Endpoints distintos con contadores propios en /cache/stats; los demás se
+# agrupan como "(otros)"
+CACHE_STATS_MAX_LABELS = int(os.getenv("CACHE_STATS_MAX_LABELS", "200"))
@@ -0,0 +1,55 @@
+"""
+Cliente HTTP compartido para las APIs externas
+
+Se crea una sola vez en el lifespan de la aplicación (ver main.py) y se
+reutiliza en todas las peticiones para aprovechar el pool de conexiones
+keep-alive en lugar de abrir una conexión TCP+TLS nueva por cada llamada.
+"""
+import ssl
+from typing import Union
+import httpx
+from fastapi import Request
+from app.shared.config.external_api_config import (
+    REQUEST_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP2_ENABLED,
+)
+
+
+def _http2_available() -> bool:
+    """Indica si el paquete opcional h2 está instalado"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client(verify: Union[bool, ssl.SSLContext] = True) -> httpx.AsyncClient:
+    """
+    Crea el cliente HTTP con los límites del pool configurados
+
+    Args:
+        verify: Verificación TLS (True o un SSLContext propio)
+
+    Returns:
+        Cliente httpx asíncrono listo para compartirse
+    """
+    http2 = HTTP2_ENABLED
+    if http2 and not _http2_available():
+        print("HTTP2_ENABLED está activo pero el paquete h2 no está instalado, usando HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(timeout=REQUEST_TIMEOUT, limits=limits, http2=http2, verify=verify)
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """Dependencia que entrega el cliente HTTP compartido de la aplicación"""
+    return request.app.state.http_client
@@ -0,0 +1,287 @@
+"""
+Perfilador de consultas SQL: estadísticas por sentencia normalizada,
+registro de consultas lentas y detección de patrones N+1 por petición
+
+El código que repite una sentencia a propósito (bloques de paginación keyset
+de los streams NDJSON, INSERT por bloques de las cargas masivas) lo hace
+dentro de query_profiler.allow_repeats() para no contarse como N+1.
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Deque, Dict, Iterator, Optional
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.shared.request_metrics import route_template
+
+load_dotenv()
+
+# Desactivado por defecto: activarlo en desarrollo (SQL_PROFILER_ENABLED=true)
+SQL_PROFILER_ENABLED = os.getenv("SQL_PROFILER_ENABLED", "false").lower() == "true"
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+# Una petición que ejecuta la misma sentencia más de estas veces se marca como N+1
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+# En modo estricto (tests) la consulta que supera el umbral lanza NPlusOneQueryError
+SQL_PROFILER_STRICT = os.getenv("SQL_PROFILER_STRICT", "false").lower() == "true"
+# Sentencias distintas con estadísticas propias; el resto se agrupa en una sola
+SQL_PROFILER_MAX_STATEMENTS = int(os.getenv("SQL_PROFILER_MAX_STATEMENTS", "500"))
+# Consultas lentas y detecciones N+1 recientes que se conservan
+SQL_PROFILER_LOG_SIZE = int(os.getenv("SQL_PROFILER_LOG_SIZE", "100"))
+
+OTHER_STATEMENTS = "(otras sentencias)"
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\?(?:, \?)*\)")
+_ROW_LIST = re.compile(r"(\(\?\.\.\.\))(?:, \(\?\.\.\.\))+")
+
+
+class NPlusOneQueryError(Exception):
+    """Una petición ejecutó la misma sentencia más veces que el umbral permitido"""
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """
+    Reduce una sentencia SQL a su forma, sin valores concretos
+
+    Los literales y parámetros pasan a '?', y las listas de parámetros
+    (IN (...) y VALUES de varias filas) se colapsan para que la misma
+    consulta con distinto número de ids dé la misma forma. Se guarda en
+    caché porque SQLAlchemy repite las mismas cadenas una y otra vez.
+
+    Args:
+        statement: Sentencia tal como se envía al driver
+
+    Returns:
+        Sentencia normalizada
+    """
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?...)", normalized)
+    return _ROW_LIST.sub(r"\1, ...", normalized)
+
+
+class StatementStats:
+    """Contadores acumulados de una sentencia normalizada"""
+
+    __slots__ = ("count", "total_seconds", "max_seconds", "slow")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.slow = 0
+
+
+class RequestQueries:
+    """Sentencias ejecutadas por una petición, por forma normalizada"""
+
+    __slots__ = ("scope", "counts", "allowed")
+
+    def __init__(self, scope: Dict[str, Any]):
+        self.scope = scope
+        self.counts: Dict[str, int] = {}
+        # > 0 mientras se ejecuta código dentro de allow_repeats()
+        self.allowed = 0
+
+    @property
+    def route(self) -> str:
+        return f"{self.scope['method']} {route_template(self.scope)}"
+
+
+# Consultas de la petición en curso; None fuera de una petición
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+class QueryProfiler:
+    """Estadísticas de las consultas SQL del proceso"""
+
+    def __init__(
+        self,
+        slow_query_ms: float = SQL_SLOW_QUERY_MS,
+        n_plus_one_threshold: int = SQL_N_PLUS_ONE_THRESHOLD,
+        strict: bool = SQL_PROFILER_STRICT,
+        max_statements: int = SQL_PROFILER_MAX_STATEMENTS,
+        log_size: int = SQL_PROFILER_LOG_SIZE,
+    ):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.strict = strict
+        self.max_statements = max_statements
+        self.statements: Dict[str, StatementStats] = {}
+        self.slow_queries: Deque[Dict[str, Any]] = deque(maxlen=log_size)
+        self.n_plus_one: Deque[Dict[str, Any]] = deque(maxlen=log_size)
+        self._lock = threading.Lock()
+
+    def instrument(self, engine: Engine) -> None:
+        """
+        Registra los eventos que miden cada consulta SQL de un engine
+
+        Args:
+            engine: Engine síncrono (o engine.sync_engine de uno asíncrono)
+        """
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        shape = normalize_statement(statement)
+        if context is not None:
+            context._query_profiler_start = time.perf_counter()
+        request = _current.get()
+        if request is None or request.allowed:
+            return
+        count = request.counts.get(shape, 0) + 1
+        request.counts[shape] = count
+        if self.strict and count == self.n_plus_one_threshold + 1:
+            raise NPlusOneQueryError(
+                f"{request.route} ejecutó más de {self.n_plus_one_threshold} veces: {shape}"
+            )
+
+    @contextmanager
+    def allow_repeats(self) -> Iterator[None]:
+        """
+        Excluye de la detección N+1 las consultas ejecutadas dentro del bloque
+
+        Para código que repite la misma sentencia por diseño y con un número
+        de ejecuciones acotado por el tamaño de la petición, no por filas
+        relacionadas. Las consultas se siguen midiendo en las estadísticas.
+        """
+        request = _current.get()
+        if request is None:
+            yield
+            return
+        request.allowed += 1
+        try:
+            yield
+        finally:
+            request.allowed -= 1
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_profiler_start", None)
+        if start is None:
+            return
+        self.record(normalize_statement(statement), time.perf_counter() - start)
+
+    def record(self, shape: str, seconds: float) -> None:
+        """
+        Suma una ejecución a las estadísticas de una sentencia
+
+        Args:
+            shape: Sentencia normalizada
+            seconds: Duración de la ejecución
+        """
+        with self._lock:
+            stats = self.statements.get(shape)
+            if stats is None:
+                bucket = shape if len(self.statements) < self.max_statements else OTHER_STATEMENTS
+                stats = self.statements.setdefault(bucket, StatementStats())
+            stats.count += 1
+            stats.total_seconds += seconds
+            if seconds > stats.max_seconds:
+                stats.max_seconds = seconds
+            if seconds >= self.slow_query_seconds:
+                stats.slow += 1
+        if seconds >= self.slow_query_seconds:
+            self._log_slow_query(shape, seconds)
+
+    def _log_slow_query(self, shape: str, seconds: float) -> None:
+        request = _current.get()
+        route = request.route if request is not None else None
+        self.slow_queries.append({
+            "statement": shape,
+            "duration_ms": round(seconds * 1000, 3),
+            "route": route,
+            "at": time.time(),
+        })
+        print(f"Consulta lenta ({seconds * 1000:.1f} ms) en {route or 'fuera de una petición'}: {shape}")
+
+    def request_finished(self, request: RequestQueries) -> None:
+        """
+        Reporta las sentencias que una petición repitió más que el umbral
+
+        Args:
+            request: Consultas de la petición terminada
+        """
+        for shape, count in request.counts.items():
+            if count > self.n_plus_one_threshold:
+                route = request.route
+                self.n_plus_one.append({"route": route, "statement": shape, "count": count, "at": time.time()})
+                print(f"Posible N+1 en {route}: {count} ejecuciones de {shape}")
+
+    def reset(self) -> None:
+        """Descarta las estadísticas y los registros recientes"""
+        with self._lock:
+            self.statements.clear()
+        self.slow_queries.clear()
+        self.n_plus_one.clear()
+
+    def snapshot(self, limit: int = 20) -> Dict[str, Any]:
+        """
+        Resumen serializable del perfilador
+
+        Args:
+            limit: Número de sentencias a incluir, ordenadas por tiempo total
+
+        Returns:
+            Sentencias más costosas, consultas lentas y detecciones N+1 recientes
+        """
+        with self._lock:
+            statements = sorted(self.statements.items(), key=lambda item: item[1].total_seconds, reverse=True)
+            tracked = len(self.statements)
+        return {
+            "slow_query_ms": self.slow_query_seconds * 1000,
+            "n_plus_one_threshold": self.n_plus_one_threshold,
+            "strict": self.strict,
+            "tracked_statements": tracked,
+            "statements": [
+                {
+                    "statement": shape,
+                    "count": stats.count,
+                    "total_ms": round(stats.total_seconds * 1000, 3),
+                    "avg_ms": round(stats.total_seconds * 1000 / stats.count, 3),
+                    "max_ms": round(stats.max_seconds * 1000, 3),
+                    "slow": stats.slow,
+                }
+                for shape, stats in statements[:limit]
+            ],
+            "slow_queries": list(self.slow_queries),
+            "n_plus_one": list(self.n_plus_one),
+        }
+
+
+class QueryProfilerMiddleware:
+    """
+    Middleware ASGI que agrupa las consultas SQL de cada petición para
+    detectar sentencias repetidas (N+1)
+    """
+
+    def __init__(self, app, profiler: QueryProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestQueries(scope)
+        token = _current.set(request)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            self.profiler.request_finished(request)
+
+
+query_profiler = QueryProfiler()
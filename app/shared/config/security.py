@@ -1,16 +1,50 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import asyncio
+import multiprocessing
 import os
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
 
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Tokens verificados que se recuerdan en memoria (ver app/services/auth_service.py)
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+# Coste de bcrypt (2^BCRYPT_ROUNDS iteraciones). Los hashes guardados con un
+# coste menor se rehacen al iniciar sesión; los de coste mayor se conservan
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Procesos dedicados a bcrypt: el hash no ocupa el GIL ni el threadpool del
+# worker y como máximo corren PASSWORD_HASH_WORKERS a la vez (0 = threadpool)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+# Control de admisión de /login (ver app/services/login_admission.py):
+# intentos por minuto y ráfaga por IP y por email, y hashes simultáneos
+LOGIN_ADMISSION_ENABLED = os.getenv("LOGIN_ADMISSION_ENABLED", "true").lower() == "true"
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "30"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "10"))
+LOGIN_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_EMAIL_PER_MINUTE", "10"))
+LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", "5"))
+LOGIN_MAX_CONCURRENT = int(os.getenv("LOGIN_MAX_CONCURRENT", str(max(1, PASSWORD_HASH_WORKERS) * 2)))
+LOGIN_TRACKED_KEYS = int(os.getenv("LOGIN_TRACKED_KEYS", "100000"))
+
+_hash_executor: Optional[ProcessPoolExecutor] = None
+_hash_workers = 0
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -18,6 +52,57 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verifica la contraseña y retorna un hash nuevo si el guardado tiene otro coste"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def start_password_hasher(workers: int = PASSWORD_HASH_WORKERS) -> None:
+    """Crea el pool de procesos de bcrypt (se llama en el lifespan)"""
+    global _hash_executor, _hash_workers
+    if _hash_executor is not None or workers <= 0:
+        return
+    _hash_workers = workers
+    # spawn: los procesos no heredan el estado del worker (event loop, conexiones)
+    _hash_executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    # Se lanzan los procesos ahora para que el primer login no pague el arranque
+    for _ in range(workers):
+        _hash_executor.submit(os.getpid)
+
+async def wait_password_hasher() -> None:
+    """Espera a que el pool de bcrypt tenga sus procesos en marcha"""
+    await _run_hasher(os.getpid)
+
+def shutdown_password_hasher() -> None:
+    """Detiene el pool de procesos de bcrypt"""
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+async def _run_hasher(fn, *args):
+    # Sin pool (scripts, PASSWORD_HASH_WORKERS=0) se usa el threadpool
+    if _hash_executor is None:
+        return await run_in_threadpool(fn, *args)
+    executor = _hash_executor
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        # Un proceso murió (ej: por memoria): se recrea el pool una sola vez
+        # aunque fallen varias peticiones a la vez, y se reintenta
+        if _hash_executor is executor:
+            print("El pool de procesos de bcrypt se detuvo inesperadamente, recreándolo")
+            shutdown_password_hasher()
+            start_password_hasher(_hash_workers)
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+
+async def hash_password(password: str) -> str:
+    """Versión asíncrona de get_password_hash que corre en el pool de bcrypt"""
+    return await _run_hasher(get_password_hash, password)
+
+async def check_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Versión asíncrona de verify_and_update_password que corre en el pool de bcrypt"""
+    return await _run_hasher(verify_and_update_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
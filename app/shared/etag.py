@@ -0,0 +1,52 @@
+"""
+Respuestas condicionales con ETag / If-None-Match
+
+Las rutas calculan el ETag antes de consultar la base de datos (ver
+app/services/resource_versions.py); si coincide con If-None-Match responden
+304 sin cuerpo y sin serializar el recurso.
+
+Con ETAG_ENABLED=false no se emiten ETag ni se responde 304.
+"""
+from fastapi import Request, Response
+from app.shared.config.api_config import ETAG_ENABLED
+
+ETAG_HEADER = "ETag"
+
+# Las rutas exigen Authorization: solo cachés privadas y siempre revalidando
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Indica si If-None-Match contiene el ETag actual
+
+    If-None-Match usa comparación débil, así que se ignora el prefijo W/.
+
+    Args:
+        request: Petición entrante
+        etag: ETag actual del recurso
+
+    Returns:
+        True si el cliente ya tiene esa versión (siempre False con
+        ETAG_ENABLED=false)
+    """
+    if not ETAG_ENABLED:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = (candidate.strip() for candidate in header.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    """Respuesta 304 para un cliente que ya tiene la versión actual"""
+    return Response(status_code=304, headers={ETAG_HEADER: etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Agrega ETag y Cache-Control a una respuesta completa (nada con ETAG_ENABLED=false)"""
+    if not ETAG_ENABLED:
+        return
+    response.headers[ETAG_HEADER] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,82 @@
+"""
+Primitivas de métricas en memoria
+"""
+from typing import Dict, List, Optional, Sequence
+import bisect
+import threading
+
+# Límites superiores en segundos, desde 0.5 ms hasta 10 s
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """
+    Histograma de buckets fijos (acumulables al estilo Prometheus)
+
+    Es seguro usarlo desde varios hilos: las observaciones del engine
+    síncrono llegan desde el threadpool.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets: List[float] = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # el último es +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Registra una observación"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative(self) -> List[int]:
+        """Conteos acumulados por bucket, incluyendo +Inf al final"""
+        with self._lock:
+            counts = list(self._counts)
+        total = 0
+        cumulative = []
+        for count in counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Estima un percentil como el límite del bucket que lo contiene
+
+        Si el percentil cae en el bucket +Inf se retorna el último límite
+        finito (el valor real es mayor): inf no es JSON válido y haría
+        fallar las rutas que exponen el resumen.
+
+        Args:
+            pct: Percentil entre 0 y 100
+
+        Returns:
+            Límite superior del bucket, o None si no hay observaciones
+        """
+        cumulative = self.cumulative()
+        if not cumulative[-1]:
+            return None
+        target = pct / 100 * cumulative[-1]
+        for bound, count in zip(self.buckets, cumulative):
+            if count >= target:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict:
+        """Resumen serializable del histograma"""
+        cumulative = self.cumulative()
+        labels = [str(bound) for bound in self.buckets] + ["+Inf"]
+        return {
+            "count": cumulative[-1],
+            "sum": round(self.sum, 6),
+            "buckets": dict(zip(labels, cumulative)),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
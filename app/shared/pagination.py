@@ -0,0 +1,79 @@
+"""
+Paginación por cursor (keyset)
+
+El cursor es opaco para el cliente: codifica en base64 la clave de la última
+fila de la página (ej: [id] o [user_id, id]) y la siguiente página se pide
+con WHERE clave > cursor en lugar de OFFSET, por lo que el costo no crece con
+la profundidad de la página.
+"""
+from typing import Any, Callable, Optional, Sequence, Tuple
+import base64
+import binascii
+import json
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Codifica la clave de la última fila de una página
+
+    Args:
+        *values: Valores de la clave en orden
+
+    Returns:
+        Cursor opaco y seguro para URLs
+    """
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple[int, ...]:
+    """
+    Decodifica un cursor generado por encode_cursor
+
+    Args:
+        cursor: Cursor recibido del cliente
+        size: Número de valores que debe tener la clave
+
+    Returns:
+        Tupla con los valores de la clave
+
+    Raises:
+        HTTPException: Si el cursor es inválido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != size or not all(type(v) is int for v in values):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return tuple(values)
+
+
+def set_next_cursor(
+    response: Response,
+    items: Sequence[Any],
+    limit: Optional[int],
+    key: Callable[[Any], Tuple[Any, ...]]
+) -> Optional[str]:
+    """
+    Agrega el header X-Next-Cursor si puede haber una página siguiente
+
+    Args:
+        response: Respuesta de la ruta
+        items: Filas de la página actual
+        limit: Tamaño de página pedido (None = sin paginación)
+        key: Función que retorna la clave de una fila
+
+    Returns:
+        Cursor de la página siguiente o None si es la última
+    """
+    if not limit or len(items) < limit:
+        return None
+    cursor = encode_cursor(*key(items[-1]))
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    return cursor
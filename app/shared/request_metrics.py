@@ -0,0 +1,255 @@
+"""
+Métricas por petición HTTP: latencia por ruta, peticiones en curso, códigos
+de estado y el tiempo gastado en la base de datos y en ExerciseDB
+"""
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.shared.metrics import DEFAULT_LATENCY_BUCKETS, Histogram
+
+# Consultas SQL o llamadas a ExerciseDB por petición
+CALL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Ruta usada cuando ninguna plantilla coincide (404), para no crear una
+# serie por cada URL inventada
+UNMATCHED_ROUTE = "unmatched"
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+
+class RequestTimings:
+    """Consultas y llamadas externas acumuladas durante una petición"""
+
+    __slots__ = ("db_queries", "db_seconds", "upstream_calls", "upstream_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.upstream_calls = 0
+        self.upstream_seconds = 0.0
+
+
+# Tiempos de la petición en curso; None fuera de una petición (arranque,
+# tareas en segundo plano creadas antes de cualquier petición)
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record_db_query(seconds: float) -> None:
+    """Suma una consulta SQL a la petición en curso"""
+    timings = _current.get()
+    if timings is not None:
+        timings.db_queries += 1
+        timings.db_seconds += seconds
+
+
+def record_upstream_call(seconds: float) -> None:
+    """Suma una llamada a ExerciseDB a la petición en curso"""
+    timings = _current.get()
+    if timings is not None:
+        timings.upstream_calls += 1
+        timings.upstream_seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._request_metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_request_metrics_start", None)
+    if start is not None:
+        record_db_query(time.perf_counter() - start)
+
+
+def instrument_queries(engine: Engine) -> None:
+    """
+    Registra los eventos que miden cada consulta SQL de un engine
+
+    Args:
+        engine: Engine síncrono (o engine.sync_engine de uno asíncrono)
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RouteMetrics:
+    """Histogramas de una ruta (método y plantilla)"""
+
+    __slots__ = ("latency", "db_queries", "db_seconds", "upstream_calls", "upstream_seconds")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.db_queries = Histogram(CALL_COUNT_BUCKETS)
+        self.db_seconds = Histogram()
+        self.upstream_calls = Histogram(CALL_COUNT_BUCKETS)
+        self.upstream_seconds = Histogram()
+
+
+class RequestMetrics:
+    """Registro de las métricas HTTP del proceso"""
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self.responses: Dict[Tuple[str, str, str], int] = {}
+        self.in_progress: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def started(self, method: str) -> None:
+        with self._lock:
+            self.in_progress[method] = self.in_progress.get(method, 0) + 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float, timings: RequestTimings) -> None:
+        """
+        Registra una petición terminada
+
+        Args:
+            method: Método HTTP
+            route: Plantilla de la ruta (ej: '/api/recipes/{recipe_id}')
+            status: Código de estado de la respuesta
+            seconds: Duración total, hasta enviar el último byte
+            timings: Consultas y llamadas externas de la petición
+        """
+        key = (method, route)
+        with self._lock:
+            self.in_progress[method] -= 1
+            status_key = (method, route, str(status))
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+            metrics = self.routes.get(key)
+            if metrics is None:
+                metrics = self.routes[key] = RouteMetrics()
+        metrics.latency.observe(seconds)
+        metrics.db_queries.observe(timings.db_queries)
+        metrics.db_seconds.observe(timings.db_seconds)
+        metrics.upstream_calls.observe(timings.upstream_calls)
+        metrics.upstream_seconds.observe(timings.upstream_seconds)
+
+    def reset(self) -> None:
+        """Descarta todas las métricas (salvo las peticiones en curso)"""
+        with self._lock:
+            self.routes.clear()
+            self.responses.clear()
+
+    def render_prometheus(self) -> str:
+        """Métricas en el formato de texto de Prometheus"""
+        with self._lock:
+            routes = list(self.routes.items())
+            responses = list(self.responses.items())
+            in_progress = list(self.in_progress.items())
+
+        lines: List[str] = []
+        lines.append("# HELP http_requests_in_progress Peticiones HTTP en curso")
+        lines.append("# TYPE http_requests_in_progress gauge")
+        for method, value in sorted(in_progress):
+            lines.append(f'http_requests_in_progress{{method="{method}"}} {value}')
+
+        lines.append("# HELP http_requests_total Peticiones HTTP terminadas por código de estado")
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route, status), value in sorted(responses):
+            lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {value}')
+
+        families = (
+            ("http_request_duration_seconds", "latency", "Latencia de las peticiones HTTP"),
+            ("http_request_db_queries", "db_queries", "Consultas SQL por petición"),
+            ("http_request_db_seconds", "db_seconds", "Tiempo en consultas SQL por petición"),
+            ("http_request_exercisedb_calls", "upstream_calls", "Llamadas a ExerciseDB por petición"),
+            ("http_request_exercisedb_seconds", "upstream_seconds", "Tiempo en llamadas a ExerciseDB por petición"),
+        )
+        routes.sort(key=lambda item: item[0])
+        for name, attribute, description in families:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), metrics in routes:
+                labels = f'method="{method}",route="{_escape(route)}"'
+                _render_histogram(lines, name, labels, getattr(metrics, attribute))
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_histogram(lines: List[str], name: str, labels: str, histogram: Histogram) -> None:
+    cumulative = histogram.cumulative()
+    for bound, count in zip(histogram.buckets, cumulative):
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative[-1]}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+    lines.append(f"{name}_count{{{labels}}} {cumulative[-1]}")
+
+
+def route_template(scope) -> str:
+    """
+    Plantilla completa de la ruta que atendió la petición
+
+    Según la versión de FastAPI, scope["route"] es la ruta ya copiada con el
+    prefijo de include_router o la ruta original del router incluido; en
+    el segundo caso el prefijo se recupera de la URL quitándole tantos
+    segmentos como tiene la plantilla (ninguna ruta usa parámetros {x:path}).
+    """
+    template = getattr(scope.get("route"), "path_format", None)
+    if template is None:
+        return UNMATCHED_ROUTE
+    path = scope["path"]
+    depth = template.count("/")
+    if path.count("/") > depth:
+        return path.rsplit("/", depth)[0] + template
+    return template
+
+
+def _server_timing(timings: RequestTimings, elapsed: float) -> bytes:
+    return (
+        f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.db_queries} queries", '
+        f'exercisedb;dur={timings.upstream_seconds * 1000:.1f};desc="{timings.upstream_calls} calls", '
+        f"app;dur={elapsed * 1000:.1f}"
+    ).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición HTTP
+
+    Es ASGI puro (no BaseHTTPMiddleware) para no envolver el cuerpo de la
+    respuesta: solo intercepta http.response.start y mide hasta que la
+    aplicación termina, así que también cubre las respuestas en streaming.
+    La plantilla de la ruta se lee de scope["route"] al terminar, cuando el
+    router ya la resolvió (ver route_template).
+    """
+
+    def __init__(self, app, registry: RequestMetrics, server_timing: bool = True):
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    header = _server_timing(timings, time.perf_counter() - start)
+                    message["headers"] = [*message.get("headers", ()), (b"server-timing", header)]
+            await send(message)
+
+        self.registry.started(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            self.registry.finished(method, route_template(scope), status, elapsed, timings)
+
+
+request_metrics = RequestMetrics()
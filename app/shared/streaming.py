@@ -0,0 +1,134 @@
+"""
+NDJSON (un objeto JSON por línea) para colecciones grandes
+
+En las respuestas las filas se leen por bloques con paginación keyset y cada
+bloque se serializa y se envía antes de pedir el siguiente, así que la
+memoria usada depende del tamaño del bloque y no del tamaño de la tabla.
+"""
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Sequence, Type
+import json
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from app.shared.config.api_config import STREAM_CHUNK_SIZE
+from app.shared.config.database import session_scope
+from app.shared.config.query_profiler import query_profiler
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# fetch(db, after_id, limit) -> filas ordenadas por id
+ChunkFetcher = Callable[[Any, Optional[int], int], Awaitable[Sequence[Any]]]
+
+
+def wants_ndjson(request: Request, stream: bool = False) -> bool:
+    """
+    Indica si el cliente pidió la colección en streaming
+
+    Args:
+        request: Petición actual
+        stream: Valor del parámetro ?stream=true
+
+    Returns:
+        True si se pidió ?stream=true o Accept: application/x-ndjson
+    """
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def iter_request_items(request: Request) -> AsyncIterator[Any]:
+    """
+    Recorre los elementos del cuerpo de una petición
+
+    Con Content-Type application/x-ndjson el cuerpo se lee a medida que llega
+    y cada línea se entrega sin decodificar (bytes), para que un error de JSON
+    afecte solo a ese elemento. En otro caso el cuerpo debe ser un arreglo JSON.
+
+    Args:
+        request: Petición actual
+
+    Yields:
+        Elementos del arreglo o líneas NDJSON no vacías
+
+    Raises:
+        HTTPException: Si el cuerpo no es un arreglo JSON válido
+    """
+    if NDJSON_MEDIA_TYPE in request.headers.get("content-type", ""):
+        buffer = b""
+        async for data in request.stream():
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array")
+    for item in payload:
+        yield item
+
+
+async def iter_chunks(
+    db: Any,
+    fetch: ChunkFetcher,
+    after_id: Optional[int] = None,
+    chunk_size: int = STREAM_CHUNK_SIZE
+) -> AsyncIterator[Sequence[Any]]:
+    """
+    Recorre una colección por bloques con paginación keyset
+
+    Args:
+        db: Sesión de base de datos
+        fetch: Función que obtiene un bloque después de un ID
+        after_id: ID desde el que se empieza (exclusivo)
+        chunk_size: Filas por bloque
+
+    Yields:
+        Bloques de filas en orden de ID
+    """
+    while True:
+        chunk = await fetch(db, after_id, chunk_size)
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        after_id = chunk[-1].id
+
+
+def ndjson_response(
+    fetch: ChunkFetcher,
+    schema: Type[BaseModel],
+    after_id: Optional[int] = None,
+    chunk_size: int = STREAM_CHUNK_SIZE
+) -> StreamingResponse:
+    """
+    Transmite una colección como NDJSON
+
+    La respuesta usa su propia sesión: la de la dependencia get_db puede
+    cerrarse antes de que termine el envío del cuerpo.
+
+    Args:
+        fetch: Función que obtiene un bloque después de un ID
+        schema: Esquema con el que se serializa cada fila
+        after_id: ID desde el que se empieza (exclusivo)
+        chunk_size: Filas por bloque
+
+    Returns:
+        StreamingResponse con media type application/x-ndjson
+    """
+    async def body() -> AsyncIterator[bytes]:
+        # Un SELECT por bloque: se repite por diseño, no es un N+1
+        with query_profiler.allow_repeats():
+            async with session_scope() as db:
+                async for chunk in iter_chunks(db, fetch, after_id, chunk_size):
+                    yield b"".join(
+                        schema.model_validate(row).model_dump_json().encode() + b"\n"
+                        for row in chunk
+                    )
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
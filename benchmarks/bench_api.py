@@ -0,0 +1,458 @@
+"""
+Benchmark de carga de todas las rutas de la API
+
+Levanta main.app en el mismo proceso sobre httpx.ASGITransport, con su
+lifespan, una base SQLite sembrada de forma determinista (DATABASE_URL) y el
+ExerciseDB simulado de mock_exercisedb.py. Para cada ruta de user_routes,
+recipe_routes, list_routes y exercise_routes lanza --requests peticiones con
+--concurrency clientes y reporta p50/p95/p99, throughput, errores y, si el
+middleware de métricas está activo, las consultas SQL por petición.
+
+Las rutas que modifican datos trabajan sobre filas reservadas para ellas
+(una receta o lista distinta por petición), así que cada medición hace
+siempre el mismo trabajo. El control de admisión de /login se desactiva
+salvo con --login-admission, para medir la ruta y no el rechazo.
+
+El resultado se guarda en JSON junto con el commit y la configuración;
+--compare contra un JSON anterior marca las rutas cuya p95 empeoró más que
+--threshold por ciento.
+
+Uso:
+    python -m benchmarks.bench_api --concurrency 16 --requests 300 --output bench.json
+    python -m benchmarks.bench_api --compare bench.json --fail-on-regression
+    python -m benchmarks.bench_api --routes recipes lists   # solo algunas rutas
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from benchmarks.common import print_table, summarize
+from benchmarks.mock_exercisedb import BODY_PARTS, EQUIPMENTS, TARGETS, build_catalog, run_mock_exercisedb
+
+PASSWORD = "benchmark-password"
+
+# (url, argumentos de client.request) para la petición i
+RequestBuilder = Callable[[int], Tuple[str, Dict[str, Any]]]
+
+
+@dataclass
+class Scenario:
+    """Una ruta a medir"""
+
+    group: str
+    method: str
+    route: str
+    build: RequestBuilder
+    expected: Sequence[int] = (200,)
+    auth: bool = True
+    max_requests: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.route}"
+
+
+@dataclass
+class Seed:
+    """Ids de las filas sembradas, por uso"""
+
+    users: int
+    recipes_per_user: int
+    lists_per_user: int
+    recipes_per_list: int
+    reserved: int
+
+    @property
+    def recipes(self) -> int:
+        return self.users * self.recipes_per_user
+
+    @property
+    def lists(self) -> int:
+        return self.users * self.lists_per_user
+
+    def reserved_recipe(self, i: int) -> int:
+        """Receta reservada para la petición i (PUT/DELETE de recetas)"""
+        return self.recipes + 1 + i % self.reserved
+
+    def reserved_list(self, pool: int, i: int) -> int:
+        """
+        Lista reservada para la petición i dentro de un grupo
+
+        Grupos: 0 PUT, 1 DELETE, 2 alta de recetas, 3 baja de recetas y
+        4 alta de una receta.
+        """
+        return self.lists + 1 + pool * self.reserved + i % self.reserved
+
+
+def _env_defaults(directory: str, base_url: str, mirror: bool) -> None:
+    """Configura la app antes de importarla: base SQLite, ExerciseDB simulado y rutas temporales"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{directory}/bench.db"
+    os.environ["EXERCISEDB_BASE_URL"] = base_url
+    os.environ["EXERCISE_MIRROR_ENABLED"] = "true" if mirror else "false"
+    os.environ["EXERCISE_MIRROR_PATH"] = f"{directory}/exercise_catalog.json"
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("CACHE_BACKEND", "memory")
+    os.environ.setdefault("SQL_PROFILER_ENABLED", "true")
+    os.environ.setdefault("SQL_SLOW_QUERY_MS", "1000")
+
+
+def _seed_database(seed: Seed) -> None:
+    """Crea las tablas y siembra usuarios, recetas y listas con inserciones en bloque"""
+    from sqlalchemy import insert
+    from app.models.List import List as ListModel
+    from app.models.Recipe import DAYS, Recipe
+    from app.models.RecipeList import RecipeList
+    from app.models.User import User
+    from app.shared.config import security
+    from app.shared.config.database import Base, get_engine
+
+    engine = get_engine()
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    password = security.get_password_hash(PASSWORD)
+
+    users = [
+        {"email": f"user{u}@bench.example", "name": f"User{u}", "lastname": "Bench", "password": password}
+        for u in range(1, seed.users + 1)
+    ]
+    recipes = [
+        {
+            "name": f"Receta {r}",
+            "description": "Receta sembrada para el benchmark",
+            "ingredients": "avena, leche, plátano",
+            "instructions": "Mezclar todo y servir",
+            "scheduled_days": {DAYS[r % 7], DAYS[(r + 3) % 7]},
+            "meal_type": ("Desayuno", "Comida", "Cena")[r % 3],
+            "user_id": (r - 1) // seed.recipes_per_user + 1,
+        }
+        for r in range(1, seed.recipes + seed.reserved + 1)
+    ]
+    # Las recetas reservadas quedan a nombre del primer usuario
+    for recipe in recipes[seed.recipes:]:
+        recipe["user_id"] = 1
+    lists = [
+        {"list_name": f"Lista {l}", "user_id": (l - 1) // seed.lists_per_user + 1}
+        for l in range(1, seed.lists + 1)
+    ] + [
+        {"list_name": f"Reservada {l}", "user_id": 1}
+        for l in range(5 * seed.reserved)
+    ]
+    recipe_lists = []
+    for l in range(1, seed.lists + 1):
+        owner = (l - 1) // seed.lists_per_user
+        for k in range(seed.recipes_per_list):
+            recipe_lists.append({"list_id": l, "recipe_id": owner * seed.recipes_per_user + (l + k) % seed.recipes_per_user + 1})
+    # Las listas del grupo de bajas empiezan con las recetas que se les quitan
+    for i in range(seed.reserved):
+        for k in range(seed.recipes_per_list):
+            recipe_lists.append({"list_id": seed.reserved_list(3, i), "recipe_id": k + 1})
+
+    with engine.begin() as connection:
+        connection.execute(insert(User), users)
+        connection.execute(insert(Recipe), recipes)
+        connection.execute(insert(ListModel), lists)
+        connection.execute(insert(RecipeList), recipe_lists)
+
+
+def _recipe_body(i: int, user_id: int = 1) -> Dict[str, Any]:
+    return {
+        "name": f"Nueva receta {i}",
+        "description": "Creada durante el benchmark",
+        "ingredients": "huevo, espinaca",
+        "instructions": "Batir y cocinar",
+        "scheduled_days": ["Lunes", "Jueves"],
+        "meal_type": "Cena",
+        "user_id": user_id,
+    }
+
+
+def _scenarios(seed: Seed, exercise_ids: List[str]) -> List[Scenario]:
+    """Rutas a medir, en el orden en que se ejecutan"""
+    user = lambda i: i % seed.users + 1
+    recipe = lambda i: i % seed.recipes + 1
+    list_id = lambda i: i % seed.lists + 1
+    exercise = lambda i: exercise_ids[i % len(exercise_ids)]
+    recipe_ids = lambda i: [seed.recipes_per_list + 1 + (i + k) % seed.recipes_per_user for k in range(5)]
+
+    return [
+        # user_routes
+        Scenario("users", "GET", "/api/users/{user_id}", lambda i: (f"/api/users/{user(i)}", {}), auth=False),
+        Scenario("users", "GET", "/api/users", lambda i: ("/api/users", {"params": {"limit": 20}}), auth=False),
+        Scenario("users", "POST", "/api/users", lambda i: ("/api/users", {"json": {
+            "email": f"new{i}@bench.example", "name": "Nuevo", "lastname": "Bench", "password": PASSWORD,
+        }}), expected=(201,), auth=False),
+        Scenario("users", "POST", "/api/login", lambda i: ("/api/login", {"data": {
+            "email": f"user{user(i)}@bench.example", "password": PASSWORD,
+        }}), auth=False),
+
+        # recipe_routes
+        Scenario("recipes", "GET", "/api/recipes/{recipe_id}", lambda i: (f"/api/recipes/{recipe(i)}", {})),
+        Scenario("recipes", "GET", "/api/recipes", lambda i: ("/api/recipes", {"params": {"limit": 20}})),
+        Scenario("recipes", "GET", "/api/recipes/user/{user_id}", lambda i: (f"/api/recipes/user/{user(i)}", {"params": {"limit": 20}})),
+        Scenario("recipes", "POST", "/api/recipes", lambda i: ("/api/recipes", {"json": _recipe_body(i)}), expected=(201,)),
+        Scenario("recipes", "POST", "/api/recipes/bulk", lambda i: ("/api/recipes/bulk", {
+            "json": [_recipe_body(i * 50 + k) for k in range(50)],
+        })),
+        Scenario("recipes", "PUT", "/api/recipes/{recipe_id}", lambda i: (f"/api/recipes/{seed.reserved_recipe(i)}", {
+            "json": _recipe_body(i),
+        })),
+        Scenario("recipes", "POST", "/api/recipes/{recipe_id}/lists/{list_id}", lambda i: (
+            f"/api/recipes/{recipe(i)}/lists/{seed.reserved_list(4, i)}", {},
+        ), expected=(201,)),
+        Scenario("recipes", "DELETE", "/api/recipes/{recipe_id}", lambda i: (f"/api/recipes/{seed.reserved_recipe(i)}", {}), expected=(204,)),
+
+        # list_routes
+        Scenario("lists", "GET", "/api/lists/{list_id}", lambda i: (f"/api/lists/{list_id(i)}", {})),
+        Scenario("lists", "GET", "/api/lists", lambda i: ("/api/lists", {"params": {"limit": 20}})),
+        Scenario("lists", "GET", "/api/lists/user/{user_id}", lambda i: (f"/api/lists/user/{user(i)}", {})),
+        Scenario("lists", "GET", "/api/lists/{list_id}/recipes", lambda i: (f"/api/lists/{list_id(i)}/recipes", {})),
+        Scenario("lists", "POST", "/api/lists", lambda i: ("/api/lists", {"json": {"list_name": f"Nueva {i}", "user_id": user(i)}}), expected=(201,)),
+        Scenario("lists", "PUT", "/api/lists/{list_id}", lambda i: (f"/api/lists/{seed.reserved_list(0, i)}", {
+            "json": {"list_name": f"Renombrada {i}", "user_id": 1},
+        })),
+        Scenario("lists", "POST", "/api/lists/{list_id}/recipes", lambda i: (f"/api/lists/{seed.reserved_list(2, i)}/recipes", {
+            "json": {"recipe_ids": recipe_ids(i)},
+        })),
+        Scenario("lists", "DELETE", "/api/lists/{list_id}/recipes", lambda i: (f"/api/lists/{seed.reserved_list(3, i)}/recipes", {
+            "json": {"recipe_ids": list(range(1, seed.recipes_per_list + 1))},
+        })),
+        Scenario("lists", "DELETE", "/api/lists/{list_id}", lambda i: (f"/api/lists/{seed.reserved_list(1, i)}", {}), expected=(204,)),
+
+        # exercise_routes (sin token; el caché queda caliente tras el calentamiento)
+        Scenario("exercises", "GET", "/api/exercises", lambda i: ("/api/exercises", {"params": {"limit": 20, "offset": i % 10 * 20}}), auth=False),
+        Scenario("exercises", "GET", "/api/exercises/{exercise_id}", lambda i: (f"/api/exercises/{exercise(i)}", {}), auth=False),
+        Scenario("exercises", "GET", "/api/exercises/bodypart/{bodypart}", lambda i: (
+            f"/api/exercises/bodypart/{BODY_PARTS[i % len(BODY_PARTS)]}", {},
+        ), auth=False),
+        Scenario("exercises", "GET", "/api/exercises/target/{target}", lambda i: (f"/api/exercises/target/{TARGETS[i % len(TARGETS)]}", {}), auth=False),
+        Scenario("exercises", "GET", "/api/exercises/equipment/{equipment}", lambda i: (
+            f"/api/exercises/equipment/{EQUIPMENTS[i % len(EQUIPMENTS)]}", {},
+        ), auth=False),
+        Scenario("exercises", "GET", "/api/exercises/metadata/bodyparts", lambda i: ("/api/exercises/metadata/bodyparts", {}), auth=False),
+        Scenario("exercises", "GET", "/api/exercises/metadata/targets", lambda i: ("/api/exercises/metadata/targets", {}), auth=False),
+        Scenario("exercises", "GET", "/api/exercises/metadata/equipment", lambda i: ("/api/exercises/metadata/equipment", {}), auth=False),
+        Scenario("exercises", "GET", "/api/exercises/search", lambda i: (
+            "/api/exercises/search", {"params": {"q": ("dumbell", "press", "squat", "cable row")[i % 4]}},
+        ), auth=False),
+        # Deja el catálogo local cargado: filter solo existe en mirror mode
+        Scenario("exercises", "POST", "/api/exercises/mirror/sync", lambda i: ("/api/exercises/mirror/sync", {}), auth=False, max_requests=5),
+        Scenario("exercises", "GET", "/api/exercises/filter", lambda i: (
+            "/api/exercises/filter", {"params": {"bodypart": BODY_PARTS[i % len(BODY_PARTS)], "equipment": EQUIPMENTS[i % len(EQUIPMENTS)]}},
+        ), auth=False),
+        Scenario("exercises", "GET", "/api/cache/stats", lambda i: ("/api/cache/stats", {}), auth=False),
+        Scenario("exercises", "DELETE", "/api/cache/expired", lambda i: ("/api/cache/expired", {}), auth=False),
+        Scenario("exercises", "DELETE", "/api/cache/clear", lambda i: ("/api/cache/clear", {}), auth=False),
+    ]
+
+
+async def _run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    tokens: List[str],
+    requests: int,
+    warmup: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """
+    Ejecuta las peticiones de una ruta con `concurrency` clientes
+
+    Las primeras `warmup` peticiones no se miden. Cada cliente toma el
+    siguiente índice libre, así que la petición i siempre es la misma entre
+    ejecuciones aunque el orden en que terminan cambie.
+    """
+    counter = itertools.count()
+    samples: List[float] = []
+    errors: Counter = Counter()
+    total = warmup + requests
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            url, kwargs = scenario.build(i)
+            headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"} if scenario.auth else {}
+            start = time.perf_counter()
+            response = await client.request(scenario.method, url, headers=headers, **kwargs)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if i < warmup:
+                continue
+            if response.status_code in scenario.expected:
+                samples.append(elapsed_ms)
+            else:
+                errors[str(response.status_code)] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    # El throughput incluye el calentamiento en el tiempo, así que se
+    # calcula sobre todas las peticiones
+    result = summarize(samples, elapsed * requests / total if total else elapsed)
+    result["errors"] = dict(errors)
+    return result
+
+
+def _db_queries_per_request(method: str, route: str) -> Optional[float]:
+    """Promedio de consultas SQL por petición según el middleware de métricas"""
+    from app.shared.request_metrics import request_metrics
+
+    metrics = request_metrics.routes.get((method, route))
+    if metrics is None or not metrics.db_queries.count:
+        return None
+    return round(metrics.db_queries.sum / metrics.db_queries.count, 2)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _benchmark(args) -> Dict[str, Any]:
+    """Siembra la base, arranca la app y mide cada ruta seleccionada"""
+    import main
+    from app.services.exercise_catalog import catalog
+    from app.services.login_admission import login_admission
+    from app.shared.config.database import dispose_engines
+    from app.shared.config.query_profiler import query_profiler
+    from app.shared.config.security import create_access_token
+    from app.shared.request_metrics import request_metrics
+
+    per_scenario = args.requests + args.warmup
+    seed = Seed(args.users, args.recipes_per_user, args.lists_per_user, args.recipes_per_list, reserved=per_scenario)
+    _seed_database(seed)
+    tokens = [create_access_token(data={"sub": f"user{u}@bench.example"}) for u in range(1, seed.users + 1)]
+    exercise_ids = [exercise["exerciseId"] for exercise in build_catalog(args.exercises)]
+    scenarios = [s for s in _scenarios(seed, exercise_ids) if not args.routes or s.group in args.routes]
+
+    login_admission.enabled = args.login_admission
+    results: Dict[str, Any] = {}
+    async with main.app.router.lifespan_context(main.app):
+        if args.mirror:
+            while not catalog.loaded:
+                await asyncio.sleep(0.05)
+        request_metrics.reset()
+        query_profiler.reset()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for scenario in scenarios:
+                requests = min(args.requests, scenario.max_requests or args.requests)
+                warmup = min(args.warmup, requests)
+                result = await _run_scenario(client, scenario, tokens, requests, warmup, args.concurrency)
+                result["db_queries_per_request"] = _db_queries_per_request(scenario.method, scenario.route)
+                results[scenario.name] = result
+                print(f"{scenario.name:<48} p95 {result['p95_ms']:>9.3f} ms  errores {result['errors'] or '-'}")
+
+    await dispose_engines()
+    return results
+
+
+# Parámetros que deben coincidir para que dos ejecuciones sean comparables
+COMPARABLE_CONFIG = ("concurrency", "requests", "warmup", "users", "recipes_per_user", "lists_per_user",
+                     "recipes_per_list", "exercises", "upstream_latency_ms", "mirror", "login_admission")
+
+
+def _compare(results: Dict[str, Any], config: Dict[str, Any], baseline_path: str, threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Compara la p95 de cada ruta con un resultado anterior
+
+    Returns:
+        Rutas cuya p95 empeoró más de `threshold` por ciento (y más de
+        `min_delta_ms`, para no marcar ruido en rutas de microsegundos)
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nComparación con {baseline_path} (commit {baseline.get('meta', {}).get('commit')})")
+    baseline_config = baseline.get("meta", {}).get("config", {})
+    differences = [key for key in COMPARABLE_CONFIG if key in baseline_config and baseline_config[key] != config.get(key)]
+    if differences:
+        print("Aviso: la configuración no coincide (" + ", ".join(
+            f"{key}: {baseline_config[key]} -> {config.get(key)}" for key in differences
+        ) + "); los resultados no son comparables")
+    header = f"{'ruta':<48}{'p95 antes':>12}{'p95 ahora':>12}{'cambio':>10}"
+    print(header)
+    print("-" * len(header))
+    regressions = []
+    for name, row in results.items():
+        before = baseline.get("routes", {}).get(name)
+        if before is None or not before.get("p95_ms"):
+            continue
+        change = (row["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        regressed = change > threshold and row["p95_ms"] - before["p95_ms"] > min_delta_ms
+        flag = "  REGRESIÓN" if regressed else ""
+        print(f"{name:<48}{before['p95_ms']:>12.3f}{row['p95_ms']:>12.3f}{change:>+9.1f}%{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main(args) -> int:
+    with tempfile.TemporaryDirectory() as directory:
+        with run_mock_exercisedb(size=args.exercises, latency_ms=args.upstream_latency_ms) as mock:
+            _env_defaults(directory, mock.base_url, args.mirror)
+            started = time.time()
+            results = asyncio.run(_benchmark(args))
+
+    print_table(
+        f"{len(results)} rutas, {args.requests} peticiones por ruta, concurrencia {args.concurrency}",
+        {name.replace("/api", "", 1): row for name, row in results.items()},
+    )
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": started,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "routes": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+
+    if args.compare:
+        regressions = _compare(results, report["meta"]["config"], args.compare, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} rutas empeoraron más de {args.threshold}%")
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de carga de las rutas de la API")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes concurrentes por ruta")
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones medidas por ruta")
+    parser.add_argument("--warmup", type=int, default=20, help="Peticiones previas sin medir por ruta")
+    parser.add_argument("--routes", nargs="*", choices=["users", "recipes", "lists", "exercises"], help="Grupos de rutas (por defecto todos)")
+    parser.add_argument("--users", type=int, default=50, help="Usuarios sembrados")
+    parser.add_argument("--recipes-per-user", type=int, default=20, help="Recetas sembradas por usuario")
+    parser.add_argument("--lists-per-user", type=int, default=5, help="Listas sembradas por usuario")
+    parser.add_argument("--recipes-per-list", type=int, default=10, help="Recetas por lista sembrada")
+    parser.add_argument("--exercises", type=int, default=1500, help="Ejercicios del ExerciseDB simulado")
+    parser.add_argument("--upstream-latency-ms", type=float, default=0.0, help="Latencia añadida por el ExerciseDB simulado")
+    parser.add_argument("--mirror", action="store_true", help="Arranca con el mirror mode activo")
+    parser.add_argument("--login-admission", action="store_true", help="Mantiene el control de admisión de /login")
+    parser.add_argument("--output", help="Ruta del JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Empeoramiento de p95 (en %%) que cuenta como regresión")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Empeoramiento mínimo absoluto de p95 para marcar una regresión")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Sale con código 1 si hay regresiones")
+    sys.exit(main(parser.parse_args()))
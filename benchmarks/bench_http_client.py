@@ -0,0 +1,90 @@
+"""
+Benchmark del camino de fallo de caché hacia ExerciseDB
+
+Compara la latencia de ExternalAPIClient.get con caché deshabilitada en dos
+modos contra un servidor ExerciseDB simulado local:
+
+- per_request: un httpx.AsyncClient nuevo por petición (comportamiento
+  anterior, un handshake TCP/TLS en cada llamada)
+- shared: el cliente compartido de create_http_client() con keep-alive
+
+Uso:
+    python -m benchmarks.bench_http_client --requests 300 --concurrency 10 --tls
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, List
+
+import httpx
+
+from app.services.external_api_service import ExternalAPIClient
+from app.shared.config.external_api_config import REQUEST_TIMEOUT
+from app.shared.config.http_client import create_http_client
+from benchmarks.common import print_table, summarize
+from benchmarks.mock_exercisedb import MockExerciseDB, run_mock_exercisedb
+
+
+async def _drive(call: Callable[[], Awaitable[None]], total: int, concurrency: int) -> dict:
+    """Ejecuta `total` llamadas con la concurrencia indicada y resume latencias"""
+    samples: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            samples.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return summarize(samples, time.perf_counter() - started)
+
+
+async def bench_per_request(upstream: MockExerciseDB, endpoint: str, total: int, concurrency: int) -> dict:
+    async def call():
+        async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT, verify=upstream.verify) as http_client:
+            client = ExternalAPIClient(upstream.base_url, client=http_client)
+            await client.get(endpoint, params={"limit": 10}, use_cache=False)
+
+    return await _drive(call, total, concurrency)
+
+
+async def bench_shared(upstream: MockExerciseDB, endpoint: str, total: int, concurrency: int) -> dict:
+    http_client = create_http_client(verify=upstream.verify)
+    try:
+        async def call():
+            client = ExternalAPIClient(upstream.base_url, client=http_client)
+            await client.get(endpoint, params={"limit": 10}, use_cache=False)
+
+        # Calentar el pool para medir el estado estable
+        await call()
+        return await _drive(call, total, concurrency)
+    finally:
+        await http_client.aclose()
+
+
+async def main(args) -> None:
+    with run_mock_exercisedb(size=args.exercises, latency_ms=args.latency_ms, tls=args.tls) as upstream:
+        results = {}
+        for concurrency in sorted({1, args.concurrency}):
+            results[f"per_request c={concurrency}"] = await bench_per_request(upstream, args.endpoint, args.requests, concurrency)
+            results[f"shared c={concurrency}"] = await bench_shared(upstream, args.endpoint, args.requests, concurrency)
+
+    print_table(f"Camino de fallo de caché a {args.endpoint} ({'https' if args.tls else 'http'})", results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del cliente HTTP de ExerciseDB")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--endpoint", default="/exercises")
+    parser.add_argument("--exercises", type=int, default=1500)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia artificial del upstream")
+    parser.add_argument("--tls", action="store_true", help="Servir el upstream por HTTPS")
+    parser.add_argument("--output", help="Ruta del JSON de resultados")
+    asyncio.run(main(parser.parse_args()))
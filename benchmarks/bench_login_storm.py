@@ -0,0 +1,159 @@
+"""
+Benchmark de una ráfaga de logins sobre las rutas que no autentican
+
+Mientras varios clientes hacen POST /api/login en bucle, se mide la latencia
+de GET /api/users/{id} (una consulta simple, sin bcrypt). Se compara:
+
+- idle: sin logins, como referencia
+- threadpool: bcrypt en el threadpool de Starlette (comportamiento anterior)
+- process_pool: bcrypt en el pool de procesos de security.py
+- process_pool+admission: además con el control de admisión de /login,
+  que rechaza con 429/503 lo que excede los límites en lugar de encolarlo
+
+La app corre en el mismo proceso sobre httpx.ASGITransport con SQLite
+(aiosqlite), así que el GIL del worker es el mismo para las dos cargas.
+
+Uso:
+    BCRYPT_ROUNDS=12 python -m benchmarks.bench_login_storm --logins 16 --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models.User import User
+from app.routes.user_routes import user_router
+from app.services.login_admission import login_admission
+from app.shared.config import security
+from app.shared.config.database import get_db
+from benchmarks.common import print_table, summarize
+
+EMAIL = "storm@example.com"
+PASSWORD = "benchmark-password"
+
+
+def _create_app(database_path: str) -> FastAPI:
+    """App con las rutas de usuarios sobre una base SQLite local"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_test_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(user_router, prefix="/api")
+    app.dependency_overrides[get_db] = get_test_db
+    app.state.engine = engine
+    return app
+
+
+async def _seed(app: FastAPI) -> int:
+    """Crea la tabla de usuarios y el usuario del benchmark"""
+    async with app.state.engine.begin() as connection:
+        await connection.run_sync(lambda sync_conn: User.__table__.create(sync_conn))
+    session_factory = async_sessionmaker(app.state.engine, expire_on_commit=False)
+    async with session_factory() as db:
+        user = User(email=EMAIL, name="Storm", lastname="Bench", password=security.get_password_hash(PASSWORD))
+        db.add(user)
+        await db.commit()
+        return user.id
+
+
+async def _measure(client: httpx.AsyncClient, user_id: int, logins: int, seconds: float) -> Dict[str, Dict[str, float]]:
+    """Mide GET /users/{id} mientras `logins` clientes inician sesión en bucle"""
+    stop = asyncio.Event()
+    login_samples: List[float] = []
+    rejected_samples: List[float] = []
+    probe_samples: List[float] = []
+
+    async def login_loop():
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = await client.post("/api/login", data={"email": EMAIL, "password": PASSWORD})
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if response.status_code in (429, 503):
+                rejected_samples.append(elapsed_ms)
+                await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+                continue
+            response.raise_for_status()
+            login_samples.append(elapsed_ms)
+
+    async def probe_loop():
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = await client.get(f"/api/users/{user_id}")
+            response.raise_for_status()
+            probe_samples.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.005)
+
+    tasks = [asyncio.create_task(login_loop()) for _ in range(logins)]
+    tasks.append(asyncio.create_task(probe_loop()))
+    started = time.perf_counter()
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    return {
+        "probe": summarize(probe_samples, elapsed),
+        "login": summarize(login_samples, elapsed),
+        "rejected": summarize(rejected_samples, elapsed),
+    }
+
+
+async def main(args) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        app = _create_app(os.path.join(directory, "bench.db"))
+        user_id = await _seed(app)
+        results: Dict[str, Dict[str, float]] = {}
+
+        # Las primeras mediciones comparan solo dónde corre bcrypt
+        login_admission.enabled = False
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+            idle = await _measure(client, user_id, 0, args.seconds)
+            results["idle /users/{id}"] = idle["probe"]
+
+            storm = await _measure(client, user_id, args.logins, args.seconds)
+            results["threadpool /users/{id}"] = storm["probe"]
+            results["threadpool /login"] = storm["login"]
+
+            security.start_password_hasher(args.workers)
+            try:
+                await asyncio.sleep(1)  # arranque de los procesos
+                storm = await _measure(client, user_id, args.logins, args.seconds)
+                results["process_pool /users/{id}"] = storm["probe"]
+                results["process_pool /login"] = storm["login"]
+
+                login_admission.enabled = True
+                storm = await _measure(client, user_id, args.logins, args.seconds)
+                results["admission /users/{id}"] = storm["probe"]
+                results["admission /login 200"] = storm["login"]
+                results["admission /login 429/503"] = storm["rejected"]
+            finally:
+                security.shutdown_password_hasher()
+
+        await app.state.engine.dispose()
+
+    print_table(
+        f"Ráfaga de {args.logins} logins concurrentes (bcrypt rounds={security.BCRYPT_ROUNDS}, workers={args.workers})",
+        results
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de logins concurrentes")
+    parser.add_argument("--logins", type=int, default=16, help="Clientes haciendo login en bucle")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duración de cada medición")
+    parser.add_argument("--workers", type=int, default=security.PASSWORD_HASH_WORKERS, help="Procesos de bcrypt")
+    parser.add_argument("--output", help="Ruta del JSON de resultados")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,143 @@
+"""
+Benchmark de la serialización de las respuestas de ExerciseDB en caché
+
+Compara, con la respuesta ya en caché, el CPU por petición de
+GET /api/exercises?limit=N en dos modos:
+
+- response_model: la ruta retorna los dicts del caché y FastAPI los valida
+  con ExerciseListResponse y los serializa en cada petición (comportamiento
+  anterior, reproducido en una ruta agregada solo para el benchmark)
+- rendered: la ruta actual, que responde los bytes ya validados y
+  serializados de rendered_cache (ver ExternalAPIClient.get_rendered)
+
+Levanta main.app en el mismo proceso sobre httpx.ASGITransport contra el
+ExerciseDB simulado y mide time.process_time() por petición, además del
+costo aislado de validar y serializar la página y de comprobar que ambos
+modos responden el mismo JSON.
+
+Uso:
+    python -m benchmarks.bench_serialization --limit 1000 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import print_table, summarize
+from benchmarks.mock_exercisedb import run_mock_exercisedb
+
+LEGACY_ROUTE = "/bench/response-model/exercises"
+
+
+def _env_defaults(directory: str, base_url: str) -> None:
+    os.environ["EXERCISEDB_BASE_URL"] = base_url
+    os.environ["CACHE_BACKEND"] = "memory"
+    os.environ["EXERCISE_MIRROR_ENABLED"] = "false"
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(directory, 'bench.db')}")
+    os.environ.setdefault("SECRET_KEY", "bench-serialization")
+
+
+def _add_legacy_route(app) -> None:
+    """Ruta con el comportamiento anterior: dicts del caché validados por response_model"""
+    from fastapi import Depends
+    from app.schemas.exercise_schema import ExerciseListResponse
+    from app.services.exercise_service import ExerciseService, get_exercise_service
+
+    async def legacy_exercises(limit: int, service: ExerciseService = Depends(get_exercise_service)):
+        return await service.get_all_exercises(limit=limit)
+
+    app.add_api_route(LEGACY_ROUTE, legacy_exercises, methods=["GET"], response_model=ExerciseListResponse)
+
+
+async def _measure(client: httpx.AsyncClient, url: str, limit: int, total: int) -> Dict[str, float]:
+    samples: List[float] = []
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for _ in range(total):
+        start = time.perf_counter()
+        response = await client.get(url, params={"limit": limit})
+        response.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    row = summarize(samples, time.perf_counter() - started)
+    row["cpu_ms_per_request"] = round((time.process_time() - cpu_started) * 1000 / total, 3)
+    row["body_bytes"] = len(response.content)
+    return row
+
+
+def _serialization_cost(data, repeat: int) -> float:
+    """ms de CPU de validar y serializar la página con ExerciseListResponse"""
+    from app.services.exercise_service import LIST_RESPONSE
+
+    started = time.process_time()
+    for _ in range(repeat):
+        LIST_RESPONSE.dump_json(LIST_RESPONSE.validate_python(data))
+    return (time.process_time() - started) * 1000 / repeat
+
+
+async def _benchmark(args) -> Dict:
+    import main
+    from app.services.cache_service import cache
+
+    _add_legacy_route(main.app)
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # Primera petición de cada modo: llena cache y rendered_cache
+            legacy = await client.get(LEGACY_ROUTE, params={"limit": args.limit})
+            rendered = await client.get("/api/exercises", params={"limit": args.limit})
+            legacy.raise_for_status()
+            rendered.raise_for_status()
+            if legacy.json() != rendered.json():
+                raise SystemExit("Las respuestas de ambos modos no coinciden")
+
+            for _ in range(args.warmup):
+                await client.get(LEGACY_ROUTE, params={"limit": args.limit})
+                await client.get("/api/exercises", params={"limit": args.limit})
+
+            results = {
+                "response_model": await _measure(client, LEGACY_ROUTE, args.limit, args.requests),
+                "rendered": await _measure(client, "/api/exercises", args.limit, args.requests),
+            }
+
+        data = cache.get("api_request", "/exercises", params={"limit": args.limit})
+        results["serialization_only_ms"] = round(_serialization_cost(data, max(1, args.requests // 10)), 3)
+    return results
+
+
+def main(args) -> int:
+    with tempfile.TemporaryDirectory() as directory:
+        with run_mock_exercisedb(size=max(args.exercises, args.limit)) as mock:
+            _env_defaults(directory, mock.base_url)
+            results = asyncio.run(_benchmark(args))
+
+    serialization_ms = results.pop("serialization_only_ms")
+    print_table(f"GET /api/exercises?limit={args.limit} con la respuesta en caché", results)
+    before = results["response_model"]["cpu_ms_per_request"]
+    after = results["rendered"]["cpu_ms_per_request"]
+    print(f"\n{'modo':<32}{'CPU ms/petición':>18}{'bytes':>10}")
+    for name, row in results.items():
+        print(f"{name:<32}{row['cpu_ms_per_request']:>18.3f}{row['body_bytes']:>10}")
+    print(f"\nCPU ahorrado por petición: {before - after:.3f} ms ({(before - after) / before * 100:.1f}%)")
+    print(f"Validar y serializar la página por separado: {serialization_ms:.3f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"limit": args.limit, "serialization_only_ms": serialization_ms, "modes": results}, f, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CPU por petición de las respuestas de ExerciseDB en caché")
+    parser.add_argument("--limit", type=int, default=1000, help="Ejercicios por respuesta (?limit=)")
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones medidas por modo")
+    parser.add_argument("--warmup", type=int, default=10, help="Peticiones de calentamiento por modo")
+    parser.add_argument("--exercises", type=int, default=1500, help="Ejercicios del ExerciseDB simulado")
+    parser.add_argument("--output", help="Ruta del JSON de resultados")
+    sys.exit(main(parser.parse_args()))
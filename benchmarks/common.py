@@ -0,0 +1,58 @@
+"""
+Utilidades compartidas por los benchmarks
+"""
+import statistics
+from typing import Dict, List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Calcula un percentil por el método del rango más cercano
+
+    Args:
+        samples: Muestras (no necesitan estar ordenadas)
+        pct: Percentil entre 0 y 100
+
+    Returns:
+        Valor del percentil, 0.0 si no hay muestras
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(samples_ms: List[float], elapsed_s: float) -> Dict[str, float]:
+    """
+    Resume latencias en milisegundos
+
+    Args:
+        samples_ms: Latencias de cada petición en ms
+        elapsed_s: Tiempo total de la medición en segundos
+
+    Returns:
+        Diccionario con p50/p95/p99, media y throughput
+    """
+    return {
+        "requests": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3) if samples_ms else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "max_ms": round(max(samples_ms), 3) if samples_ms else 0.0,
+        "throughput_rps": round(len(samples_ms) / elapsed_s, 1) if elapsed_s else 0.0,
+    }
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    """Imprime un resumen tabular de varias mediciones"""
+    print(f"\n{title}")
+    header = f"{'caso':<32}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, row in rows.items():
+        print(
+            f"{name:<32}{row['requests']:>7}{row['p50_ms']:>10.3f}"
+            f"{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['throughput_rps']:>10.1f}"
+        )
@@ -0,0 +1,96 @@
+"""
+Revisión de los planes de ejecución de las consultas de los servicios
+
+Ejecuta los métodos de lectura de los servicios contra la base de datos
+configurada (variables DB_*), captura el SQL que emiten y corre EXPLAIN sobre
+cada sentencia:
+
+- ERROR: acceso type=ALL (full scan) a una tabla sin índices candidatos
+- WARN: full scan aunque había índices; el optimizador lo elige en tablas
+  pequeñas, conviene revisarlo con datos reales
+
+Termina con código 1 si hay algún ERROR, para usarlo en CI después de
+`alembic upgrade head`.
+
+Uso:
+    python -m benchmarks.explain_queries
+"""
+import asyncio
+import sys
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.services.list_service import ListService
+from app.services.recipe_service import RecipeService
+from app.services.user_service import UserService
+from app.shared.config.database import SessionLocal, SyncSessionAdapter, get_engine
+
+# (nombre, llamada al servicio); los IDs no necesitan existir
+QUERIES: List[Tuple[str, Callable[[Any], Awaitable[Any]]]] = [
+    ("RecipeService.get_recipe_by_id", lambda db: RecipeService.get_recipe_by_id(db, 1)),
+    ("RecipeService.get_all_recipes (offset)", lambda db: RecipeService.get_all_recipes(db, 0, 10)),
+    ("RecipeService.get_all_recipes (cursor)", lambda db: RecipeService.get_all_recipes(db, limit=10, after_id=1)),
+    ("RecipeService.get_recipes_by_user", lambda db: RecipeService.get_recipes_by_user(db, 1, 10, after_id=1)),
+    ("RecipeService.get_recipes_by_list", lambda db: RecipeService.get_recipes_by_list(db, 1)),
+    ("ListService.get_list_by_id", lambda db: ListService.get_list_by_id(db, 1)),
+    ("ListService.get_all_lists", lambda db: ListService.get_all_lists(db, 10, after_id=1)),
+    ("ListService.get_lists_by_user", lambda db: ListService.get_lists_by_user(db, 1, 10, after_id=1)),
+    ("ListService.get_recipes_in_list", lambda db: ListService.get_recipes_in_list(db, 1)),
+    ("UserService.get_user_by_id", lambda db: UserService.get_user_by_id(db, 1)),
+    ("UserService.get_all_users", lambda db: UserService.get_all_users(db, limit=10, after_id=1)),
+    ("UserService.login_user", lambda db: UserService.login_user(db, "explain@example.com", "-")),
+]
+
+
+async def _capture() -> List[Tuple[str, str, Any]]:
+    """Ejecuta las consultas de QUERIES y retorna (nombre, sentencia, parámetros)"""
+    captured: List[Tuple[str, str, Any]] = []
+    current: List[Optional[str]] = [None]
+    engine = get_engine()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current[0] and statement.lstrip().upper().startswith("SELECT"):
+            captured.append((current[0], statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        for name, call in QUERIES:
+            current[0] = name
+            db = SyncSessionAdapter(SessionLocal(bind=engine, expire_on_commit=False))
+            try:
+                await call(db)
+            except HTTPException:
+                pass  # 404/401 con IDs inexistentes: el SQL ya se emitió
+            finally:
+                await db.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def main() -> int:
+    captured = asyncio.run(_capture())
+    errors = 0
+
+    with get_engine().connect() as connection:
+        for name, statement, parameters in captured:
+            plan = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+            print(f"\n{name}\n  {' '.join(statement.split())}")
+            for row in plan:
+                status = "ok"
+                if row.get("type") == "ALL":
+                    status = "WARN" if row.get("possible_keys") else "ERROR"
+                    errors += status == "ERROR"
+                print(
+                    f"  [{status:5}] table={row.get('table')} type={row.get('type')} "
+                    f"key={row.get('key')} rows={row.get('rows')} extra={row.get('Extra')}"
+                )
+
+    print(f"\n{len(captured)} consultas revisadas, {errors} full scans sin índice")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Presupuesto de tiempo de import de main.py
+
+Importa main en procesos nuevos (como hace cada worker de uvicorn) y mide
+el tiempo del import, los módulos más costosos según `python -X importtime`
+y cuántas conexiones de red se intentan durante el import, que deben ser
+cero: los engines y las comprobaciones de la base de datos se hacen en el
+lifespan (ver database.init_database).
+
+Para que una conexión accidental se note, DB_HOST apunta a una IP que no
+responde; si el import intentara conectarse tardaría DB_CONNECT_TIMEOUT.
+
+Uso:
+    python -m benchmarks.import_time --runs 5 --budget-ms 1000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Se ejecuta en el proceso hijo: cuenta los connect() y mide el import
+_PROBE = """
+import json, socket, time
+attempts = []
+_connect = socket.socket.connect
+def connect(self, address):
+    attempts.append(repr(address))
+    return _connect(self, address)
+socket.socket.connect = connect
+start = time.perf_counter()
+import main
+print(json.dumps({"import_ms": (time.perf_counter() - start) * 1000, "connects": attempts}))
+"""
+
+# IP reservada para documentación (TEST-NET-1): nunca responde
+_UNREACHABLE_HOST = "192.0.2.1"
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "import-time")
+    env.pop("DATABASE_URL", None)
+    env.update({"DB_HOST": _UNREACHABLE_HOST, "DB_PORT": "3306", "DB_HOST_LOCAL": _UNREACHABLE_HOST})
+    return env
+
+
+def _measure_once() -> Dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE], env=_child_env(), capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _slowest_modules(limit: int) -> List[Tuple[str, float]]:
+    """Módulos con mayor tiempo acumulado (incluye sus dependencias) según -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        env=_child_env(), capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules.append((name.strip(), int(cumulative) / 1000))
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return modules[:limit]
+
+
+def main(args) -> int:
+    runs = [_measure_once() for _ in range(args.runs)]
+    import_ms = [run["import_ms"] for run in runs]
+    connects = sorted({address for run in runs for address in run["connects"]})
+    median = statistics.median(import_ms)
+    slowest = _slowest_modules(args.top)
+
+    print(f"import main: mediana {median:.0f} ms, mín {min(import_ms):.0f} ms, máx {max(import_ms):.0f} ms ({args.runs} procesos)")
+    print(f"conexiones durante el import: {len(connects)}" + (f" {connects}" if connects else ""))
+    print(f"\n{'módulo':<56}{'acumulado ms':>14}")
+    for name, ms in slowest:
+        print(f"{name:<56}{ms:>14.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"import_ms": import_ms, "median_ms": median, "connects": connects, "slowest": slowest}, f, indent=2)
+
+    failed = False
+    if median > args.budget_ms:
+        print(f"\nEl import supera el presupuesto de {args.budget_ms:.0f} ms")
+        failed = True
+    if connects:
+        print("\nEl import abre conexiones de red; deben hacerse en el lifespan")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de import de main.py")
+    parser.add_argument("--runs", type=int, default=5, help="Procesos en los que se mide el import")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Mediana máxima permitida en ms")
+    parser.add_argument("--top", type=int, default=15, help="Módulos más lentos a mostrar")
+    parser.add_argument("--output", help="Ruta del JSON de resultados")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,247 @@
+"""
+Servidor local que imita la API de ExerciseDB para los benchmarks
+
+Sirve un catálogo sintético y determinista sobre un socket real (HTTP o
+HTTPS con certificado autofirmado) para que las mediciones incluyan el coste
+de establecer conexiones TCP/TLS.
+
+Uso independiente:
+    python -m benchmarks.mock_exercisedb --port 8900 --exercises 1500
+"""
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import random
+import socket
+import ssl
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+BODY_PARTS = ["back", "cardio", "chest", "lower arms", "lower legs", "neck", "shoulders", "upper arms", "upper legs", "waist"]
+TARGETS = ["abs", "biceps", "calves", "delts", "forearms", "glutes", "hamstrings", "lats", "pectorals", "quads", "traps", "triceps"]
+EQUIPMENTS = ["barbell", "body weight", "cable", "dumbbell", "kettlebell", "leverage machine", "band", "smith machine"]
+MOVEMENTS = ["press", "curl", "row", "raise", "squat", "lunge", "extension", "fly", "pulldown", "crunch", "deadlift", "shrug"]
+MODIFIERS = ["incline", "decline", "seated", "standing", "single arm", "alternate", "close grip", "wide grip", "reverse", "lying"]
+
+
+def build_catalog(size: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Genera un catálogo sintético con la misma forma que ExerciseDB
+
+    Args:
+        size: Número de ejercicios
+        seed: Semilla para que el catálogo sea reproducible
+
+    Returns:
+        Lista de ejercicios
+    """
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(size):
+        equipment = rng.choice(EQUIPMENTS)
+        movement = rng.choice(MOVEMENTS)
+        name = f"{equipment} {rng.choice(MODIFIERS)} {movement}"
+        catalog.append({
+            "exerciseId": f"ex{i:05d}",
+            "name": name,
+            "gifUrl": f"https://static.example.com/gifs/ex{i:05d}.gif",
+            "targetMuscles": [rng.choice(TARGETS)],
+            "bodyParts": [rng.choice(BODY_PARTS)],
+            "equipments": [equipment],
+            "secondaryMuscles": rng.sample(TARGETS, 2),
+            "instructions": [
+                f"Step:1 Set up the {equipment} and brace your core.",
+                f"Step:2 Perform the {movement} with a controlled tempo.",
+                "Step:3 Return to the starting position and repeat.",
+            ],
+        })
+    return catalog
+
+
+def _page(items: List[Dict[str, Any]], request: Request) -> Dict[str, Any]:
+    """Pagina una colección con la forma de respuesta de ExerciseDB"""
+    limit = int(request.query_params.get("limit", 10))
+    offset = int(request.query_params.get("offset", 0))
+    total = len(items)
+    total_pages = max(1, -(-total // limit))
+    return {
+        "success": True,
+        "metadata": {
+            "totalExercises": total,
+            "totalPages": total_pages,
+            "currentPage": offset // limit + 1,
+            "previousPage": None,
+            "nextPage": None,
+        },
+        "data": items[offset:offset + limit],
+    }
+
+
+def create_app(size: int = 1500, latency_ms: float = 0.0) -> Starlette:
+    """
+    Crea la aplicación ASGI del servidor simulado
+
+    Args:
+        size: Número de ejercicios del catálogo
+        latency_ms: Latencia artificial añadida a cada respuesta
+
+    Returns:
+        Aplicación Starlette
+    """
+    catalog = build_catalog(size)
+    by_id = {e["exerciseId"]: e for e in catalog}
+    state = {"requests": 0}
+
+    async def delay():
+        state["requests"] += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+    async def exercises(request: Request):
+        await delay()
+        return JSONResponse(_page(catalog, request))
+
+    async def exercise_detail(request: Request):
+        await delay()
+        exercise = by_id.get(request.path_params["exercise_id"])
+        if exercise is None:
+            return JSONResponse({"success": False, "error": "Exercise not found"}, status_code=404)
+        return JSONResponse({"success": True, "data": exercise})
+
+    def filtered(field: str):
+        async def endpoint(request: Request):
+            await delay()
+            value = request.path_params["value"].lower()
+            items = [e for e in catalog if value in (v.lower() for v in e[field])]
+            return JSONResponse(_page(items, request))
+        return endpoint
+
+    def listing(values: List[str]):
+        async def endpoint(request: Request):
+            await delay()
+            return JSONResponse(values)
+        return endpoint
+
+    async def stats(request: Request):
+        return JSONResponse(state)
+
+    return Starlette(routes=[
+        Route("/api/v1/exercises", exercises),
+        Route("/api/v1/exercises/bodyPartList", listing(BODY_PARTS)),
+        Route("/api/v1/exercises/targetList", listing(TARGETS)),
+        Route("/api/v1/exercises/equipmentList", listing(EQUIPMENTS)),
+        Route("/api/v1/exercises/bodyPart/{value}", filtered("bodyParts")),
+        Route("/api/v1/exercises/target/{value}", filtered("targetMuscles")),
+        Route("/api/v1/exercises/equipment/{value}", filtered("equipments")),
+        Route("/api/v1/exercises/{exercise_id}", exercise_detail),
+        Route("/__stats", stats),
+    ])
+
+
+def _self_signed_cert(directory: str) -> tuple[str, str]:
+    """Genera un certificado autofirmado para 127.0.0.1 y devuelve (cert, key)"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = f"{directory}/cert.pem"
+    key_path = f"{directory}/key.pem"
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    return cert_path, key_path
+
+
+class MockExerciseDB:
+    """Datos de conexión de un servidor simulado en ejecución"""
+
+    def __init__(self, base_url: str, ssl_context: Optional[ssl.SSLContext]):
+        self.base_url = base_url
+        self.ssl_context = ssl_context
+
+    @property
+    def verify(self):
+        """Valor para el parámetro verify de httpx"""
+        return self.ssl_context if self.ssl_context is not None else True
+
+
+@contextmanager
+def run_mock_exercisedb(size: int = 1500, latency_ms: float = 0.0, tls: bool = False) -> Iterator[MockExerciseDB]:
+    """
+    Levanta el servidor simulado en un hilo aparte sobre un puerto libre
+
+    Args:
+        size: Número de ejercicios del catálogo
+        latency_ms: Latencia artificial por respuesta
+        tls: Si debe servir HTTPS con un certificado autofirmado
+
+    Yields:
+        MockExerciseDB con la URL base (incluye /api/v1) y el contexto SSL
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ssl_kwargs = {}
+        ssl_context = None
+        if tls:
+            cert_path, key_path = _self_signed_cert(tmp)
+            ssl_kwargs = {"ssl_certfile": cert_path, "ssl_keyfile": key_path}
+            ssl_context = ssl.create_default_context(cafile=cert_path)
+
+        config = uvicorn.Config(
+            create_app(size, latency_ms), host="127.0.0.1", port=port,
+            log_level="warning", access_log=False, **ssl_kwargs,
+        )
+        server = uvicorn.Server(config)
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+
+        scheme = "https" if tls else "http"
+        try:
+            yield MockExerciseDB(f"{scheme}://127.0.0.1:{port}/api/v1", ssl_context)
+        finally:
+            server.should_exit = True
+            thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor ExerciseDB simulado")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--exercises", type=int, default=1500)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.exercises, args.latency_ms), host="127.0.0.1", port=args.port, log_level="warning")
@@ -1,17 +1,91 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.shared.config.database import engine, Base
+from app.shared.config.http_client import create_http_client
+from app.shared.config.external_api_config import CACHE_SWEEP_INTERVAL, EXERCISE_MIRROR_ENABLED
+from app.shared.config.database import check_database, dispose_engines
+from app.shared.config.security import start_password_hasher, shutdown_password_hasher, wait_password_hasher
+from app.services.cache_service import cache, rendered_cache
+from app.services.exercise_service import ExerciseService
+from app.services.exercise_catalog import catalog
+from app.shared.config.api_config import METRICS_ENABLED, METRICS_SERVER_TIMING
+from app.shared.config.query_profiler import SQL_PROFILER_ENABLED, QueryProfilerMiddleware, query_profiler
+from app.shared.etag import ETAG_HEADER
+from app.shared.pagination import NEXT_CURSOR_HEADER
+from app.shared.request_metrics import MetricsMiddleware, request_metrics
 from app.routes.user_routes import user_router
 from app.routes.recipe_routes import recipe_router
 from app.routes.list_routes import list_routes
 from app.routes.exercise_routes import exercise_router
+from app.routes.monitoring_routes import monitoring_router, metrics_router, health_router
 
-app = FastAPI()
+
+async def _sync_exercise_catalog(app: FastAPI):
+    """Sincroniza el catálogo de ejercicios sin bloquear el arranque"""
+    try:
+        total = await ExerciseService(app.state.http_client).sync_catalog()
+        print(f"Catálogo local de ejercicios sincronizado: {total} ejercicios")
+    except Exception as e:
+        print(f"No se pudo sincronizar el catálogo de ejercicios, se usará la API externa: {e}")
+
+
+async def _warm_up(app: FastAPI):
+    """
+    Crea los engines, prueba la base de datos y espera al pool de bcrypt
+
+    Corre en segundo plano: el worker arranca sin esperar conexiones y
+    /health/ready responde 503 hasta que termina.
+    """
+    try:
+        await check_database()
+    except Exception as e:
+        print(f"La base de datos no respondió durante el arranque: {e!r}")
+    try:
+        await wait_password_hasher()
+    except Exception as e:
+        print(f"El pool de bcrypt no arrancó: {e!r}")
+    app.state.ready = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    # Cliente HTTP compartido para ExerciseDB durante toda la vida de la app
+    app.state.http_client = create_http_client()
+    # Pool de procesos para bcrypt (registro y login)
+    start_password_hasher()
+    # Barrido periódico de entradas expiradas del caché
+    cache.start_sweeper(CACHE_SWEEP_INTERVAL)
+    rendered_cache.start_sweeper(CACHE_SWEEP_INTERVAL)
+    # Mirror mode: cargar el catálogo local o sincronizarlo en segundo plano
+    sync_task = None
+    if EXERCISE_MIRROR_ENABLED and not catalog.load_file():
+        sync_task = asyncio.create_task(_sync_exercise_catalog(app))
+    # Conexión a la base de datos y procesos de bcrypt, sin bloquear el arranque
+    warm_up_task = asyncio.create_task(_warm_up(app))
+    try:
+        yield
+    finally:
+        warm_up_task.cancel()
+        if sync_task is not None:
+            sync_task.cancel()
+        await cache.stop_sweeper()
+        await rendered_cache.stop_sweeper()
+        await app.state.http_client.aclose()
+        shutdown_password_hasher()
+        await dispose_engines()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(user_router, prefix="/api", tags=["users"])
 app.include_router(recipe_router, prefix="/api", tags=["recipes"])
 app.include_router(list_routes, prefix="/api", tags=["lists"])
 app.include_router(exercise_router, prefix="/api", tags=["exercises"])
+app.include_router(monitoring_router, prefix="/api", tags=["monitoring"])
+app.include_router(metrics_router, tags=["monitoring"])
+app.include_router(health_router, tags=["monitoring"])
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,7 +93,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER],
 )
 
+if SQL_PROFILER_ENABLED:
+    app.add_middleware(QueryProfilerMiddleware, profiler=query_profiler)
 
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+# Se añade al final para quedar por fuera de CORS y medir la petición completa
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, registry=request_metrics, server_timing=METRICS_SERVER_TIMING)
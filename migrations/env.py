@@ -0,0 +1,45 @@
+"""
+Entorno de Alembic
+
+Usa el mismo engine que la aplicación (con su fallback a localhost) y los
+modelos como metadata de referencia para --autogenerate.
+"""
+from logging.config import fileConfig
+from alembic import context
+from app.shared.config.database import Base, get_engine
+from app.models.User import User
+from app.models.Recipe import Recipe
+from app.models.List import List
+from app.models.RecipeList import RecipeList
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Genera el SQL de las migraciones sin conectarse (alembic upgrade --sql)"""
+    context.configure(
+        url=get_engine().url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Aplica las migraciones sobre la base de datos"""
+    with get_engine().connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
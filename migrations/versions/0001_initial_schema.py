@@ -0,0 +1,74 @@
+"""Esquema inicial (el que creaba Base.metadata.create_all)
+
+En una base de datos que ya tiene las tablas, marcar esta revisión como
+aplicada con `alembic stamp 0001` antes de `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("email", sa.String(100), nullable=False, unique=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("lastname", sa.String(100), nullable=False),
+        sa.Column("password", sa.String(255), nullable=False),
+    )
+    op.create_table(
+        "lists",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("list_name", sa.String(100), nullable=False),
+        sa.Column(
+            "user_id", sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False
+        ),
+    )
+    op.create_table(
+        "recipes",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.String(255), nullable=False),
+        sa.Column("ingredients", sa.String(500), nullable=False),
+        sa.Column("instructions", sa.String(1000), nullable=False),
+        sa.Column(
+            "scheduled_days",
+            mysql.SET("Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"),
+            nullable=True
+        ),
+        sa.Column("meal_type", sa.Enum("Desayuno", "Comida", "Cena"), nullable=True),
+        sa.Column(
+            "user_id", sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False
+        ),
+    )
+    op.create_table(
+        "recipe_lists",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "list_id", sa.Integer(),
+            sa.ForeignKey("lists.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "recipe_id", sa.Integer(),
+            sa.ForeignKey("recipes.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("recipe_lists")
+    op.drop_table("recipes")
+    op.drop_table("lists")
+    op.drop_table("users")
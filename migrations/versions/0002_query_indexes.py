@@ -0,0 +1,58 @@
+"""Índices para las consultas por usuario y por lista
+
+- recipes(user_id) y lists(user_id): listados y paginación keyset por
+  usuario; en InnoDB el índice secundario incluye la PK, así que
+  WHERE user_id = ? AND id > ? ORDER BY id se resuelve con un range scan
+- recipes(user_id, meal_type): recetas de un usuario por tipo de comida
+- recipe_lists UNIQUE (list_id, recipe_id): evita duplicados, lo usa
+  INSERT IGNORE y cubre las búsquedas por list_id
+- recipe_lists(recipe_id): listas de una receta y el ON DELETE CASCADE
+
+MySQL crea un índice implícito para cada foreign key sin índice y lo
+elimina solo al crear uno que lo reemplace, así que no quedan duplicados.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_recipes_user_id", "recipes", ["user_id"])
+    op.create_index("ix_recipes_user_id_meal_type", "recipes", ["user_id", "meal_type"])
+    op.create_index("ix_lists_user_id", "lists", ["user_id"])
+
+    # Las bases existentes pueden tener pares repetidos: se conserva el más antiguo.
+    # La subconsulta derivada evita el error 1093 de MySQL al leer la tabla que se modifica
+    op.execute(
+        "DELETE FROM recipe_lists WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM recipe_lists GROUP BY list_id, recipe_id) AS keep"
+        ")"
+    )
+    with op.batch_alter_table("recipe_lists") as batch_op:
+        batch_op.create_unique_constraint("uq_recipe_lists_list_recipe", ["list_id", "recipe_id"])
+    op.create_index("ix_recipe_lists_recipe_id", "recipe_lists", ["recipe_id"])
+
+
+def downgrade() -> None:
+    # En MySQL el esquema de 0001 tenía el índice implícito de cada foreign key
+    # (con el nombre de la columna), que MySQL eliminó al crear los de
+    # upgrade(). Se recrean primero: MySQL no permite dejar una foreign key
+    # sin índice. Los pares duplicados que upgrade() eliminó no se recuperan
+    if op.get_bind().dialect.name == "mysql":
+        op.create_index("user_id", "recipes", ["user_id"])
+        op.create_index("user_id", "lists", ["user_id"])
+        op.create_index("list_id", "recipe_lists", ["list_id"])
+        op.create_index("recipe_id", "recipe_lists", ["recipe_id"])
+    op.drop_index("ix_recipe_lists_recipe_id", table_name="recipe_lists")
+    with op.batch_alter_table("recipe_lists") as batch_op:
+        batch_op.drop_constraint("uq_recipe_lists_list_recipe", type_="unique")
+    op.drop_index("ix_lists_user_id", table_name="lists")
+    op.drop_index("ix_recipes_user_id_meal_type", table_name="recipes")
+    op.drop_index("ix_recipes_user_id", table_name="recipes")